@@ -15,6 +15,7 @@ import json
 import logging
 import time
 import traceback
+from contextlib import asynccontextmanager
 from typing import Any, Dict, List, Callable, Optional, Tuple
 
 import uvicorn
@@ -28,7 +29,7 @@ from scrapers.amazon import scrape_amazon
 from scrapers.flipkart import fetch_flipkart_products
 from scrapers.croma import get_cheapest_croma_product
 
-# background scrapers (unchanged)
+# background scrapers (async; Playwright on the central browser, pooled Selenium fallback)
 from scrapers.reliance import scrape_reliance_product
 from scrapers.poorvika import get_cheapest_poorvika_product
 from scrapers.pai import get_cheapest_pai_product
@@ -38,6 +39,35 @@ from scrapers.sangeetha import scrape_sangeetha_product
 import scrapers.amazon as amazon_mod
 import scrapers.flipkart as flipkart_mod
 import scrapers.croma as croma_mod
+import scrapers.reliance as reliance_mod
+import scrapers.poorvika as poorvika_mod
+import scrapers.pai as pai_mod
+import scrapers.sangeetha as sangeetha_mod
+
+# every scraper module that runs on the central browser when _manager is set
+PLAYWRIGHT_SCRAPER_MODULES = [amazon_mod, flipkart_mod, croma_mod, reliance_mod, poorvika_mod, pai_mod, sangeetha_mod]
+
+from utils.browser_health import (BrowserHealth, BrowserSupervisor, HealthThresholds, find_child_pid, is_browser_fault,
+                                  process_tree_rss_mb)
+from utils.chromedriver import ensure_chromedriver
+from utils.circuit_breaker import CircuitBreakers, CircuitOpenError
+from utils.hedging import HedgeBudget, hedged
+from utils.hot_tabs import HotTabPool
+from utils.latency import LatencyTracker, attempt_clock, slot_acquired
+from utils.driver_pool import SELENIUM_CONCURRENCY, configure_driver_pool, get_driver_pool, run_selenium_fetch, shutdown_driver_pool
+from utils.asset_cache import get_asset_cache
+from utils.async_http import close_async_http, get_async_http
+from utils.blocking import blocking_stats
+from utils.query_normalizer import CanonicalQuery, canonicalize
+from utils.negative_cache import NegativeEntry, failure_reason, get_negative_cache
+from utils.readiness import readiness_stats
+from utils.result_cache import SWR_DEFAULT, SWR_WAIT, CachedResult, cache_key, get_result_cache, is_cacheable
+from utils.search_strategy import strategy_stats
+from utils.session_state import session_stats
+from utils.singleflight import SingleFlight
+from utils.snapshot_store import get_snapshot_store
+from utils.task_registry import TaskRegistry
+from utils.structured_data import structured_stats
 
 # ----------------------------------------------------------------
 # Logging configuration (very verbose to help debugging)
@@ -59,51 +89,176 @@ app.add_middleware(
 )
 
 # store background fetch task for /more keyed by lowercase query
-# Each value will be an asyncio.Task that resolves to a dict mapping site->result
-background_results: Dict[str, asyncio.Task] = {}
+# Each value will be an asyncio.Task that resolves to a dict mapping site->result;
+# bounded and self-expiring (BACKGROUND_RESULTS_MAX_ENTRIES / _TTL / _MAX_MB)
+background_results = TaskRegistry.from_env("background_results")
 
 # Playwright run-time objects (populated on startup if Playwright available)
 _playwright = None
 _browser = None
 _playwright_manager = None
 
-# Limit concurrent Selenium usage (some scrapers use webdriver)
-SELENIUM_CONCURRENCY = 4
-selenium_semaphore = asyncio.Semaphore(SELENIUM_CONCURRENCY)
+# Restarts browsers that bloat, keep failing or crash (see utils/browser_health.py)
+browser_supervisor = BrowserSupervisor()
+
+# Shared Chrome driver pool: one driver per concurrent Selenium fetch
+# (SELENIUM_CONCURRENCY, see run_selenium_fetch), plus a spare.
+configure_driver_pool(size=SELENIUM_CONCURRENCY + 1)
 
 # ----------------------------------------------------------------
 # Manager that exposes acquire_context() for scrapers that expect it.
 # Not all of your scrapers use Playwright; it's safe to keep this in.
 # ----------------------------------------------------------------
 class PlaywrightManager:
-    def __init__(self, browser, reuse_context: bool = False, max_concurrent_contexts: int = 4, debug_name: str = "PlayMgr"):
+    def __init__(self, browser, reuse_context: bool = False, max_concurrent_contexts: int = 4, debug_name: str = "PlayMgr",
+                 launcher: Optional[Callable[[], Any]] = None):
         self.browser = browser
         self.reuse_context = reuse_context
         self._shared_ctx = None
         self._debug_name = debug_name
         # control how many contexts are created concurrently to avoid resource storm
         self._ctx_sema = asyncio.Semaphore(max_concurrent_contexts)
+        # async callable returning a freshly launched Browser; enables recycling and crash recovery
+        self._launcher = launcher
+        self._relaunch_lock = asyncio.Lock()
+        self._inflight: Dict[int, int] = {}
+        self._closing = False
+        self.generation = 0
+        self.health = BrowserHealth(debug_name)
+        self.thresholds = HealthThresholds.from_env()
+        self.hot_tabs = HotTabPool.from_env(self)
+        self._watch(browser)
         logger.debug("[%s] PlaywrightManager initialized (reuse=%s, max_ctx=%s)", self._debug_name, self.reuse_context, max_concurrent_contexts)
 
-    def acquire_context(self):
+    def _watch(self, browser):
+        browser.on("disconnected", lambda b: self._on_disconnected(b))
+
+    def _on_disconnected(self, browser):
+        # retired browsers are closed on purpose; only the current one going away is a crash
+        if browser is not self.browser or self._closing:
+            return
+        logger.error("[%s] Browser disconnected unexpectedly; relaunching", self._debug_name)
+        asyncio.ensure_future(self.relaunch("crash"))
+
+    async def relaunch(self, reason: str):
+        """
+        Swap in a new browser. New contexts go to the new browser immediately; the old
+        one is closed in the background once the contexts still open on it are done.
+        """
+        if self._launcher is None or self._closing:
+            return
+        generation = self.generation
+        async with self._relaunch_lock:
+            if generation != self.generation:
+                return  # someone else already relaunched
+            logger.info("[%s] Relaunching browser (reason=%s)", self._debug_name, reason)
+            new_browser = await self._launcher()
+            old_browser, old_shared = self.browser, self._shared_ctx
+            self._watch(new_browser)
+            self.browser = new_browser
+            self._shared_ctx = None
+            self.generation += 1
+            self.health.relaunched(reason)
+        asyncio.ensure_future(self._retire(old_browser, old_shared))
+
+    async def _retire(self, browser, shared_ctx=None, drain_timeout: float = 120.0):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        while self._inflight.get(id(browser), 0) > 0 and loop.time() < deadline:
+            await asyncio.sleep(0.5)
+        self._inflight.pop(id(browser), None)
+        try:
+            if shared_ctx is not None:
+                await shared_ctx.close()
+            if browser.is_connected():
+                await browser.close()
+            logger.info("[%s] Retired old browser", self._debug_name)
+        except Exception:
+            logger.exception("[%s] Error closing retired browser", self._debug_name)
+
+    async def open_context(self, **context_options):
+        browser = self.browser
+        if not browser.is_connected():
+            await self.relaunch("crash")
+            browser = self.browser
+        try:
+            return browser, await browser.new_context(**context_options)
+        except Exception:
+            if browser.is_connected() or self._launcher is None:
+                raise
+            # the browser died between the check and new_context(); retry once on its successor
+            await self.relaunch("crash")
+            browser = self.browser
+            return browser, await browser.new_context(**context_options)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        One unit of work on the current browser without a temporary context (hot tabs):
+        shares the context semaphore, in-flight accounting and health counters with acquire_context().
+        """
+        await self._ctx_sema.acquire()
+        slot_acquired()
+        try:
+            if not self.browser.is_connected():
+                await self.relaunch("crash")
+            browser = self.browser
+            self._inflight[id(browser)] = self._inflight.get(id(browser), 0) + 1
+        except BaseException:
+            self._ctx_sema.release()
+            raise
+        ok = True
+        try:
+            yield browser
+        except Exception as e:
+            # a retailer timing out or a scraper finding nothing says nothing about the browser
+            ok = not is_browser_fault(e)
+            raise
+        finally:
+            self._inflight[id(browser)] = self._inflight.get(id(browser), 1) - 1
+            if browser is self.browser:
+                self.health.record(ok)
+                reason = self.health.recycle_reason(self.thresholds)
+                if reason:
+                    asyncio.ensure_future(self.relaunch(reason))
+            self._ctx_sema.release()
+
+    def lease_tab(self, site: str, context_options: Dict[str, Any], warm, route=None, direct_only: bool = False):
+        """A search-ready page for `site` (see utils/hot_tabs.py); `warm` navigates a page to that state."""
+        return self.hot_tabs.lease(site, context_options, warm, route=route, direct_only=direct_only)
+
+    def rss_mb(self) -> Optional[float]:
+        # Chromium runs under Playwright's driver process, a direct child of this process
+        return process_tree_rss_mb(find_child_pid("playwright"))
+
+    def acquire_context(self, **context_options):
+        """
+        Async context manager yielding a BrowserContext on the central browser.
+        `context_options` (user_agent, locale, ...) are passed to new_context() for
+        temporary contexts; the shared context (reuse_context=True) ignores them.
+        """
         manager = self
 
         class _Ctx:
             def __init__(self):
                 self._ctx = None
+                self._browser = None
 
             async def __aenter__(self):
                 logger.debug("[%s] acquiring context semaphore", manager._debug_name)
                 await manager._ctx_sema.acquire()
+                slot_acquired()
                 try:
                     if manager.reuse_context:
                         if manager._shared_ctx is None:
                             logger.debug("[%s] Creating shared BrowserContext", manager._debug_name)
-                            manager._shared_ctx = await manager.browser.new_context()
+                            _, manager._shared_ctx = await manager.open_context()
+                        self._browser = manager.browser
                         self._ctx = manager._shared_ctx
                     else:
                         logger.debug("[%s] Creating temporary BrowserContext", manager._debug_name)
-                        self._ctx = await manager.browser.new_context()
+                        self._browser, self._ctx = await manager.open_context(**context_options)
+                    manager._inflight[id(self._browser)] = manager._inflight.get(id(self._browser), 0) + 1
                     logger.debug("[%s] context ready", manager._debug_name)
                     return self._ctx
                 except Exception:
@@ -123,6 +278,13 @@ class PlaywrightManager:
                         logger.debug("[%s] Leaving shared BrowserContext open", manager._debug_name)
                 finally:
                     try:
+                        manager._inflight[id(self._browser)] = manager._inflight.get(id(self._browser), 1) - 1
+                        if self._browser is manager.browser:
+                            # only a closed/crashed target counts; scraper misses and cancellations don't
+                            manager.health.record(not is_browser_fault(exc))
+                            reason = manager.health.recycle_reason(manager.thresholds)
+                            if reason:
+                                asyncio.ensure_future(manager.relaunch(reason))
                         manager._ctx_sema.release()
                     except Exception:
                         logger.exception("[%s] Error releasing context semaphore", manager._debug_name)
@@ -130,6 +292,8 @@ class PlaywrightManager:
         return _Ctx()
 
     async def close(self):
+        self._closing = True
+        await self.hot_tabs.close()
         if self._shared_ctx:
             try:
                 logger.info("[%s] Closing shared context", self._debug_name)
@@ -397,6 +561,30 @@ document.getElementById('moreBtn').addEventListener('click', async () => {
 async def index():
     return INDEX_HTML
 
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "browsers": browser_supervisor.snapshot(),
+        "selenium_pool": get_driver_pool().stats(),
+        "hot_tabs": _playwright_manager.hot_tabs.stats() if _playwright_manager is not None else None,
+        "search_strategies": strategy_stats(),
+        "readiness": readiness_stats(),
+        "blocking": blocking_stats(),
+        "sessions": session_stats(),
+        "asset_cache": get_asset_cache().stats(),
+        "http_client": get_async_http().stats(),
+        "result_sources": structured_stats(),
+        "result_cache": await asyncio.to_thread(get_result_cache().stats),
+        "negative_cache": get_negative_cache().stats(),
+        "snapshots": get_snapshot_store().stats(),
+        "singleflight": scraper_flights.stats(),
+        "background_results": background_results.stats(),
+        "latency": latency.stats(),
+        "hedging": hedge_budget.stats(),
+        "circuit_breakers": breakers.stats(),
+    }
+
 # ----------------------------------------------------------------
 # Playwright init/close helpers (shared by startup and CLI test mode)
 # ----------------------------------------------------------------
@@ -417,36 +605,32 @@ async def init_playwright():
 
         _playwright = await async_playwright().start()
 
-        _browser = await _playwright.chromium.launch(
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--disable-software-rasterizer",
-            ],
-        )
+        async def _launch_browser():
+            return await _playwright.chromium.launch(
+                headless=True,
+                args=[
+                    "--no-sandbox",
+                    "--disable-setuid-sandbox",
+                    "--disable-dev-shm-usage",
+                    "--disable-gpu",
+                    "--disable-software-rasterizer",
+                ],
+            )
+
+        _browser = await _launch_browser()
         logger.info("init_playwright: Chromium launched via Playwright.")
 
-        _playwright_manager = PlaywrightManager(_browser, reuse_context=False, max_concurrent_contexts=6, debug_name="CentralPlayMgr")
+        # one context per site, so a full /compare (seven sites) runs as concurrent tabs
+        _playwright_manager = PlaywrightManager(_browser, reuse_context=False, max_concurrent_contexts=len(PLAYWRIGHT_SCRAPER_MODULES), debug_name="CentralPlayMgr",
+                                                launcher=_launch_browser)
         logger.info("init_playwright: PlaywrightManager created.")
 
-        try:
-            amazon_mod._manager = _playwright_manager
-            logger.info("Assigned _manager to amazon_mod")
-        except Exception:
-            logger.exception("Failed to assign _manager to amazon_mod")
-        try:
-            flipkart_mod._manager = _playwright_manager
-            logger.info("Assigned _manager to flipkart_mod")
-        except Exception:
-            logger.exception("Failed to assign _manager to flipkart_mod")
-        try:
-            croma_mod._manager = _playwright_manager
-            logger.info("Assigned _manager to croma_mod")
-        except Exception:
-            logger.exception("Failed to assign _manager to croma_mod")
+        for mod in PLAYWRIGHT_SCRAPER_MODULES:
+            try:
+                mod._manager = _playwright_manager
+                logger.info("Assigned _manager to %s", mod.__name__)
+            except Exception:
+                logger.exception("Failed to assign _manager to %s", mod.__name__)
 
         logger.info("init_playwright: Playwright manager assigned.")
     except Exception:
@@ -462,8 +646,12 @@ async def close_playwright():
     """
     global _playwright, _browser, _playwright_manager
     logger.info("close_playwright: cleaning Playwright resources.")
+    for mod in PLAYWRIGHT_SCRAPER_MODULES:
+        mod._manager = None
     try:
         if _playwright_manager:
+            # the manager may have relaunched the browser since startup
+            _browser = _playwright_manager.browser
             try:
                 await _playwright_manager.close()
             except Exception:
@@ -501,12 +689,74 @@ async def shutdown_event():
 async def shutdown_event():
     await close_playwright()
 
+
+@app.on_event("shutdown")
+async def shutdown_browser_supervisor():
+    await browser_supervisor.stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await close_async_http()
+
+
+@app.on_event("shutdown")
+async def shutdown_result_store():
+    result_store = get_result_cache().store
+    if result_store is not None:
+        await asyncio.to_thread(result_store.close)
+
+
+@app.on_event("shutdown")
+async def shutdown_latency_tracker():
+    await asyncio.to_thread(latency.save)
+
+
+@app.on_event("shutdown")
+async def shutdown_selenium_pool():
+    try:
+        await asyncio.to_thread(shutdown_driver_pool)
+    except Exception:
+        logger.exception("Error shutting down Selenium driver pool")
+
 # ----------------------------------------------------------------
 # call_scraper_with_retries: invoke scraper with timeout and retries
 # ----------------------------------------------------------------
 # Background-only sites (not included in /compare immediate phase)
 BACKGROUND_SITES = ["Reliance Digital", "Poorvika", "Pai International", "Sangeetha"]
 
+# Per-site timeouts: the starting value and the most a site's timeout can be. Once a
+# site has enough successful attempts its timeout follows its observed latency
+# below that (utils/latency.py, LATENCY_* env).
+SITE_TIMEOUTS = {"Croma": 25.0, "Flipkart": 30.0, "Amazon": 30.0,
+                 "Reliance Digital": 60.0, "Poorvika": 60.0, "Pai International": 60.0, "Sangeetha": 60.0}
+SITE_RETRIES = {"Croma": 2, "Flipkart": 2, "Amazon": 2,
+                "Reliance Digital": 2, "Poorvika": 2, "Pai International": 2, "Sangeetha": 2}
+
+latency = LatencyTracker.from_env(SITE_TIMEOUTS)
+
+# Hedged attempts for scrapers that stall past their usual latency (HEDGING=0 disables)
+hedge_budget = HedgeBudget.from_env()
+
+# Per-site circuit breakers: a failing site is answered as unavailable until a probe succeeds
+breakers = CircuitBreakers.from_env()
+
+
+def site_unavailable(site_name: str) -> Optional[Dict[str, Any]]:
+    """The "unavailable" result to answer with when the site's breaker is open, else None."""
+    breaker = breakers.get(site_name)
+    if breaker is None or breaker.available():
+        return None
+    return breaker.unavailable()
+
+
+def site_timeout(site_name: str) -> float:
+    return latency.timeout(site_name, default=60.0 if site_name in BACKGROUND_SITES else 30.0)
+
+
+def site_retries(site_name: str) -> int:
+    return SITE_RETRIES.get(site_name, 2)
+
 
 async def call_scraper_with_retries(
     func: Callable[..., Any],
@@ -517,52 +767,85 @@ async def call_scraper_with_retries(
     backoff: float = 1.0,
     site_name: Optional[str] = None,
 ) -> Any:
+    # a site that keeps failing is not tried again until its breaker lets a probe through
+    breaker = breakers.get(site_name) if site_name else None
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError(site_name, breaker.retry_in())
+
     last_exc = None
+    site_failed = True
     for attempt in range(1, retries + 1):
+        site_failed = True
         try:
             logger.info("Calling scraper %s (attempt %d/%d, timeout=%s) query=%r",
                         site_name or getattr(func, "__name__", str(func)), attempt, retries, timeout, query)
 
             if inspect.iscoroutinefunction(func):
-                try:
-                    sig = inspect.signature(func)
-                    params = sig.parameters
-                    expects_browser = False
-                    if len(params) >= 2 or 'browser' in params:
-                        expects_browser = True
-                    if expects_browser and _browser is not None:
-                        logger.debug("Calling async scraper %s with browser instance", func.__name__)
-                        coro = func(query, _browser)
-                    else:
+                def make_coro():
+                    try:
+                        sig = inspect.signature(func)
+                        params = sig.parameters
+                        expects_browser = False
+                        if len(params) >= 2 or 'browser' in params:
+                            expects_browser = True
+                        # the manager's browser is the live one (it may have been recycled since startup)
+                        current_browser = _playwright_manager.browser if _playwright_manager is not None else _browser
+                        if expects_browser and current_browser is not None:
+                            logger.debug("Calling async scraper %s with browser instance", func.__name__)
+                            return func(query, current_browser)
                         logger.debug("Calling async scraper %s without browser (fallback)", func.__name__)
-                        coro = func(query)
-                except TypeError as te:
-                    logger.warning("Signature check TypeError for %s: %s; trying fallback calling func(query)", getattr(func, "__name__", func), te)
-                    coro = func(query)
-                except Exception as e:
-                    logger.exception("Unexpected error while preparing async call for %s: %s", getattr(func, "__name__", func), e)
-                    raise
-
-                res = await asyncio.wait_for(coro, timeout=timeout)
-            else:
-                if site_name in BACKGROUND_SITES:
-                    logger.debug("Using selenium semaphore for site %s", site_name)
-                    async with selenium_semaphore:
-                        th = asyncio.create_task(asyncio.to_thread(func, query))
-                        res = await asyncio.wait_for(th, timeout=timeout)
+                        return func(query)
+                    except TypeError as te:
+                        logger.warning("Signature check TypeError for %s: %s; trying fallback calling func(query)", getattr(func, "__name__", func), te)
+                        return func(query)
+                    except Exception as e:
+                        logger.exception("Unexpected error while preparing async call for %s: %s", getattr(func, "__name__", func), e)
+                        raise
+
+                if site_name and _playwright_manager is not None:
+                    # a second attempt (another tab) starts if this one runs past the site's usual p95.
+                    # Only on the central browser: without it the scrapers fall back to Selenium
+                    # threads, and a losing thread can't be cancelled and keeps its pooled driver.
+                    res, elapsed = await hedged(make_coro, timeout=timeout, budget=hedge_budget, site=site_name,
+                                                hedge_after=latency.quantile(site_name, hedge_budget.percentile))
                 else:
-                    th = asyncio.create_task(asyncio.to_thread(func, query))
-                    res = await asyncio.wait_for(th, timeout=timeout)
-
+                    with attempt_clock() as clock:
+                        res = await asyncio.wait_for(make_coro(), timeout=timeout)
+                    elapsed = clock.elapsed()
+            else:
+                # blocking scraper: a worker thread holding one of the SELENIUM_CONCURRENCY slots
+                with attempt_clock() as clock:
+                    res = await asyncio.wait_for(run_selenium_fetch(func, query), timeout=timeout)
+                elapsed = clock.elapsed()
+
+            if site_name and latency.record(site_name, elapsed):
+                await asyncio.to_thread(latency.save)
+            if breaker is not None:
+                # a parsed page with no match is a healthy site; only an error result counts against it
+                breaker.record(not (isinstance(res, dict) and "error" in res))
             logger.info("Scraper %s succeeded on attempt %d", site_name or func.__name__, attempt)
             return res
 
         except asyncio.TimeoutError as te:
             logger.warning("Scraper %s timed out on attempt %d/%d (timeout=%s)", site_name or func.__name__, attempt, retries, timeout)
+            if site_name:
+                latency.record_timeout(site_name)
             last_exc = te
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.abandon()
+            raise
         except Exception as e:
             logger.exception("Scraper %s raised on attempt %d/%d: %s", site_name or func.__name__, attempt, retries, e)
             last_exc = e
+            # results that never rendered may just be a query the site has nothing for: not held against it
+            site_failed = failure_reason(e) != "selector_timeout"
+
+        if breaker is not None and site_failed:
+            breaker.record(False)
+            if breaker.state != "closed":
+                logger.warning("Scraper %s: circuit %s, not retrying", site_name, breaker.state)
+                break
 
         if attempt < retries:
             sleep_time = backoff * attempt
@@ -570,6 +853,8 @@ async def call_scraper_with_retries(
             await asyncio.sleep(sleep_time)
 
     logger.error("Scraper %s failed after %d attempts", site_name or func.__name__, retries)
+    if breaker is not None and not site_failed:
+        breaker.abandon()  # no verdict on the site: hand a half-open probe slot back
     raise last_exc if last_exc else RuntimeError("Scraper failed without exception")
 
 # ----------------------------------------------------------------
@@ -584,12 +869,25 @@ async def run_scraper_and_tag(func: Callable[[str], Any], query: str, timeout: f
             safe_res = {"error": "no_data_returned"}
         else:
             safe_res = res
+            get_result_cache().put(query, site_name, res)
+        if res:
+            get_negative_cache().forget(query, site_name)
+        else:
+            # None or {}: the results page rendered and nothing on it matched (scrapers raise
+            # NoResultsPage / ResultsNotReady when no results page came up at all)
+            get_negative_cache().put(query, site_name, "no_match", safe_res)
         duration = round(time.time() - start, 2)
         logger.info("run_scraper_and_tag: %s returned in %ss", site_name, duration)
         return {"site": site_name, "result": safe_res, "duration": duration}
+    except CircuitOpenError as e:
+        logger.info("run_scraper_and_tag: %s", e)
+        return {"site": site_name, "result": e.result(), "duration": round(time.time() - start, 2)}
     except Exception as e:
         duration = round(time.time() - start, 2)
         logger.exception("run_scraper_and_tag: scraper %s failed completely: %s", site_name, e)
+        reason = failure_reason(e)
+        if reason:
+            get_negative_cache().put(query, site_name, reason, {"error": str(e) or reason})
         return {"site": site_name, "result": {"error": str(e)}, "duration": duration}
 
 # ----------------------------------------------------------------
@@ -597,7 +895,14 @@ async def run_scraper_and_tag(func: Callable[[str], Any], query: str, timeout: f
 # ----------------------------------------------------------------
 _task_id_map: Dict[int, str] = {}
 
+# one running scrape per (query, site): concurrent identical requests subscribe to it
+scraper_flights = SingleFlight("scrapers")
+
 def schedule_scraper_task(func: Callable[[str], Any], query: str, timeout: float, retries: int, site_name: str) -> asyncio.Task:
+    return scraper_flights.run((cache_key(query), site_name),
+                               lambda: _start_scraper_task(func, query, timeout=timeout, retries=retries, site_name=site_name))
+
+def _start_scraper_task(func: Callable[[str], Any], query: str, timeout: float, retries: int, site_name: str) -> asyncio.Task:
     # FIX: use the passed site_name, not 'name'
     task = asyncio.create_task(run_scraper_and_tag(func, query, timeout=timeout, retries=retries, site_name=site_name))
     _task_id_map[id(task)] = site_name
@@ -612,14 +917,49 @@ def schedule_scraper_task(func: Callable[[str], Any], query: str, timeout: float
     task.add_done_callback(_on_done)
     return task
 
+
+# refresh tasks nobody awaits: keep a reference so they aren't garbage-collected mid-scrape
+_refresh_tasks: set = set()
+
+def schedule_refresh(func: Callable[[str], Any], query: str, timeout: float, retries: int, site_name: str) -> Optional[asyncio.Task]:
+    """Re-scrape a site whose cached result was served stale; None if a refresh is already running."""
+    result_cache = get_result_cache()
+    if not result_cache.begin_refresh(query, site_name):
+        return None
+    task = schedule_scraper_task(func, query, timeout=timeout, retries=retries, site_name=site_name)
+    _refresh_tasks.add(task)
+
+    def _on_done(t):
+        _refresh_tasks.discard(t)
+        result_cache.end_refresh(query, site_name)
+
+    task.add_done_callback(_on_done)
+    logger.info("Scheduled stale-while-revalidate refresh for %s query=%s", site_name, query)
+    return task
+
+
+def _attribute_check(canon: CanonicalQuery, res: Any) -> Optional[Dict[str, Any]]:
+    """Storage/colour the query asked for vs. what the result's title says (only when it asked)."""
+    if not canon.filters or not isinstance(res, dict) or not res.get("title"):
+        return None
+    return {"requested": canon.filters, "conflicts": canon.conflicts(res["title"])}
+
+
+def _stale_marked(hit: CachedResult) -> Any:
+    # background results travel as bare site->result dicts, so the flag goes on the result
+    if isinstance(hit.result, dict) and hit.stale:
+        return {**hit.result, "stale": True, "age": round(hit.age, 1)}
+    return hit.result
+
 # ----------------------------------------------------------------
 # Helper: gather background tasks
 # ----------------------------------------------------------------
-async def _gather_background_tasks(query: str, tasks: List[asyncio.Task]) -> Dict[str, Any]:
+async def _gather_background_tasks(query: str, tasks: List[asyncio.Task], cached: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     logger.info("_gather_background_tasks: started for query=%s with %d tasks", query, len(tasks))
     try:
         done = await asyncio.gather(*tasks, return_exceptions=True)
-        out: Dict[str, Any] = {}
+        # sites answered from the result cache were never scheduled
+        out: Dict[str, Any] = dict(cached or {})
         for idx, item in enumerate(done):
             try:
                 if isinstance(item, Exception):
@@ -644,11 +984,15 @@ async def _gather_background_tasks(query: str, tasks: List[asyncio.Task]) -> Dic
 # /compare SSE endpoint
 # ----------------------------------------------------------------
 @app.get("/compare")
-async def compare_products(request: Request, query: str = Query(..., min_length=1), user_price: float = Query(...)):
+async def compare_products(request: Request, query: str = Query(..., min_length=1), user_price: float = Query(...),
+                           stale: Optional[bool] = Query(None)):
     total_start = time.time()
-    q = query.strip()
-    lower_q = q.lower()
-    logger.info("Compare request: %s, User Price: %f", q, user_price)
+    allow_stale = SWR_DEFAULT if stale is None else stale
+    # equivalent spellings ("Apple iPhone 16", "iphone  16 black") share scrapes, caches and background work
+    canon = canonicalize(query)
+    q = canon.search_text
+    lower_q = canon.key
+    logger.info("Compare request: %s (canonical %r), User Price: %f", query.strip(), q, user_price)
 
     immediate_ordered: List[Tuple[Callable[[str], Any], str]] = [
         (get_cheapest_croma_product, "Croma"),
@@ -662,60 +1006,143 @@ async def compare_products(request: Request, query: str = Query(..., min_length=
         (scrape_sangeetha_product, "Sangeetha"),
     ]
 
-    per_site_timeout = {"Croma": 25.0, "Flipkart": 30.0, "Amazon": 30.0,
-                        "Reliance Digital": 60.0, "Poorvika": 60.0, "Pai International": 60.0, "Sangeetha": 60.0}
-    per_site_retries = {"Croma": 2, "Flipkart": 2, "Amazon": 2,
-                        "Reliance Digital": 2, "Poorvika": 2, "Pai International": 2, "Sangeetha": 2}
+    # sites with a fresh cached result are answered from the cache and not scraped;
+    # stale ones (allow_stale) are answered too, and refreshed in the background
+    result_cache = get_result_cache()
+    negative_cache = get_negative_cache()
+    immediate_cached: Dict[str, CachedResult] = {}
+    immediate_negative: Dict[str, NegativeEntry] = {}
+    immediate_unavailable: Dict[str, Dict[str, Any]] = {}
+    background_cached: Dict[str, Any] = {}
+    refresh_tasks: List[asyncio.Task] = []
 
     immediate_tasks: List[asyncio.Task] = []
     for func, name in immediate_ordered:
-        timeout = per_site_timeout.get(name, 30.0)
-        retries = per_site_retries.get(name, 2)
+        timeout = site_timeout(name)
+        retries = site_retries(name)
+        hit = await result_cache.get(q, name, allow_stale=allow_stale)
+        if hit is not None:
+            immediate_cached[name] = hit
+            if hit.stale:
+                t = schedule_refresh(func, q, timeout=timeout, retries=retries, site_name=name)
+                if t is not None:
+                    refresh_tasks.append(t)
+            continue
+        miss = negative_cache.get(q, name)
+        if miss is not None:
+            # known empty / blocked / timing out for this query: answer now, don't scrape
+            immediate_negative[name] = miss
+            continue
+        down = site_unavailable(name)
+        if down is not None:
+            immediate_unavailable[name] = down
+            continue
         t = schedule_scraper_task(func, q, timeout=timeout, retries=retries, site_name=name)
         immediate_tasks.append(t)
 
     background_tasks: List[asyncio.Task] = []
-    for func, name in background_ordered:
-        timeout = per_site_timeout.get(name, 60.0)
-        retries = per_site_retries.get(name, 2)
+    background_running = lower_q in background_results and not background_results[lower_q].done()
+    for func, name in ([] if background_running else background_ordered):
+        timeout = site_timeout(name)
+        retries = site_retries(name)
+        hit = await result_cache.get(q, name, allow_stale=allow_stale)
+        if hit is not None:
+            background_cached[name] = _stale_marked(hit)
+            if hit.stale:
+                schedule_refresh(func, q, timeout=timeout, retries=retries, site_name=name)
+            continue
+        miss = negative_cache.get(q, name)
+        if miss is not None:
+            background_cached[name] = miss.result
+            continue
+        down = site_unavailable(name)
+        if down is not None:
+            background_cached[name] = down
+            continue
         t = schedule_scraper_task(func, q, timeout=timeout, retries=retries, site_name=name)
         background_tasks.append(t)
+    logger.info("Result cache for query=%s: %d immediate (%d negative) and %d background site(s) cached",
+                lower_q, len(immediate_cached) + len(immediate_negative), len(immediate_negative), len(background_cached))
 
-    if lower_q in background_results and not background_results[lower_q].done():
+    if background_running:
         logger.info("Background tasks already exist and are running for query=%s", lower_q)
     else:
-        gather_task = asyncio.create_task(_gather_background_tasks(q, background_tasks))
+        gather_task = asyncio.create_task(_gather_background_tasks(q, background_tasks, cached=background_cached))
         background_results[lower_q] = gather_task
         # FIX logging placeholder mismatch
         logger.info("Background gather task scheduled for query=%s (task_id=%s)", lower_q, id(gather_task))
 
     async def event_stream():
-        market_prices = []
+        # site -> price, so a refreshed price replaces the stale one in the score
+        market_prices: Dict[str, Any] = {}
         try:
             logger.info("Starting SSE streaming for immediate tasks for query=%s", q)
-            for done_future in asyncio.as_completed(immediate_tasks):
-                tagged = await done_future
-                site = tagged.get("site", "Unknown")
-                res = tagged.get("result", {})
-                
+            for site, hit in immediate_cached.items():
+                res = hit.result
                 if res and res.get("price") is not None:
-                    market_prices.append(res["price"])
+                    market_prices[site] = res["price"]
+                elapsed = round(time.time() - total_start, 2)
+                payload = {"site": site, "result": res, "time_taken": elapsed, "cache": hit.meta()}
+                attributes = _attribute_check(canon, res)
+                if attributes:
+                    payload["attributes"] = attributes
+                yield "data: " + json.dumps(payload, default=str) + "\n\n"
+
+            for site, miss in immediate_negative.items():
+                elapsed = round(time.time() - total_start, 2)
+                payload = {"site": site, "result": miss.result, "time_taken": elapsed, "cache": miss.meta()}
+                yield "data: " + json.dumps(payload, default=str) + "\n\n"
 
+            for site, down in immediate_unavailable.items():
+                # circuit open: the site has been failing, so it is not scraped at all
                 elapsed = round(time.time() - total_start, 2)
-                payload = {"site": site, "result": res, "time_taken": elapsed}
+                payload = {"site": site, "result": down, "time_taken": elapsed, "cache": {"hit": False}}
                 yield "data: " + json.dumps(payload, default=str) + "\n\n"
 
+            # refreshes of stale sites get a follow-up event if they land before the scrapes
+            # finish (or within RESULT_CACHE_SWR_WAIT); later ones only update the cache
+            refreshing = set(refresh_tasks)
+            pending = set(immediate_tasks) | refreshing
+            refresh_deadline = total_start + SWR_WAIT
+            while pending:
+                wait_timeout = None
+                if pending <= refreshing:
+                    wait_timeout = max(0.0, refresh_deadline - time.time())
+                done, pending = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info("Leaving %d refresh(es) for query=%s to finish in the background", len(pending), q)
+                    break
+                for done_future in done:
+                    tagged = done_future.result()
+                    site = tagged.get("site", "Unknown")
+                    res = tagged.get("result", {})
+                    is_refresh = done_future in refreshing
+                    if is_refresh and not is_cacheable(res):
+                        continue  # the stale value already shown beats an error
+
+                    if res and res.get("price") is not None:
+                        market_prices[site] = res["price"]
+
+                    elapsed = round(time.time() - total_start, 2)
+                    payload = {"site": site, "result": res, "time_taken": elapsed,
+                               "cache": {"hit": False, "refresh": is_refresh}}
+                    attributes = _attribute_check(canon, res)
+                    if attributes:
+                        payload["attributes"] = attributes
+                    yield "data: " + json.dumps(payload, default=str) + "\n\n"
+
                 if await request.is_disconnected():
                     logger.info("Client disconnected; cancelling remaining immediate scrapers.")
                     for t in immediate_tasks:
-                        if not t.done(): t.cancel()
+                        # a scrape other streams subscribed to keeps running for them
+                        if not t.done() and scraper_flights.release(t): t.cancel()
                     return
 
             total = round(time.time() - total_start, 2)
             logger.info("Immediate streaming complete for query=%s in %ss.", q, total)
             
             # Calculate WorthIt score with immediate results
-            score_data = worthit_score(user_price, market_prices)
+            score_data = worthit_score(user_price, list(market_prices.values()))
             
             yield "data: " + json.dumps({"site": "_done_", "total_time": total, "worthit": score_data}) + "\n\n"
 
@@ -729,26 +1156,41 @@ async def compare_products(request: Request, query: str = Query(..., min_length=
 # Background fetch when explicitly requested (/more)
 # ----------------------------------------------------------------
 # ADDED: define the helper used when no running background task exists
-async def fetch_more_products_on_demand(query: str) -> Dict[str, Any]:
-    q = query.strip()
+async def fetch_more_products_on_demand(query: str, allow_stale: bool = SWR_DEFAULT) -> Dict[str, Any]:
+    q = canonicalize(query).search_text
     background_ordered: List[Tuple[Callable[[str], Any], str]] = [
         (scrape_reliance_product, "Reliance Digital"),
         (get_cheapest_poorvika_product, "Poorvika"),
         (get_cheapest_pai_product, "Pai International"),
         (scrape_sangeetha_product, "Sangeetha"),
     ]
-    per_site_timeout = {"Reliance Digital": 60.0, "Poorvika": 60.0, "Pai International": 60.0, "Sangeetha": 60.0}
-    per_site_retries = {"Reliance Digital": 2, "Poorvika": 2, "Pai International": 2, "Sangeetha": 2}
 
+    result_cache = get_result_cache()
+    cached: Dict[str, Any] = {}
     tasks: List[asyncio.Task] = []
     for func, name in background_ordered:
-        t = schedule_scraper_task(func, q, timeout=per_site_timeout[name], retries=per_site_retries[name], site_name=name)
+        hit = await result_cache.get(q, name, allow_stale=allow_stale)
+        if hit is not None:
+            cached[name] = _stale_marked(hit)
+            if hit.stale:
+                schedule_refresh(func, q, timeout=site_timeout(name), retries=site_retries(name), site_name=name)
+            continue
+        miss = get_negative_cache().get(q, name)
+        if miss is not None:
+            cached[name] = miss.result
+            continue
+        down = site_unavailable(name)
+        if down is not None:
+            cached[name] = down
+            continue
+        t = schedule_scraper_task(func, q, timeout=site_timeout(name), retries=site_retries(name), site_name=name)
         tasks.append(t)
-    return await _gather_background_tasks(q, tasks)
+    return await _gather_background_tasks(q, tasks, cached=cached)
 
 @app.get("/more")
-async def get_more_products(query: str = Query(..., min_length=1), user_price: Optional[float] = Query(None)):
-    lower_q = query.strip().lower()
+async def get_more_products(query: str = Query(..., min_length=1), user_price: Optional[float] = Query(None),
+                            stale: Optional[bool] = Query(None)):
+    lower_q = canonicalize(query).key
     task = background_results.get(lower_q)
 
     # Default empty worthit if user_price is missing
@@ -757,7 +1199,7 @@ async def get_more_products(query: str = Query(..., min_length=1), user_price: O
 
     if not task:
         try:
-            result = await fetch_more_products_on_demand(query)
+            result = await fetch_more_products_on_demand(query, allow_stale=SWR_DEFAULT if stale is None else stale)
             market_prices = [p['price'] for p in result.values() if p and p.get('price') is not None]
             score_data = worthit_score(user_price, market_prices) if user_price else empty_worthit()
             return {"query": query, "results": result, "worthit": score_data}
@@ -767,6 +1209,8 @@ async def get_more_products(query: str = Query(..., min_length=1), user_price: O
     if task.done():
         try:
             res = task.result()
+            # delivered: drop the task (a repeat /more is answered from the result cache)
+            background_results.consume(lower_q)
             market_prices = [p['price'] for p in res.values() if p and p.get('price') is not None]
             score_data = worthit_score(user_price, market_prices) if user_price else empty_worthit()
             return {"query": query, "results": res, "worthit": score_data}
@@ -822,6 +1266,7 @@ async def async_main_test(query: str):
         await _run_parallel_and_print(query)
     finally:
         await close_playwright()
+        await asyncio.to_thread(shutdown_driver_pool)
 
 def run_cli_test(query: str):
     asyncio.run(async_main_test(query))
@@ -830,7 +1275,25 @@ def run_cli_test(query: str):
 # ----------------------------------------------------------------Query
 @app.on_event("startup")
 async def warmup_first_scrapers():
+    result_store = get_result_cache().store
+    if result_store is not None:
+        # rows left over from earlier runs are read lazily; only expired/surplus ones are dropped now
+        asyncio.create_task(asyncio.to_thread(result_store.prune))
     await init_playwright()
+    if _playwright_manager is not None:
+        browser_supervisor.watch("playwright", _playwright_manager.health, _playwright_manager.rss_mb, _playwright_manager.relaunch)
+    browser_supervisor.add_sweep("selenium_pool", lambda thresholds: get_driver_pool().sweep(thresholds))
+    browser_supervisor.start()
+    if _playwright_manager is None:
+        # Selenium is the only engine left: fail fast without a chromedriver,
+        # and start one warm Chrome per site without delaying startup
+        await asyncio.to_thread(ensure_chromedriver)
+        asyncio.create_task(asyncio.to_thread(get_driver_pool().prewarm, ["croma", "reliance", "poorvika", "pai", "sangeetha"]))
+    else:
+        try:
+            await asyncio.to_thread(ensure_chromedriver)
+        except Exception:
+            logger.warning("No chromedriver found; Selenium fallback is unavailable while Playwright runs all scrapers.")
     logger.info("Warming up first 3 scrapers with sample query 'iphone 16'")
     sample_query = "iphone 16"
     try:
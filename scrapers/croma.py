@@ -1,4 +1,5 @@
 # croma.py
+import asyncio
 import os
 import time
 import re
@@ -8,13 +9,19 @@ from typing import Optional, Dict, Any, List
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException, ElementNotInteractableException
 from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from utils.blocking import BlockPolicy
+from utils.driver_pool import get_driver_pool, register_site, run_selenium_fetch, shutdown_driver_pool
+from utils.async_http import get_async_http
+from utils.readiness import ReadySpec, wait_ready, wait_ready_sync
+from utils.search_strategy import run_strategies, run_strategies_sync
+from utils.snapshot_store import save_snapshot
+from utils.structured_data import JsonSpec, capture_json, collect_payloads, extract_products, record_source
 # --- LOGGING ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,178 +36,187 @@ def is_strict_match(query: str, title: str) -> bool:
         return False
     return normalized_query in normalized_title
 
-# --- Persistent Selenium Manager ---
-class PersistentSeleniumManager:
-    def __init__(self):
-        self.driver: Optional[webdriver.Chrome] = None
-        self.started = False
-
-    def start(self, headless: bool = True, window_size: str = "1366,768"):
-        if self.started:
-            return
-
-        options = webdriver.ChromeOptions()
-        # headless flag (try new headless if available)
-        if headless:
-            try:
-                options.add_argument("--headless=new")
-            except Exception:
-                options.add_argument("--headless")
-                options.add_argument("--disable-gpu")
-
-        # container-friendly flags
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-software-rasterizer")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-background-networking")
-        options.add_argument("--disable-background-timer-throttling")
-        options.add_argument("--disable-renderer-backgrounding")
-        options.add_argument("--remote-debugging-port=9222")
-        options.add_argument(f"--window-size={window_size}")
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+# --- Pooled Selenium drivers ---
+SITE_KEY = "croma"
 
-        try:
-            options.page_load_strategy = "eager"
-        except Exception:
-            pass
-
-        # turn off images for speed
-        prefs = {"profile.managed_default_content_settings.images": 2}
-        options.add_experimental_option("prefs", prefs)
-
-        # Ensure binary location uses env var if set (CHROME_BIN)
-        chrome_bin = os.environ.get("CHROME_BIN", "/usr/bin/chromium")
-        if chrome_bin:
-            try:
-                options.binary_location = chrome_bin
-            except Exception:
-                # ignore if the driver doesn't accept binary_location
-                pass
-
-        # Determine chromedriver service: prefer env var, then default path, else webdriver_manager
-        chromedriver_path = os.environ.get("CHROMEDRIVER_PATH")
-        if chromedriver_path and os.path.exists(chromedriver_path):
-            service = Service(chromedriver_path)
-        elif os.path.exists("/usr/local/bin/chromedriver"):
-            service = Service("/usr/local/bin/chromedriver")
-        else:
-            # fallback to webdriver_manager (will attempt to download)
-            try:
-                driver_path = ChromeDriverManager().install()
-                service = Service(driver_path)
-            except Exception as e:
-                logger.error("[PersistentSeleniumManager] ChromeDriver manager install failed: %s", e)
-                raise
 
+def _build_chrome_options(headless: bool = True, window_size: str = "1366,768") -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    # headless flag (try new headless if available)
+    if headless:
         try:
-            # instantiate the driver
-            self.driver = webdriver.Chrome(service=service, options=options)
-            # increase page load timeout slightly (avoid overly aggressive 6s)
-            try:
-                self.driver.set_page_load_timeout(30)
-            except Exception:
-                pass
-            self.started = True
-            logger.info(f"[PersistentSeleniumManager] Started Chrome driver (headless={headless}, binary={chrome_bin})")
-        except WebDriverException as e:
-            logger.error(f"[PersistentSeleniumManager] WebDriver start error: {e}")
-            self.driver = None
-            self.started = False
-            raise
-
-    def stop(self):
-        try:
-            if self.driver:
-                self.driver.quit()
-                logger.info("[PersistentSeleniumManager] Browser closed")
+            options.add_argument("--headless=new")
         except Exception:
-            pass
-        finally:
-            self.driver = None
-            self.started = False
+            options.add_argument("--headless")
+            options.add_argument("--disable-gpu")
+
+    # container-friendly flags
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-software-rasterizer")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    # no fixed --remote-debugging-port: several pooled Croma drivers may run at once
+    options.add_argument(f"--window-size={window_size}")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
+
+    try:
+        options.page_load_strategy = "eager"
+    except Exception:
+        pass
+
+    # turn off images for speed
+    prefs = {"profile.managed_default_content_settings.images": 2}
+    options.add_experimental_option("prefs", prefs)
+
+    # Chrome binary (CHROME_BIN) and chromedriver are resolved once by utils.chromedriver
+    return options
+
+
+def _on_driver_created(driver: webdriver.Chrome) -> None:
+    # increase page load timeout slightly (avoid overly aggressive 6s)
+    try:
+        driver.set_page_load_timeout(30)
+    except Exception:
+        pass
+
 
-# Global singleton
-_selenium_manager: PersistentSeleniumManager | None = None
+BLOCKING = BlockPolicy.for_site(SITE_KEY)
 
-def _get_manager() -> PersistentSeleniumManager:
-    global _selenium_manager
-    if _selenium_manager is None:
-        _selenium_manager = PersistentSeleniumManager()
-        _selenium_manager.start(headless=True)
-    elif not _selenium_manager.started:
-        _selenium_manager.start(headless=True)
-    return _selenium_manager
+register_site(SITE_KEY, _build_chrome_options, on_create=_on_driver_created, blocking=BLOCKING)
 
 # --- FETCH FUNCTION ---
+PRODUCT_SELECTOR = "li.product-item, .product-card, .product-grid-item, div.product-item, div.search-result-item"
+READY = ReadySpec.for_site(SITE_KEY, PRODUCT_SELECTOR, timeout=4.0)
+# the results grid is filled from Croma's search service; its JSON beats scraping the cards
+JSON_SPEC = JsonSpec(SITE_KEY, "https://www.croma.com", api_patterns=("searchservices",))
+
+
+def _search_url(query: str) -> str:
+    encoded_query = urllib.parse.quote_plus(query)
+    return f"https://www.croma.com/searchB?q={encoded_query}%3Arelevance"
+
+
 def fetch_croma_html(query: str) -> str | None:
     logger.info(f"[Croma Scraper] Searching for: '{query}'")
     html = None
 
-    manager = _get_manager()
-    driver = manager.driver
-    if driver is None:
-        logger.error("[✘] No webdriver available.")
+    try:
+        with get_driver_pool().checkout(SITE_KEY) as driver:
+            html = _fetch_with_driver(driver, query)
+    except TimeoutError as e:
+        logger.error(f"[✘] No webdriver available: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"[✘] Error fetching Croma HTML: {e}")
+        raise
+
+    return html
+
+
+def _search_direct_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    driver.get(_search_url(query))
+    logger.debug("[✓] Navigated directly to Croma search URL")
+    if not wait_ready_sync(driver, READY):
+        logger.warning("[!] Timeout waiting for product-item on direct URL")
         return None
+    logger.info("[✓] Product container detected in DOM (direct URL)")
+    return driver.page_source
+
 
+def _search_form_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    wait = WebDriverWait(driver, 4, poll_frequency=0.25)
+    driver.get("https://www.croma.com/")
+    logger.debug("[✓] Navigated to Croma homepage to type query")
+
+    search_input = wait.until(EC.presence_of_element_located((By.ID, "searchV2")))
+    time.sleep(0.25)
     try:
-        wait = WebDriverWait(driver, 4, poll_frequency=0.25)
-        start_time = time.time()
-        encoded_query = urllib.parse.quote_plus(query)
-        search_url = f"https://www.croma.com/searchB?q={encoded_query}%3Arelevance"
+        search_input.click()
+    except Exception:
+        pass
+    try:
+        search_input.clear()
+    except Exception:
+        pass
+    search_input.send_keys(query)
+    search_input.send_keys(Keys.ENTER)
+    logger.info("[✓] Typed query into search input and submitted")
 
-        try:
-            driver.get("https://www.croma.com/")
-            logger.debug("[✓] Navigated to Croma homepage to type query")
-
-            try:
-                search_input = wait.until(EC.presence_of_element_located((By.ID, "searchV2")))
-                time.sleep(0.25)
-                try:
-                    search_input.click()
-                except Exception:
-                    pass
-                try:
-                    search_input.clear()
-                except Exception:
-                    pass
-                search_input.send_keys(query)
-                search_input.send_keys(Keys.ENTER)
-                logger.info("[✓] Typed query into search input and submitted")
-            except TimeoutException:
-                logger.warning("[!] searchV2 input not found. Falling back to direct URL.")
-                raise
-
-            try:
-                product_selector = "li.product-item, .product-card, .product-grid-item, div.product-item, div.search-result-item"
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, product_selector)))
-                logger.info("[✓] Product container detected after typing")
-            except TimeoutException:
-                logger.warning("[!] Timeout waiting for product-item after typing")
+    if not wait_ready_sync(driver, READY):
+        logger.warning("[!] Timeout waiting for product-item after typing")
+        return None
+    logger.info("[✓] Product container detected after typing")
+    return driver.page_source
+
+
+def _fetch_with_driver(driver: webdriver.Chrome, query: str) -> str | None:
+    start_time = time.time()
+    # direct search URL first (no homepage round trip); type into the homepage search box only if it shows no results
+    _, html = run_strategies_sync(SITE_KEY, [
+        ("direct", lambda: _search_direct_selenium(driver, query)),
+        ("form", lambda: _search_form_selenium(driver, query)),
+    ])
+    logger.info(f"[⏱] Fetch Time: {time.time() - start_time:.2f} seconds")
+    return html
+
+# --- FETCH (Playwright) ---
+# Central PlaywrightManager, assigned by app.init_playwright()
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "viewport": {"width": 1366, "height": 768},
+}
 
-        except Exception:
-            try:
-                driver.get(search_url)
-                logger.debug("[✓] Navigated directly to Croma search URL (fallback)")
-                product_selector = "li.product-item, .product-card, .product-grid-item, div.product-item, div.search-result-item"
-                try:
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, product_selector)))
-                    logger.info("[✓] Product container detected in DOM (fallback)")
-                except TimeoutException:
-                    logger.warning("[!] Timeout waiting for product-item on direct URL")
-            except Exception as e:
-                logger.error(f"[✘] Error navigating to search URL fallback: {e}")
-
-        html = driver.page_source
-        end_time = time.time()
-        logger.info(f"[⏱] Fetch Time: {end_time - start_time:.2f} seconds")
-
-    except WebDriverException as e:
-        logger.error(f"[✘] WebDriver error fetching Croma HTML: {e}")
-    except Exception as e:
-        logger.error(f"[✘] Error fetching Croma HTML: {e}")
 
+async def _warm_tab(page) -> None:
+    """Bring a tab to the homepage with the search box ready (hot tabs re-run this after each query)."""
+    await page.goto("https://www.croma.com/", wait_until="domcontentloaded", timeout=30000)
+    try:
+        await page.wait_for_selector("#searchV2", timeout=4000)
+    except PlaywrightTimeoutError:
+        logger.warning("[!] searchV2 input not found on warm tab.")
+
+
+async def _search_direct(page, query: str) -> str | None:
+    await page.goto(_search_url(query), wait_until="domcontentloaded", timeout=30000)
+    if not await wait_ready(page, READY):
+        logger.warning("[!] Timeout waiting for product-item on direct URL")
+        return None
+    logger.info("[✓] Product container detected in DOM (direct URL)")
+    return await page.content()
+
+
+async def _search_form(page, query: str) -> str | None:
+    search_input = await page.query_selector("#searchV2")
+    if search_input is None:
+        # the direct attempt navigated away from the warm homepage
+        await page.goto("https://www.croma.com/", wait_until="domcontentloaded", timeout=30000)
+        search_input = await page.wait_for_selector("#searchV2", timeout=4000)
+    await search_input.fill(query)
+    await search_input.press("Enter")
+    logger.info("[✓] Typed query into search input and submitted")
+    if not await wait_ready(page, READY):
+        logger.warning("[!] Timeout waiting for product-item after typing")
+        return None
+    logger.info("[✓] Product container detected after typing")
+    return await page.content()
+
+
+async def fetch_croma_html_async(query: str) -> str | None:
+    logger.info(f"[Croma Scraper] Searching for: '{query}'")
+    async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route) as page, \
+            capture_json(page, JSON_SPEC):
+        start_time = time.time()
+        _, html = await run_strategies(SITE_KEY, [
+            ("direct", lambda: _search_direct(page, query)),
+            ("form", lambda: _search_form(page, query)),
+        ])
+        logger.info(f"[⏱] Fetch Time: {time.time() - start_time:.2f} seconds")
     return html
 
 # --- PARSING ---
@@ -289,6 +305,23 @@ def parse_croma_html(html: str, query: str) -> List[Dict[str, Any]]:
     logger.info(f"[⏱] Parsing Time: {end_time - start_time:.2f} seconds")
     return sorted(results, key=lambda x: x["price"])
 
+def parse_croma_json(html: str, query: str, payloads: List[Any] = ()) -> List[Dict[str, Any]]:
+    """Same results as parse_croma_html(), read from the search-service JSON or the page's embedded JSON."""
+    source, products = extract_products(html, JSON_SPEC, payloads)
+    results = [p for p in products if is_strict_match(query, p["title"])]
+    if results:
+        record_source(SITE_KEY, source)
+    return sorted(results, key=lambda x: x["price"])
+
+
+def parse_croma_results(html: str, query: str, payloads: List[Any] = ()) -> List[Dict[str, Any]]:
+    # structured data first; the card parser stays the fallback for pages without it
+    results = parse_croma_json(html, query, payloads)
+    if results:
+        return results
+    record_source(SITE_KEY, "dom")
+    return parse_croma_html(html, query)
+
 # --- PRICE HELPER ---
 def extract_price(text: str) -> Optional[float]:
     try:
@@ -300,13 +333,27 @@ def extract_price(text: str) -> Optional[float]:
         return None
 
 # --- MAIN ---
-def get_cheapest_croma_product(query: str):
-    html = fetch_croma_html(query)
-    if not html:
-        logger.error("[✘] Could not retrieve HTML.")
-        return
-
-    results = parse_croma_html(html, query)
+async def _fetch_http(query: str) -> str | None:
+    return await get_async_http().fetch_results_html(
+        _search_url(query), PRODUCT_SELECTOR, has_data=lambda html: bool(extract_products(html, JSON_SPEC)[1]))
+
+
+async def _fetch_browser(query: str) -> str | None:
+    if _manager is not None:
+        return await fetch_croma_html_async(query)
+    # no central browser (standalone / Playwright unavailable): pooled Selenium driver
+    return await run_selenium_fetch(fetch_croma_html, query)
+
+
+async def get_cheapest_croma_product(query: str):
+    # plain HTTP first; a browser only when the response has no result cards or is a bot wall
+    with collect_payloads() as payloads:
+        _, html = await run_strategies(SITE_KEY, [
+            ("http", lambda: _fetch_http(query)),
+            ("browser", lambda: _fetch_browser(query)),
+        ])
+    await save_snapshot(SITE_KEY, query, html)
+    results = parse_croma_results(html, query, payloads)
     if not results:
         print("No matching products found.")
         return
@@ -321,16 +368,13 @@ def get_cheapest_croma_product(query: str):
 
 # --- DRIVER CONTROL ---
 def start_persistent_driver(headless: bool = True):
-    mgr = _get_manager()
-    if not mgr.started:
-        mgr.start(headless=headless)
-    return mgr
+    """Kept for compatibility: warms one pooled Croma driver."""
+    pool = get_driver_pool()
+    pool.prewarm([SITE_KEY])
+    return pool
 
 def stop_persistent_driver():
-    global _selenium_manager
-    if _selenium_manager:
-        _selenium_manager.stop()
-        _selenium_manager = None
+    shutdown_driver_pool()
 
 # --- EXECUTION ---
 if __name__ == "__main__" or "__file__" not in globals():
@@ -338,6 +382,6 @@ if __name__ == "__main__" or "__file__" not in globals():
     if product_name:
         start_persistent_driver(headless=True)
         try:
-            get_cheapest_croma_product(product_name)
+            asyncio.run(get_cheapest_croma_product(product_name))
         finally:
             stop_persistent_driver()
@@ -3,7 +3,10 @@ import asyncio
 import re
 import time
 from typing import Optional, Dict, Any, List
-from playwright.async_api import async_playwright, Browser, Route, Request
+from playwright.async_api import async_playwright, Browser
+
+from utils.blocking import BlockPolicy
+from utils.readiness import ReadySpec, ResultsNotReady, wait_ready
 
 #nest_asyncio.apply()
 
@@ -70,6 +73,28 @@ def is_relevant(query: str, title: str, price: Optional[int]) -> (bool, str):
     return (True, "Match")
 
 # --- Persistent Browser Manager ---
+# Central PlaywrightManager, assigned by app.init_playwright(). When it is set the
+# scraper leases tabs on the app's single browser instead of launching one.
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"),
+    "locale": "en-IN",
+}
+
+
+SITE_KEY = "flipkart"
+READY = ReadySpec.for_site(SITE_KEY, "div[data-id], div._13oc-S, div._1xHGtK, div.slAVV4, div._4ddWXP, div.cPHb8h",
+                           timeout=5.0)
+BLOCKING = BlockPolicy.for_site(SITE_KEY, extra_types=("stylesheet",))
+
+
+async def _warm_tab(page) -> None:
+    # the search itself is a URL navigation; a warm tab keeps the site's bundles and connections hot
+    await page.goto("https://www.flipkart.com/", wait_until="domcontentloaded", timeout=15000)
+
+
 class FlipkartScraper:
     def __init__(self):
         self.playwright = None
@@ -79,12 +104,8 @@ class FlipkartScraper:
     async def start(self, headless: bool = True):
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=headless, args=["--no-sandbox"])
-        self.context = await self.browser.new_context(
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"),
-            locale="en-IN"
-        )
-        await self.context.route("**/*", self._block_resources)
+        self.context = await self.browser.new_context(**CONTEXT_OPTIONS)
+        await self.context.route("**/*", BLOCKING.handle_route)
 
     async def stop(self):
         if self.context:
@@ -94,20 +115,19 @@ class FlipkartScraper:
         if self.playwright:
             await self.playwright.stop()
 
-    async def _block_resources(self, route: Route, request: Request):
-        if request.resource_type in ("image", "stylesheet", "font", "media"):
-            await route.abort()
-        else:
-            await route.continue_()
-
-    async def scrape_flipkart(self, query: str, max_items: int = 6, timeout: int = 15000) -> Dict[str, Any]:
-        page = await self.context.new_page()
+    async def scrape_flipkart(self, query: str, max_items: int = 6, timeout: int = 15000,
+                              page=None) -> Dict[str, Any]:
+        # a leased hot tab is owned by the caller; otherwise use a throwaway page
+        own_page = page is None
+        if own_page:
+            page = await self.context.new_page()
         start_time = time.time()
         try:
             await page.goto(f"https://www.flipkart.com/search?q={query.replace(' ', '+')}",
                             wait_until="domcontentloaded", timeout=timeout)
-            await page.wait_for_selector("div[data-id], div._13oc-S, div._1xHGtK, div.slAVV4, div._4ddWXP, div.cPHb8h",
-                                         state="attached", timeout=5000)
+            if not await wait_ready(page, READY):
+                # slow or broken render: fail the attempt so it is retried, not parsed as "no match"
+                raise ResultsNotReady(READY)
 
             raw_products = await page.evaluate(f"""
             () => {{
@@ -141,13 +161,20 @@ class FlipkartScraper:
             return {}
 
         finally:
-            await page.close()
+            if own_page:
+                await page.close()
 
 # --- Exported Function ---
 _scraper_instance: FlipkartScraper = None
 
 async def fetch_flipkart_products(query: str) -> Dict[str, Any]:
     global _scraper_instance
+    if _manager is not None:
+        # Lease a tab on the app's central browser (one Chromium per process)
+        async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route,
+                                      direct_only=True) as page:
+            return await FlipkartScraper().scrape_flipkart(query, page=page)
+    # Standalone use (no app): launch a private browser once
     if _scraper_instance is None:
         _scraper_instance = FlipkartScraper()
         await _scraper_instance.start(headless=True)
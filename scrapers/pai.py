@@ -1,16 +1,25 @@
 # optimized_pai_fast.py
+import asyncio
 import time
 import re
 import logging
+import urllib.parse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from utils.blocking import BlockPolicy
+from utils.driver_pool import get_driver_pool, register_site, run_selenium_fetch
+from utils.async_http import get_async_http
+from utils.readiness import ReadySpec, wait_ready, wait_ready_sync
+from utils.search_strategy import run_strategies, run_strategies_sync
+from utils.snapshot_store import save_snapshot
+from utils.structured_data import JsonSpec, capture_json, collect_payloads, extract_products, record_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,46 +48,109 @@ def is_strict_match(query: str, title: str) -> bool:
     return query_words.issubset(title_words)
 
 
+SITE_KEY = "pai"
+
+
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    # headless mode (new where available)
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1366,768")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/115.0 Safari/537.36")
+
+    # Block images/styles/fonts to reduce load
+    prefs = {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.stylesheets": 2,
+        "profile.managed_default_content_settings.fonts": 2
+    }
+    options.add_experimental_option("prefs", prefs)
+
+    # Eager gives DOMContentLoaded (safer than 'none' for interactive elements)
+    options.page_load_strategy = "eager"
+    return options
+
+
+# Pai's results render without stylesheets, so those are blocked too
+BLOCKING = BlockPolicy.for_site(SITE_KEY, extra_types=("stylesheet",))
+
+register_site(SITE_KEY, _build_chrome_options, blocking=BLOCKING)
+
+
+# Sets the search box value and submits it, for pages where the input isn't interactable.
+# Expects the query in `q`.
+_JS_SUBMIT_SEARCH = """
+const sel = 'input.search-header-input';
+const el = document.querySelector(sel);
+if (!el) return false;
+el.focus();
+el.value = q;
+el.dispatchEvent(new Event('input', {bubbles:true}));
+// Try to submit via nearest form
+const f = el.closest('form');
+if (f) { try { f.submit(); return true; } catch(e){} }
+// Fallback: find a search button and click
+const btn = document.querySelector('button[type=submit], button.search-btn, button.icon-search, button.search-button');
+if (btn) { try { btn.click(); return true; } catch(e){} }
+// If nothing else, dispatch Enter key events
+el.dispatchEvent(new KeyboardEvent('keydown', {key:'Enter', keyCode:13, which:13, bubbles:true}));
+el.dispatchEvent(new KeyboardEvent('keyup', {key:'Enter', keyCode:13, which:13, bubbles:true}));
+return true;
+"""
+
+
 def fetch_pai_html(query: str) -> str | None:
     """
     Optimized fetch: robustly finds/sets the search input and submits via JS fallback
-    if the element isn't clickable. Returns HTML string or None on failure.
+    if the element isn't clickable. Returns the HTML string; raises when no results page came up.
     """
     start_total = time.perf_counter()
     html = None
-    driver = None
     try:
-        options = webdriver.ChromeOptions()
-        # headless mode (new where available)
-        options.add_argument("--headless=new")
-        options.add_argument("--window-size=1366,768")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/115.0 Safari/537.36")
-
-        # Block images/styles/fonts to reduce load
-        prefs = {
-            "profile.managed_default_content_settings.images": 2,
-            "profile.managed_default_content_settings.stylesheets": 2,
-            "profile.managed_default_content_settings.fonts": 2
-        }
-        options.add_experimental_option("prefs", prefs)
-
-        # Eager gives DOMContentLoaded (safer than 'none' for interactive elements)
-        options.page_load_strategy = "eager"
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-
-        # Optional: use CDP to block common heavy resources (best-effort)
-        try:
-            driver.execute_cdp_cmd("Network.enable", {})
-            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": ["*.png", "*.jpg", "*.gif", "*.css", "*.woff2", "*.woff", "*.svg"]})
-        except Exception:
-            # Not fatal — keep going without CDP blocking
-            pass
+        with get_driver_pool().checkout(SITE_KEY) as driver:
+            html = _fetch_with_driver(driver, query)
+    except Exception as e:
+        logger.exception("[✘] Error fetching Pai results: %s", e)
+        raise
+    finally:
+        total = time.perf_counter() - start_total
+        logger.info("[Pai] total fetch cycle: %.2fs", total)
+    return html
+
+
+PRODUCT_SELECTOR = "div.product-box_details"
+READY = ReadySpec.for_site(SITE_KEY, PRODUCT_SELECTOR, timeout=9.0)
+# server-rendered: product ld+json in the page, plus whatever the search XHR returns
+JSON_SPEC = JsonSpec(SITE_KEY, "https://www.paiinternational.in", api_patterns=("/api/search", "/search?"))
+
+
+def _search_url(query: str) -> str:
+    return f"https://www.paiinternational.in/search?q={urllib.parse.quote_plus(query)}"
+
 
+def _fetch_with_driver(driver: webdriver.Chrome, query: str) -> str | None:
+    # direct search URL first; the homepage search box only when it shows no product boxes
+    _, html = run_strategies_sync(SITE_KEY, [
+        ("direct", lambda: _search_direct_selenium(driver, query)),
+        ("form", lambda: _search_form_selenium(driver, query)),
+    ])
+    return html
+
+
+def _search_direct_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    driver.get(_search_url(query))
+    if not wait_ready_sync(driver, READY, timeout=5):
+        logger.info("[Pai] no product boxes on direct search URL")
+        return None
+    return driver.page_source
+
+
+def _search_form_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    html = None
+    try:
         wait = WebDriverWait(driver, 4)  # small wait; we prefer fast fallbacks
 
         t0 = time.perf_counter()
@@ -109,25 +181,7 @@ def fetch_pai_html(query: str) -> str | None:
 
         # JS fallback: set value and submit using form/button if element wasn't usable
         if search_input is None:
-            js_submit = """
-            const q = arguments[0];
-            const sel = 'input.search-header-input';
-            const el = document.querySelector(sel);
-            if (!el) return false;
-            el.focus();
-            el.value = q;
-            el.dispatchEvent(new Event('input', {bubbles:true}));
-            // Try to submit via nearest form
-            const f = el.closest('form');
-            if (f) { try { f.submit(); return true; } catch(e){} }
-            // Fallback: find a search button and click
-            const btn = document.querySelector('button[type=submit], button.search-btn, button.icon-search, button.search-button');
-            if (btn) { try { btn.click(); return true; } catch(e){} }
-            // If nothing else, dispatch Enter key events
-            el.dispatchEvent(new KeyboardEvent('keydown', {key:'Enter', keyCode:13, which:13, bubbles:true}));
-            el.dispatchEvent(new KeyboardEvent('keyup', {key:'Enter', keyCode:13, which:13, bubbles:true}));
-            return true;
-            """
+            js_submit = "const q = arguments[0];\n" + _JS_SUBMIT_SEARCH
             try:
                 ok = driver.execute_script(js_submit, query)
                 if not ok:
@@ -141,39 +195,76 @@ def fetch_pai_html(query: str) -> str | None:
                 # JS injection failed — continue and attempt to proceed to results polling
                 pass
 
-        # After submit, wait for product containers; if not found quickly, poll for a short time
-        found = False
-        try:
-            WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.product-box_details")))
-            found = True
-        except TimeoutException:
-            # Poll manually for up to ~4 seconds
-            poll_until = time.time() + 4.0
-            while time.time() < poll_until:
-                elems = driver.find_elements(By.CSS_SELECTOR, "div.product-box_details")
-                if elems:
-                    found = True
-                    break
-                time.sleep(0.25)
-
-        if not found:
-            # No results container detected — capture page anyway (maybe site returned different structure)
-            logger.warning("[Pai] Results container not detected after submit; capturing page anyway.")
+        # After submit, return as soon as the product containers have rendered
+        if not wait_ready_sync(driver, READY):
+            logger.warning("[Pai] Results container not detected after submit")
+            return None
         html = driver.page_source
         t1 = time.perf_counter()
         logger.info("[Pai] page fetch took %.2fs", t1 - t0)
 
-    except Exception as e:
-        logger.exception("[✘] Error fetching Pai results: %s", e)
-        html = None
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
-        total = time.perf_counter() - start_total
-        logger.info("[Pai] total fetch cycle: %.2fs", total)
+    except TimeoutException as e:
+        logger.warning("[Pai] timed out waiting on page: %s", e)
+    return html
+
+
+# --- FETCH (Playwright) ---
+# Central PlaywrightManager, assigned by app.init_playwright()
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/115.0 Safari/537.36",
+    "viewport": {"width": 1366, "height": 768},
+}
+
+
+async def _warm_tab(page) -> None:
+    """Homepage loaded with the search box attached (hot tabs re-run this after each query)."""
+    await page.goto("https://www.paiinternational.in/", wait_until="domcontentloaded", timeout=30000)
+    try:
+        await page.wait_for_selector("input.search-header-input", state="attached", timeout=4000)
+    except PlaywrightTimeoutError:
+        # we'll use the JS fallback when searching
+        pass
+
+
+async def _search_direct(page, query: str) -> str | None:
+    await page.goto(_search_url(query), wait_until="domcontentloaded", timeout=30000)
+    if not await wait_ready(page, READY, timeout=5):
+        logger.info("[Pai] no product boxes on direct search URL")
+        return None
+    return await page.content()
+
+
+async def _search_form(page, query: str) -> str | None:
+    if await page.query_selector("input.search-header-input") is None:
+        # the direct attempt navigated away from the warm homepage
+        await _warm_tab(page)
+    try:
+        search_input = page.locator("input.search-header-input").first
+        await search_input.fill(query, timeout=4000)
+        await search_input.press("Enter")
+    except PlaywrightTimeoutError:
+        # input not interactable yet: set value and submit from page JS
+        await page.evaluate("(q) => {" + _JS_SUBMIT_SEARCH + "}", query)
+
+    if not await wait_ready(page, READY):
+        logger.warning("[Pai] Results container not detected after submit")
+        return None
+    return await page.content()
+
+
+async def fetch_pai_html_async(query: str) -> str | None:
+    start_total = time.perf_counter()
+    async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route) as page, \
+            capture_json(page, JSON_SPEC):
+        try:
+            _, html = await run_strategies(SITE_KEY, [
+                ("direct", lambda: _search_direct(page, query)),
+                ("form", lambda: _search_form(page, query)),
+            ])
+        finally:
+            logger.info("[Pai] total fetch cycle: %.2fs", time.perf_counter() - start_total)
     return html
 
 
@@ -183,7 +274,7 @@ def fetch_pai_html(query: str) -> str | None:
 
 def parse_pai_html(html: str, query: str) -> list[dict]:
     soup = BeautifulSoup(html, "html.parser")
-    cards = soup.select("div.product-box_details")
+    cards = soup.select(PRODUCT_SELECTOR)
     if not cards:
         print("[✘] No product containers found.")
         return []
@@ -215,13 +306,46 @@ def parse_pai_html(html: str, query: str) -> list[dict]:
     return results
 
 
-def get_cheapest_pai_product(query: str):
-    html = fetch_pai_html(query)
-    if not html:
-        print("[✘] Could not retrieve HTML.")
-        return
+def parse_pai_json(html: str, query: str, payloads: list = ()) -> list[dict]:
+    """parse_pai_html() over the page's ld+json / the intercepted search response."""
+    source, products = extract_products(html, JSON_SPEC, payloads)
+    results = [p for p in products if is_strict_match(query, p["title"])]
+    if results:
+        record_source(SITE_KEY, source)
+    results.sort(key=lambda x: x["price"])
+    return results
+
+
+def parse_pai_results(html: str, query: str, payloads: list = ()) -> list[dict]:
+    # structured data first; the card parser stays the fallback for pages without it
+    results = parse_pai_json(html, query, payloads)
+    if results:
+        return results
+    record_source(SITE_KEY, "dom")
+    return parse_pai_html(html, query)
+
+
+async def _fetch_http(query: str) -> str | None:
+    return await get_async_http().fetch_results_html(
+        _search_url(query), PRODUCT_SELECTOR, has_data=lambda html: bool(extract_products(html, JSON_SPEC)[1]))
+
+
+async def _fetch_browser(query: str) -> str | None:
+    if _manager is not None:
+        return await fetch_pai_html_async(query)
+    # no central browser (standalone / Playwright unavailable): pooled Selenium driver
+    return await run_selenium_fetch(fetch_pai_html, query)
+
 
-    results = parse_pai_html(html, query)
+async def get_cheapest_pai_product(query: str):
+    # plain HTTP first; a browser only when the response has no result cards or is a bot wall
+    with collect_payloads() as payloads:
+        _, html = await run_strategies(SITE_KEY, [
+            ("http", lambda: _fetch_http(query)),
+            ("browser", lambda: _fetch_browser(query)),
+        ])
+    await save_snapshot(SITE_KEY, query, html)
+    results = parse_pai_results(html, query, payloads)
     if not results:
         print("No matching products found.")
         return
@@ -239,4 +363,4 @@ def get_cheapest_pai_product(query: str):
 if __name__ == "__main__" or "__file__" not in globals():
     q = input("Enter product name (e.g. 'iPhone 16'): ").strip()
     if q:
-        get_cheapest_pai_product(q)
+        asyncio.run(get_cheapest_pai_product(q))
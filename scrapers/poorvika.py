@@ -1,14 +1,23 @@
+import asyncio
 import time
 import re
 import logging
+import urllib.parse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
+
+from utils.blocking import BlockPolicy
+from utils.driver_pool import get_driver_pool, register_site, run_selenium_fetch
+from utils.async_http import get_async_http
+from utils.readiness import ReadySpec, wait_ready, wait_ready_sync
+from utils.search_strategy import run_strategies, run_strategies_sync
+from utils.session_state import apply_to_driver, has_state, save_context_state, save_driver_state
+from utils.snapshot_store import save_snapshot
+from utils.structured_data import JsonSpec, capture_json, collect_payloads, extract_products, record_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,64 +62,160 @@ def is_strict_match(query: str, title: str) -> bool:
     return query_words.issubset(title_words)
 
 
-def fetch_poorvika_html(query: str) -> str | None:
-    print(f"[1] Searching for: {query}")
-    html = None
-    driver = None
+SITE_KEY = "poorvika"
+
+
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("user-agent=Mozilla/5.0")
+    return options
 
-    try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless=new")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("user-agent=Mozilla/5.0")
 
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        wait = WebDriverWait(driver, 5)
+BLOCKING = BlockPolicy.for_site(SITE_KEY)
 
-        driver.get("https://www.poorvikamobile.com/")
-        print("[✓] Homepage loaded")
+register_site(SITE_KEY, _build_chrome_options, blocking=BLOCKING)
+
+
+PRODUCT_SELECTOR = "div.product-cardlist_card__description__eduH5"
+READY = ReadySpec.for_site(SITE_KEY, PRODUCT_SELECTOR, timeout=5.0)
+# a Next.js storefront: results ship in __NEXT_DATA__ and come back from its search API
+JSON_SPEC = JsonSpec(SITE_KEY, "https://www.poorvika.com", api_patterns=("/api/search", "/search?"))
+
+
+def _search_url(query: str) -> str:
+    return f"https://www.poorvika.com/s?q={urllib.parse.quote_plus(query)}"
+
+
+def _search_direct_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    driver.get(_search_url(query))
+    if not wait_ready_sync(driver, READY):
+        print("[i] No results on direct search URL")
+        return None
+    print("[✓] Page loaded (direct URL)")
+    return driver.page_source
 
+
+def _search_form_selenium(driver: webdriver.Chrome, query: str) -> str | None:
+    wait = WebDriverWait(driver, 5)
+
+    driver.get("https://www.poorvikamobile.com/")
+    print("[✓] Homepage loaded")
+
+    if not has_state(SITE_KEY):
         try:
             body = driver.find_element(By.TAG_NAME, 'body')
             body.send_keys(Keys.ESCAPE)
             print("[✓] Escape key sent")
         except:
             print("[✓] No popup to dismiss")
+        save_driver_state(SITE_KEY, driver)
+
+    print("[✓] Locating search bar...")
+    search_input = wait.until(
+        EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='Search for Products, Brands, Offers']"))
+    )
+    search_input.clear()
+    search_input.send_keys(query)
+
+    print("[✓] Clicking search button...")
+    search_button = wait.until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "button.app-bar_search_desktop__BRcZg"))
+    )
+    driver.execute_script("arguments[0].click();", search_button)
+
+    print("[✓] Waiting for results...")
+    if not wait_ready_sync(driver, READY):
+        print("[✘] No results after search")
+        return None
+    print("[✓] Page loaded")
+    return driver.page_source
 
-        print("[✓] Locating search bar...")
-        search_input = wait.until(
-            EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='Search for Products, Brands, Offers']"))
-        )
-        search_input.clear()
-        search_input.send_keys(query)
-
-        print("[✓] Clicking search button...")
-        search_button = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.app-bar_search_desktop__BRcZg"))
-        )
-        driver.execute_script("arguments[0].click();", search_button)
 
-        print("[✓] Waiting for results...")
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "product-cardlist_card__description__eduH5")))
-        html = driver.page_source
-        print("[✓] Page loaded")
+def fetch_poorvika_html(query: str) -> str | None:
+    print(f"[1] Searching for: {query}")
+    html = None
 
+    try:
+        with get_driver_pool().checkout(SITE_KEY) as driver:
+            apply_to_driver(SITE_KEY, driver)
+            _, html = run_strategies_sync(SITE_KEY, [
+                ("direct", lambda: _search_direct_selenium(driver, query)),
+                ("form", lambda: _search_form_selenium(driver, query)),
+            ])
     except Exception as e:
         print(f"[✘] An error occurred: {e}")
-    finally:
-        if driver:
-            driver.quit()
-            print("[✓] Browser closed")
+        raise
 
     return html
 
 
+# --- FETCH (Playwright) ---
+# Central PlaywrightManager, assigned by app.init_playwright()
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0",
+    "viewport": {"width": 1920, "height": 1080},
+}
+
+SEARCH_INPUT_SELECTOR = "input[placeholder='Search for Products, Brands, Offers']"
+
+
+async def _warm_tab(page) -> None:
+    """Homepage loaded, overlays dismissed, search box ready (hot tabs re-run this after each query)."""
+    await page.goto("https://www.poorvikamobile.com/", wait_until="domcontentloaded", timeout=30000)
+    print("[✓] Homepage loaded")
+    if not has_state(SITE_KEY):
+        # first visit: close the overlays once, then keep the session that remembers it
+        await page.keyboard.press("Escape")
+        await save_context_state(SITE_KEY, page.context)
+    await page.wait_for_selector(SEARCH_INPUT_SELECTOR, timeout=5000)
+
+
+async def _search_direct(page, query: str) -> str | None:
+    await page.goto(_search_url(query), wait_until="domcontentloaded", timeout=30000)
+    if not await wait_ready(page, READY):
+        print("[i] No results on direct search URL")
+        return None
+    print("[✓] Page loaded (direct URL)")
+    return await page.content()
+
+
+async def _search_form(page, query: str) -> str | None:
+    if await page.query_selector(SEARCH_INPUT_SELECTOR) is None:
+        # the direct attempt navigated away from the warm homepage
+        await _warm_tab(page)
+    search_input = page.locator(SEARCH_INPUT_SELECTOR).first
+    await search_input.fill(query, timeout=5000)
+
+    search_button = await page.wait_for_selector("button.app-bar_search_desktop__BRcZg", timeout=5000)
+    await search_button.evaluate("b => b.click()")
+
+    if not await wait_ready(page, READY):
+        print("[✘] No results after search")
+        return None
+    print("[✓] Page loaded")
+    return await page.content()
+
+
+async def fetch_poorvika_html_async(query: str) -> str | None:
+    print(f"[1] Searching for: {query}")
+    async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route) as page, \
+            capture_json(page, JSON_SPEC):
+        _, html = await run_strategies(SITE_KEY, [
+            ("direct", lambda: _search_direct(page, query)),
+            ("form", lambda: _search_form(page, query)),
+        ])
+    return html
+
+
 def parse_poorvika_html(html: str, query: str) -> list[dict]:
     soup = BeautifulSoup(html, "html.parser")
-    cards = soup.select("div.product-cardlist_card__description__eduH5")
+    cards = soup.select(PRODUCT_SELECTOR)
     if not cards:
         print("[✘] No product containers found.")
         return []
@@ -145,15 +250,48 @@ def parse_poorvika_html(html: str, query: str) -> list[dict]:
     return results
 
 
-def get_cheapest_poorvika_product(query: str):
-    start_time = time.time()  # ⏳ Start timer
+def parse_poorvika_json(html: str, query: str, payloads: list = ()) -> list[dict]:
+    """parse_poorvika_html() over __NEXT_DATA__ / the intercepted search API."""
+    source, products = extract_products(html, JSON_SPEC, payloads)
+    results = [p for p in products if is_strict_match(query, p["title"])]
+    if results:
+        record_source(SITE_KEY, source)
+    results.sort(key=lambda x: x["price"])
+    return results
 
-    html = fetch_poorvika_html(query)
-    if not html:
-        print("[✘] Could not retrieve HTML.")
-        return
 
-    results = parse_poorvika_html(html, query)
+def parse_poorvika_results(html: str, query: str, payloads: list = ()) -> list[dict]:
+    # structured data first; the card parser stays the fallback for pages without it
+    results = parse_poorvika_json(html, query, payloads)
+    if results:
+        return results
+    record_source(SITE_KEY, "dom")
+    return parse_poorvika_html(html, query)
+
+
+async def _fetch_http(query: str) -> str | None:
+    return await get_async_http().fetch_results_html(
+        _search_url(query), PRODUCT_SELECTOR, has_data=lambda html: bool(extract_products(html, JSON_SPEC)[1]))
+
+
+async def _fetch_browser(query: str) -> str | None:
+    if _manager is not None:
+        return await fetch_poorvika_html_async(query)
+    # no central browser (standalone / Playwright unavailable): pooled Selenium driver
+    return await run_selenium_fetch(fetch_poorvika_html, query)
+
+
+async def get_cheapest_poorvika_product(query: str):
+    start_time = time.time()  # ⏳ Start timer
+
+    # plain HTTP first; a browser only when the response has no result cards or is a bot wall
+    with collect_payloads() as payloads:
+        _, html = await run_strategies(SITE_KEY, [
+            ("http", lambda: _fetch_http(query)),
+            ("browser", lambda: _fetch_browser(query)),
+        ])
+    await save_snapshot(SITE_KEY, query, html)
+    results = parse_poorvika_results(html, query, payloads)
     if not results:
         print("No matching smartphones found.")
         return
@@ -174,4 +312,4 @@ def get_cheapest_poorvika_product(query: str):
 if __name__ == "__main__" or "__file__" not in globals():
     product_name = input("Enter product name (e.g. 'iPhone 16'): ").strip()
     if product_name:
-        get_cheapest_poorvika_product(product_name)
+        asyncio.run(get_cheapest_poorvika_product(product_name))
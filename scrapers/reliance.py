@@ -1,17 +1,26 @@
+import asyncio
 import time
 import re
 import logging
+import urllib.parse
 from typing import Optional, List, Tuple
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
 
+from utils.blocking import BlockPolicy
+from utils.driver_pool import get_driver_pool, register_site, run_selenium_fetch
+from utils.async_http import get_async_http
+from utils.readiness import ReadySpec, wait_ready, wait_ready_sync
+from utils.search_strategy import run_strategies, run_strategies_sync
+from utils.session_state import apply_to_driver, dismiss_popup, dismiss_popup_sync
+from utils.snapshot_store import save_snapshot
+from utils.structured_data import JsonSpec, capture_json, collect_payloads, extract_products, record_source
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -139,56 +148,147 @@ def extract_rating_from_card(card) -> str:
         logger.warning(f"[!] Failed to extract rating: {e}")
         return "Not Available"
 
-# --- MAIN SCRAPER ---
-def scrape_reliance_product(query: str):
-    logger.info(f"[Reliance Scraper] Searching for: '{query}'")
+# --- DRIVER ---
+SITE_KEY = "reliance"
+
+
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36")
+    return options
+
+
+BLOCKING = BlockPolicy.for_site(SITE_KEY)
+
+register_site(SITE_KEY, _build_chrome_options, blocking=BLOCKING)
+
+# --- FETCH (Selenium) ---
+PRODUCT_SELECTOR = "div.product-card-details"
+READY = ReadySpec.for_site(SITE_KEY, PRODUCT_SELECTOR)
+# the listing is rendered from a catalog /products API call; prefer its JSON over the cards
+JSON_SPEC = JsonSpec(SITE_KEY, "https://www.reliancedigital.in", api_patterns=("/products",))
+
+
+def _search_url(query: str) -> str:
+    return f"https://www.reliancedigital.in/products?q={urllib.parse.quote_plus(query)}"
+
+
+def _search_direct_selenium(driver: webdriver.Chrome, query: str) -> Optional[str]:
+    driver.get(_search_url(query))
+    if not wait_ready_sync(driver, READY, timeout=6):
+        logger.info("[i] No product cards on direct search URL")
+        return None
+    logger.info("[✓] Page loaded and captured (direct URL)")
+    return driver.page_source
+
+
+def _search_form_selenium(driver: webdriver.Chrome, query: str) -> Optional[str]:
+    wait = WebDriverWait(driver, 10)
+
+    driver.get("https://www.reliancedigital.in/")
+    logger.info("[✓] Homepage loaded")
+
+    if dismiss_popup_sync(SITE_KEY, driver, (By.ID, "wzrk-cancel"), timeout=10):
+        logger.info("[✓] Popup dismissed")
+    else:
+        logger.info("[i] No popup to dismiss.")
+
+    search_input = wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='Search Products & Brands']")))
+    search_input.clear()
+    search_input.send_keys(query)
+    search_input.send_keys(Keys.ENTER)
+
+    if not wait_ready_sync(driver, READY):
+        logger.warning("[✘] No product cards after search")
+        return None
+    logger.info("[✓] Page loaded and captured")
+    return driver.page_source
+
+
+def fetch_reliance_html(query: str) -> Optional[str]:
     page_source = None
-    driver = None
     try:
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--blink-settings=imagesEnabled=false")
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36")
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        wait = WebDriverWait(driver, 10)
-
-        driver.get("https://www.reliancedigital.in/")
-        logger.info("[✓] Homepage loaded")
-
-        try:
-            wait.until(EC.element_to_be_clickable((By.ID, "wzrk-cancel"))).click()
-            logger.info("[✓] Popup dismissed")
-        except Exception:
-            logger.info("[i] No popup to dismiss.")
-
-        search_input = wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='Search Products & Brands']")))
-        search_input.clear()
-        search_input.send_keys(query)
-        search_input.send_keys(Keys.ENTER)
-
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.product-card-details")))
-        page_source = driver.page_source
-        logger.info("[✓] Page loaded and captured")
-
+        with get_driver_pool().checkout(SITE_KEY) as driver:
+            apply_to_driver(SITE_KEY, driver)
+            _, page_source = run_strategies_sync(SITE_KEY, [
+                ("direct", lambda: _search_direct_selenium(driver, query)),
+                ("form", lambda: _search_form_selenium(driver, query)),
+            ])
     except Exception as e:
         logger.error(f"[✘] Error during page load: {e}")
-    finally:
-        if driver:
-            driver.quit()
-            logger.info("[✓] Browser closed")
+        raise
+
+    return page_source
+
+
+# --- FETCH (Playwright) ---
+# Central PlaywrightManager, assigned by app.init_playwright()
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "locale": "en-IN",
+}
+
 
-    if not page_source:
-        logger.error("[✘] Failed to capture page HTML.")
+SEARCH_INPUT_SELECTOR = "input[placeholder='Search Products & Brands']"
+
+
+async def _warm_tab(page) -> None:
+    """Homepage loaded, popup dismissed, search box ready (hot tabs re-run this after each query)."""
+    await page.goto("https://www.reliancedigital.in/", wait_until="domcontentloaded", timeout=30000)
+    logger.info("[✓] Homepage loaded")
+    if await dismiss_popup(SITE_KEY, page, "#wzrk-cancel", timeout_ms=3000):
+        logger.info("[✓] Popup dismissed")
+    else:
+        logger.info("[i] No popup to dismiss.")
+    await page.wait_for_selector(SEARCH_INPUT_SELECTOR, timeout=10000)
+
+
+async def _search_direct(page, query: str) -> Optional[str]:
+    await page.goto(_search_url(query), wait_until="domcontentloaded", timeout=30000)
+    if not await wait_ready(page, READY, timeout=6):
+        logger.info("[i] No product cards on direct search URL")
+        return None
+    logger.info("[✓] Page loaded and captured (direct URL)")
+    return await page.content()
+
+
+async def _search_form(page, query: str) -> Optional[str]:
+    if await page.query_selector(SEARCH_INPUT_SELECTOR) is None:
+        # the direct attempt navigated away from the warm homepage
+        await _warm_tab(page)
+    search_input = page.locator(SEARCH_INPUT_SELECTOR)
+    await search_input.fill(query, timeout=10000)
+    await search_input.press("Enter")
+
+    if not await wait_ready(page, READY):
+        logger.warning("[✘] No product cards after search")
         return None
+    logger.info("[✓] Page loaded and captured")
+    return await page.content()
 
+
+async def fetch_reliance_html_async(query: str) -> Optional[str]:
+    async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route) as page, \
+            capture_json(page, JSON_SPEC):
+        _, page_source = await run_strategies(SITE_KEY, [
+            ("direct", lambda: _search_direct(page, query)),
+            ("form", lambda: _search_form(page, query)),
+        ])
+    return page_source
+
+
+# --- PARSER ---
+def parse_reliance_html(page_source: str, query: str):
     soup = BeautifulSoup(page_source, "html.parser")
-    cards = soup.select("div.product-card-details")
+    cards = soup.select(PRODUCT_SELECTOR)
     if not cards:
         logger.warning("[✘] No product cards found.")
         return None
@@ -229,10 +329,62 @@ def scrape_reliance_product(query: str):
     results.sort(key=lambda x: x["price"])
     return results[0]
 
+
+def parse_reliance_json(page_source: str, query: str, payloads: List[dict] = ()):
+    """parse_reliance_html() over the catalog JSON (intercepted or embedded in the page)."""
+    source, products = extract_products(page_source, JSON_SPEC, payloads)
+    results = []
+    for product in products:
+        price = int(product["price"])
+        ok, _ = is_relevant(query, product["title"], price)
+        if ok:
+            results.append({**product, "price": price})
+    if not results:
+        return None
+    record_source(SITE_KEY, source)
+    results.sort(key=lambda x: x["price"])
+    return results[0]
+
+
+def parse_reliance_results(page_source: str, query: str, payloads: List[dict] = ()):
+    # structured data first; the card parser stays the fallback for pages without it
+    best = parse_reliance_json(page_source, query, payloads)
+    if best is not None:
+        return best
+    record_source(SITE_KEY, "dom")
+    return parse_reliance_html(page_source, query)
+
+
+# --- MAIN SCRAPER ---
+async def _fetch_http(query: str) -> Optional[str]:
+    return await get_async_http().fetch_results_html(
+        _search_url(query), PRODUCT_SELECTOR, has_data=lambda html: bool(extract_products(html, JSON_SPEC)[1]))
+
+
+async def _fetch_browser(query: str) -> Optional[str]:
+    if _manager is not None:
+        return await fetch_reliance_html_async(query)
+    # no central browser (standalone / Playwright unavailable): pooled Selenium driver
+    return await run_selenium_fetch(fetch_reliance_html, query)
+
+
+async def scrape_reliance_product(query: str):
+    logger.info(f"[Reliance Scraper] Searching for: '{query}'")
+    # plain HTTP first; a browser only when the response has no result cards or is a bot wall
+    with collect_payloads() as payloads:
+        _, page_source = await run_strategies(SITE_KEY, [
+            ("http", lambda: _fetch_http(query)),
+            ("browser", lambda: _fetch_browser(query)),
+        ])
+
+    await save_snapshot(SITE_KEY, query, page_source)
+    return parse_reliance_results(page_source, query, payloads)
+
+
 if __name__ == '__main__':
     product = input("Enter product name (e.g. 'Vivo X200 5G'): ").strip()
     if product:
-        data = scrape_reliance_product(product)
+        data = asyncio.run(scrape_reliance_product(product))
         if data:
             print("\n--- Scraped Product Data ---")
             print(f"  Title : {data['title']}")
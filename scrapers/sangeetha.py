@@ -1,10 +1,10 @@
+import asyncio
 import time
 import logging
 import re
+import urllib.parse
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
@@ -12,6 +12,15 @@ from selenium.webdriver.common.keys import Keys
 from bs4 import BeautifulSoup
 import pandas as pd
 
+from utils.blocking import BlockPolicy
+from utils.driver_pool import get_driver_pool, register_site, run_selenium_fetch
+from utils.async_http import get_async_http
+from utils.readiness import ReadySpec, wait_ready, wait_ready_sync
+from utils.search_strategy import run_strategies, run_strategies_sync
+from utils.session_state import apply_to_driver, dismiss_popup, dismiss_popup_sync
+from utils.snapshot_store import save_snapshot
+from utils.structured_data import JsonSpec, capture_json, collect_payloads, extract_products, record_source
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,72 +35,161 @@ def extract_price(price_text):
         return float(numbers[0].replace(',', ''))
     return None
 
-def scrape_sangeetha_product(query: str):
-    logger.info(f"[Sangeetha Scraper] Starting search for: '{query}'")
-    total_start = time.time()
+SITE_KEY = "sangeetha"
+
+
+def _build_chrome_options() -> Options:
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_argument(
+        'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36'
+    )
+    options.add_argument("--blink-settings=imagesEnabled=false")  # disable images
+    options.page_load_strategy = 'none'  # fast load strategy
+    return options
+
+
+BLOCKING = BlockPolicy.for_site(SITE_KEY)
+
+register_site(SITE_KEY, _build_chrome_options, blocking=BLOCKING)
+
+
+PRODUCT_SELECTOR = "div.product-list"
+READY = ReadySpec.for_site(SITE_KEY, PRODUCT_SELECTOR)
+# the result list is client-rendered from a search API call; read that JSON instead of the cards
+JSON_SPEC = JsonSpec(SITE_KEY, "https://www.sangeethamobiles.com",
+                     api_patterns=("/api/search", "/search?", "/search-result/"))
+
+
+def _search_url(query: str) -> str:
+    return f"https://www.sangeethamobiles.com/search-result/{urllib.parse.quote(query)}"
+
+
+def _search_direct_selenium(driver, query: str):
+    driver.get(_search_url(query))
+    if not wait_ready_sync(driver, READY, timeout=6):
+        logger.info("No products on direct search URL.")
+        return None
+    logger.info("Successfully loaded results page (direct URL).")
+    return driver.page_source
 
+
+def _search_form_selenium(driver, query: str):
+    wait = WebDriverWait(driver, 10)
+
+    start_homepage = time.time()
+    driver.get("https://www.sangeethamobiles.com/")
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input.search__home")))
+    homepage_load_time = time.time() - start_homepage
+    logger.info(f"Homepage loaded in {homepage_load_time:.2f} seconds.")
+
+    # a restored session already has the city chosen: only a cold one waits for the modal
+    if dismiss_popup_sync(SITE_KEY, driver, (By.XPATH, "//div[@id='staticBackdrop']//button[contains(text(), 'Bengaluru')]"), timeout=2):
+        logger.info("City pop-up dismissed.")
+    else:
+        logger.info("City pop-up did not appear. Continuing...")
+
+    search_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input.search__home")))
+    search_input.clear()
+    search_input.send_keys(query)
+    search_input.send_keys(Keys.ENTER)
+    logger.info("Search submitted.")
+
+    wait.until(EC.url_contains("search-result"))
+    if not wait_ready_sync(driver, READY):
+        logger.warning("Product list did not render after search.")
+        return None
+
+    logger.info("Successfully loaded results page.")
+    return driver.page_source
+
+
+def fetch_sangeetha_html(query: str):
     page_source = None
-    driver = None
     try:
-        options = Options()
-        options.add_argument('--headless=new')
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_argument(
-            'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36'
-        )
-        options.add_argument("--blink-settings=imagesEnabled=false")  # disable images
-        options.page_load_strategy = 'none'  # fast load strategy
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        wait = WebDriverWait(driver, 10)
-
-        start_homepage = time.time()
-        driver.get("https://www.sangeethamobiles.com/")
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input.search__home")))
-        homepage_load_time = time.time() - start_homepage
-        logger.info(f"Homepage loaded in {homepage_load_time:.2f} seconds.")
-
-        try:
-            short_wait = WebDriverWait(driver, 2)
-            bengaluru_button = short_wait.until(
-                EC.visibility_of_element_located((By.XPATH, "//div[@id='staticBackdrop']//button[contains(text(), 'Bengaluru')]"))
-            )
-            driver.execute_script("arguments[0].click();", bengaluru_button)
-            logger.info("City pop-up dismissed.")
-        except Exception:
-            logger.info("City pop-up did not appear. Continuing...")
-
-        search_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input.search__home")))
-        search_input.clear()
-        search_input.send_keys(query)
-        search_input.send_keys(Keys.ENTER)
-        logger.info("Search submitted.")
-
-        wait.until(EC.url_contains("search-result"))
-        time.sleep(3)  # let full content load after navigation
-
-        page_source = driver.page_source
-        logger.info("Successfully loaded results page.")
-
+        with get_driver_pool().checkout(SITE_KEY) as driver:
+            apply_to_driver(SITE_KEY, driver)
+            _, page_source = run_strategies_sync(SITE_KEY, [
+                ("direct", lambda: _search_direct_selenium(driver, query)),
+                ("form", lambda: _search_form_selenium(driver, query)),
+            ])
     except Exception as e:
         logger.error(f"An error occurred during browser navigation: {e}")
-    finally:
-        if driver:
-            driver.quit()
-            logger.info("Browser closed.")
+        raise
+
+    return page_source
+
+
+# --- FETCH (Playwright) ---
+# Central PlaywrightManager, assigned by app.init_playwright()
+_manager = None
+
+CONTEXT_OPTIONS = {
+    "user_agent": 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+    "viewport": {"width": 1920, "height": 1080},
+}
+
 
-    if not page_source:
-        logger.error("Failed to retrieve final page source.")
+async def _warm_tab(page) -> None:
+    """Homepage loaded, city pop-up answered, search box ready (hot tabs re-run this after each query)."""
+    start_homepage = time.time()
+    await page.goto("https://www.sangeethamobiles.com/", wait_until="commit", timeout=30000)
+    await page.wait_for_selector("input.search__home", timeout=10000)
+    logger.info(f"Homepage loaded in {time.time() - start_homepage:.2f} seconds.")
+
+    # a restored session already has the city chosen: only a cold one waits for the modal
+    if await dismiss_popup(SITE_KEY, page, "#staticBackdrop button:has-text('Bengaluru')", timeout_ms=2000):
+        logger.info("City pop-up dismissed.")
+    else:
+        logger.info("City pop-up did not appear. Continuing...")
+
+
+async def _search_direct(page, query: str):
+    await page.goto(_search_url(query), wait_until="commit", timeout=30000)
+    if not await wait_ready(page, READY, timeout=6):
+        logger.info("No products on direct search URL.")
+        return None
+    logger.info("Successfully loaded results page (direct URL).")
+    return await page.content()
+
+
+async def _search_form(page, query: str):
+    if await page.query_selector("input.search__home") is None:
+        # the direct attempt navigated away from the warm homepage
+        await _warm_tab(page)
+    search_input = page.locator("input.search__home").first
+    await search_input.fill(query, timeout=10000)
+    await search_input.press("Enter")
+    logger.info("Search submitted.")
+
+    await page.wait_for_url("**/*search-result*", timeout=10000)
+    if not await wait_ready(page, READY):
+        logger.warning("Product list did not render after search.")
         return None
 
+    logger.info("Successfully loaded results page.")
+    return await page.content()
+
+
+async def fetch_sangeetha_html_async(query: str):
+    async with _manager.lease_tab(SITE_KEY, CONTEXT_OPTIONS, _warm_tab, route=BLOCKING.handle_route) as page, \
+            capture_json(page, JSON_SPEC):
+        _, page_source = await run_strategies(SITE_KEY, [
+            ("direct", lambda: _search_direct(page, query)),
+            ("form", lambda: _search_form(page, query)),
+        ])
+    return page_source
+
+
+def parse_sangeetha_html(page_source: str, query: str):
     # --- PARSING PHASE from your older code ---
     logger.info("[Parser] Parsing the retrieved HTML.")
     soup = BeautifulSoup(page_source, "html.parser")
-    product_containers = soup.select("div.product-list")
+    product_containers = soup.select(PRODUCT_SELECTOR)
 
     if not product_containers:
         logger.warning("Could not find any product containers.")
@@ -120,9 +218,6 @@ def scrape_sangeetha_product(query: str):
 
             url = f"https://www.sangeethamobiles.com{url_tag['href']}" if url_tag and url_tag.has_attr('href') else "Not Available"
 
-            total_elapsed = time.time() - total_start
-            logger.info(f"Total scraping time: {total_elapsed:.2f} seconds.")
-
             return {
                 "title": title,
                 "price": price,
@@ -134,11 +229,62 @@ def scrape_sangeetha_product(query: str):
     return None
 
 
+def parse_sangeetha_json(page_source: str, query: str, payloads: list = ()):
+    """parse_sangeetha_html() over the intercepted search JSON (or JSON embedded in the page)."""
+    source, products = extract_products(page_source, JSON_SPEC, payloads)
+    query_words = {word.lower() for word in query.split()}
+    for product in products:
+        if query_words.issubset({word.lower() for word in product["title"].split()}):
+            logger.info(f"Found a matching product in {source}: {product['title']}")
+            record_source(SITE_KEY, source)
+            return product
+    return None
+
+
+def parse_sangeetha_results(page_source: str, query: str, payloads: list = ()):
+    # structured data first; the card parser stays the fallback for pages without it
+    result = parse_sangeetha_json(page_source, query, payloads)
+    if result is not None:
+        return result
+    record_source(SITE_KEY, "dom")
+    return parse_sangeetha_html(page_source, query)
+
+
+async def _fetch_http(query: str):
+    return await get_async_http().fetch_results_html(
+        _search_url(query), PRODUCT_SELECTOR, has_data=lambda html: bool(extract_products(html, JSON_SPEC)[1]))
+
+
+async def _fetch_browser(query: str):
+    if _manager is not None:
+        return await fetch_sangeetha_html_async(query)
+    # no central browser (standalone / Playwright unavailable): pooled Selenium driver
+    return await run_selenium_fetch(fetch_sangeetha_html, query)
+
+
+async def scrape_sangeetha_product(query: str):
+    logger.info(f"[Sangeetha Scraper] Starting search for: '{query}'")
+    total_start = time.time()
+
+    # plain HTTP first; a browser only when the response has no result cards or is a bot wall
+    with collect_payloads() as payloads:
+        _, page_source = await run_strategies(SITE_KEY, [
+            ("http", lambda: _fetch_http(query)),
+            ("browser", lambda: _fetch_browser(query)),
+        ])
+
+
+    await save_snapshot(SITE_KEY, query, page_source)
+    result = parse_sangeetha_results(page_source, query, payloads)
+    logger.info(f"Total scraping time: {time.time() - total_start:.2f} seconds.")
+    return result
+
+
 if __name__ == '__main__':
     product_to_search = input("What product would you like to search for on SangeethaMobiles.com? ").strip()
 
     if product_to_search:
-        scraped_data = scrape_sangeetha_product(product_to_search)
+        scraped_data = asyncio.run(scrape_sangeetha_product(product_to_search))
 
         if scraped_data:
             print("\n--- Scraped Product Data ---")
@@ -1,4 +1,5 @@
 # testall.py
+import asyncio
 
 from scrapers.amazon import fetch_amazon_products
 from scrapers.flipkart import fetch_flipkart_products
@@ -25,7 +26,8 @@ def get_cheapest(products):
 def safe_fetch(scraper_func, query, name):
     try:
         if name in ["Sangeetha", "Reliance Digital"]:
-            result = scraper_func(query)
+            # these two are coroutines now (async Playwright engines)
+            result = asyncio.run(scraper_func(query))
             return result
         else:
             results = scraper_func(query)
@@ -0,0 +1,58 @@
+# tests/conftest.py
+import os
+import sys
+import time as _time
+
+import pytest
+
+# the repo root, so `utils` / `scrapers` import however pytest is launched
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Manual scripts that drive the live retailer sites; run them by hand, not under pytest
+collect_ignore = [
+    "debug_flipkart.py",
+    "test_all.py",
+    "test_amazon.py",
+    "test_croma.py",
+    "test_fetch.py",
+    "test_flipkart.py",
+    "test_pai.py",
+    "test_poorvika.py",
+    "test_reliance.py",
+    "test_sangeetha.py",
+]
+
+
+class FakeClock:
+    """
+    Stands in for the `time` module inside the modules a test installs it in:
+    time(), monotonic() and perf_counter() all read `now`, which only moves
+    when the test advances it. The real `time` module (and so the event loop)
+    is left alone.
+    """
+
+    def __init__(self, monkeypatch, start: float = 1000.0):
+        self._monkeypatch = monkeypatch
+        self.now = start
+
+    def install(self, *modules) -> "FakeClock":
+        for module in modules:
+            self._monkeypatch.setattr(module, "time", self)
+        return self
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = perf_counter = time
+
+    def __getattr__(self, name):
+        # anything else (strftime, ...) is the real thing
+        return getattr(_time, name)
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    return FakeClock(monkeypatch)
@@ -0,0 +1,119 @@
+# tests/test_asset_cache.py
+import asyncio
+import os
+
+import pytest
+
+from utils import asset_cache
+from utils.asset_cache import AssetCache, _freshness
+
+
+@pytest.fixture
+def cache(tmp_path, fake_clock):
+    fake_clock.install(asset_cache)
+    return AssetCache(str(tmp_path / "assets"), max_bytes=8000)
+
+
+def _url(name):
+    return f"https://cdn.example.in/static/{name}.js"
+
+
+def test_round_trip_and_url_check(cache):
+    cache.put(_url("a"), 200, {"etag": '"1"'}, b"x" * 100, ttl=60)
+    meta, body = cache.get(_url("a"))
+    assert body == b"x" * 100 and meta["headers"] == {"etag": '"1"'} and meta["expires_at"] == 1060
+    assert cache.get(_url("b")) is None
+
+
+def test_least_recently_used_is_evicted_first(cache):
+    for name in "abcdefgh":
+        cache.put(_url(name), 200, {}, b"x" * 1000, ttl=60)
+    assert cache.get(_url("a")) is not None  # now the most recently used
+    cache.put(_url("i"), 200, {}, b"x" * 1000, ttl=60)
+    assert cache.get(_url("b")) is None
+    assert cache.get(_url("a")) is not None and cache.get(_url("i")) is not None
+    assert cache.stats()["evictions"] == 1
+    assert not os.path.exists(cache._paths(cache.key(_url("b")))[1])
+
+
+def test_one_huge_asset_is_not_stored(cache):
+    cache.put(_url("big"), 200, {}, b"x" * 1001, ttl=60)
+    assert cache.get(_url("big")) is None and cache.stats()["entries"] == 0
+
+
+def test_index_is_rebuilt_from_disk_and_trimmed(cache):
+    for name in "abcd":
+        cache.put(_url(name), 200, {}, b"x" * 1000, ttl=60)
+    reopened = AssetCache(cache.directory, max_bytes=2000)
+    assert reopened.stats()["entries"] == 2
+    assert reopened.stats()["evictions"] == 2
+
+
+def test_freshness_rules():
+    assert _freshness({"cache-control": "public, max-age=300"}, 0) == 300
+    assert _freshness({"cache-control": "no-store"}, 0) is None
+    assert _freshness({"cache-control": "private, max-age=300"}, 0) is None
+    assert _freshness({"cache-control": "no-cache"}, 0) == 0
+    assert _freshness({}, 0) == 0
+
+
+class _Request:
+    method = "GET"
+    resource_type = "script"
+
+    def __init__(self, url):
+        self.url = url
+        self.headers = {"accept": "*/*"}
+
+
+class _Response:
+    def __init__(self, status, headers, body=b""):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class _Route:
+    def __init__(self, response=None):
+        self.response = response
+        self.fetched_with = None
+        self.fulfilled = None
+
+    async def fetch(self, headers):
+        self.fetched_with = headers
+        return self.response
+
+    async def fulfill(self, status=None, headers=None, body=None, response=None):
+        self.fulfilled = {"status": status if response is None else response.status, "body": body}
+
+    async def continue_(self):
+        raise AssertionError("a cacheable GET should not fall through")
+
+
+def test_fresh_entries_skip_the_network_and_stale_ones_revalidate(cache, fake_clock):
+    url = _url("app")
+    cache.put(url, 200, {"etag": '"v1"'}, b"console.log(1)", ttl=60)
+
+    fresh = _Route()
+    asyncio.run(cache.handle(fresh, _Request(url)))
+    assert fresh.fetched_with is None and fresh.fulfilled == {"status": 200, "body": b"console.log(1)"}
+
+    fake_clock.advance(61)
+    stale = _Route(_Response(304, {"Cache-Control": "max-age=120"}))
+    asyncio.run(cache.handle(stale, _Request(url)))
+    assert stale.fetched_with["if-none-match"] == '"v1"'
+    assert stale.fulfilled["body"] == b"console.log(1)"
+    assert cache.get(url)[0]["expires_at"] == fake_clock.now + 120
+    assert (cache.hits, cache.revalidated, cache.misses) == (1, 1, 0)
+
+
+def test_misses_are_fetched_and_stored(cache):
+    url = _url("vendor")
+    route = _Route(_Response(200, {"Cache-Control": "max-age=600", "Content-Encoding": "br"}, b"var v"))
+    asyncio.run(cache.handle(route, _Request(url)))
+    meta, body = cache.get(url)
+    assert body == b"var v" and "content-encoding" not in meta["headers"]
+    assert cache.misses == 1 and cache.stored == 1
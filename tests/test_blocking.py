@@ -0,0 +1,43 @@
+# tests/test_blocking.py
+import re
+
+from utils.blocking import BlockPolicy
+
+
+def _cdp_blocks(policy, url):
+    # Network.setBlockedURLs globs: "*" is the only wildcard
+    return any(re.fullmatch(".*".join(map(re.escape, p.split("*"))), url) for p in policy.cdp_patterns())
+
+
+def test_documents_are_never_blocked_in_playwright():
+    policy = BlockPolicy("Croma")
+    assert policy.reason("document", "https://www.croma.com/searchB?q=fitness%20tracking%20band") is None
+    assert policy.reason("image", "https://www.croma.com/a.png") == "type"
+    assert policy.reason("script", "https://www.googletagmanager.com/gtm.js") == "domain"
+    assert policy.reason("xhr", "https://www.croma.com/api/tracking/event") == "pattern"
+
+
+def test_cdp_patterns_leave_search_urls_alone():
+    policy = BlockPolicy("Pai", resource_types=("image", "font"))
+    for url in ("https://www.paiinternational.in/search?q=fitness+tracking+band",
+                "https://www.paiinternational.in/search?q=analytics+beacon+svg",
+                "https://www.sangeethamobiles.com/search-result/fitness%20tracking%20band",
+                "https://www.croma.com/searchB?q=facebook.com%20portal"):
+        assert not _cdp_blocks(policy, url), url
+
+
+def test_cdp_patterns_still_block_assets_and_trackers():
+    policy = BlockPolicy("Pai", resource_types=("image", "font"))
+    for url in ("https://cdn.paiinternational.in/img/phone.webp",
+                "https://cdn.paiinternational.in/fonts/a.woff2?v=3",
+                "https://www.google-analytics.com/analytics.js",
+                "https://connect.facebook.net/en_US/fbevents.js",
+                "https://www.paiinternational.in/tracking/collect?e=view",
+                "https://www.paiinternational.in/beacon?id=1",
+                "https://analytics.paiinternational.in/t.gif"):
+        assert _cdp_blocks(policy, url), url
+
+
+def test_disabled_policy_blocks_nothing():
+    policy = BlockPolicy("Pai", enabled=False)
+    assert policy.reason("image", "https://x.in/a.png") is None
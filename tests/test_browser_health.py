@@ -0,0 +1,30 @@
+# tests/test_browser_health.py
+import asyncio
+
+from utils.browser_health import BrowserHealth, HealthThresholds, is_browser_fault
+from utils.search_strategy import NoResultsPage
+
+
+def test_only_closed_or_crashed_targets_are_browser_faults():
+    assert is_browser_fault(RuntimeError("Target page, context or browser has been closed"))
+    assert is_browser_fault(RuntimeError("Page.goto: Page crashed"))
+    assert not is_browser_fault(None)
+    assert not is_browser_fault(asyncio.CancelledError())
+    assert not is_browser_fault(RuntimeError("Page.goto: Timeout 30000ms exceeded."))
+    assert not is_browser_fault(NoResultsPage("Croma", [("direct", None)]))
+    assert not is_browser_fault(RuntimeError("amazon: results never rendered (div.card)"))
+
+
+def test_error_streak_triggers_recycle_and_resets_on_success():
+    health = BrowserHealth("test")
+    thresholds = HealthThresholds(max_pages=0, max_error_streak=3)
+    for _ in range(2):
+        health.record(False)
+    health.record(True)
+    health.record(False)
+    assert health.recycle_reason(thresholds) is None
+    health.record(False)
+    health.record(False)
+    assert health.recycle_reason(thresholds) == "errors"
+    health.relaunched("errors")
+    assert health.error_streak == 0 and health.recycles == 1
@@ -0,0 +1,88 @@
+# tests/test_circuit_breaker.py
+from types import SimpleNamespace
+
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    # no jitter: open periods come out exact
+    monkeypatch.setattr(circuit_breaker, "random", SimpleNamespace(uniform=lambda a, b: 1.0))
+    return fake_clock.install(circuit_breaker)
+
+
+def _tripped(**kwargs):
+    breaker = CircuitBreaker("Croma", window=10, min_calls=4, threshold=0.5, open_for=60, **kwargs)
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(ok)
+    return breaker
+
+
+def test_opens_at_threshold_only_after_min_calls(clock):
+    breaker = CircuitBreaker("Croma", window=10, min_calls=4, threshold=0.5)
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == "closed"
+    breaker.record(False)
+    assert breaker.state == "open" and breaker.opened == 1
+
+
+def test_open_rejects_until_probe_is_due(clock):
+    breaker = _tripped()
+    assert breaker.state == "open"
+    assert not breaker.available() and not breaker.allow()
+    assert breaker.retry_in() == 60
+    assert breaker.unavailable() == CircuitOpenError("Croma", 60).result()
+    clock.advance(59)
+    assert not breaker.allow()
+    assert breaker.rejected == 2
+    clock.advance(1)
+    assert breaker.available()
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.available() and not breaker.allow()
+
+
+def test_successful_probe_closes(clock):
+    breaker = _tripped()
+    clock.advance(60)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.stats()["calls"] == 0
+
+
+def test_failed_probe_reopens_with_doubled_period(clock):
+    breaker = _tripped(max_open=200)
+    for expected in (120, 200, 200):
+        clock.advance(breaker.retry_in())
+        assert breaker.allow()
+        breaker.record(False)
+        assert breaker.state == "open"
+        assert breaker.retry_in() == expected
+
+
+def test_abandon_frees_the_probe_slot(clock):
+    breaker = _tripped()
+    clock.advance(60)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_late_results_while_open_are_ignored(clock):
+    breaker = _tripped()
+    breaker.record(True)
+    assert breaker.state == "open" and breaker.stats()["calls"] == 0
+
+
+def test_registry_shares_settings_and_can_be_disabled():
+    breakers = CircuitBreakers(min_calls=2)
+    assert breakers.get("Croma") is breakers.get("Croma")
+    assert breakers.get("Croma").min_calls == 2
+    assert set(breakers.stats()["sites"]) == {"Croma"}
+    assert CircuitBreakers(enabled=False).get("Croma") is None
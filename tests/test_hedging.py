@@ -0,0 +1,110 @@
+# tests/test_hedging.py
+import asyncio
+
+import pytest
+
+from utils.hedging import HedgeBudget, hedged
+
+
+def test_budget_starts_with_burst_and_earns_ratio_per_attempt():
+    budget = HedgeBudget(ratio=0.5, burst=2, max_inflight=10)
+    assert budget.try_acquire("Croma") and budget.try_acquire("Croma")
+    assert not budget.try_acquire("Croma")
+    budget.note_attempt("Croma")
+    assert not budget.try_acquire("Croma")
+    budget.note_attempt("Croma")
+    assert budget.try_acquire("Croma")
+    assert budget.counts["Croma"] == {"attempts": 2, "hedged": 3, "hedge_wins": 0, "denied": 2}
+
+
+def test_tokens_capped_at_burst():
+    budget = HedgeBudget(ratio=1.0, burst=2, max_inflight=10)
+    for _ in range(10):
+        budget.note_attempt("Croma")
+    assert budget.stats()["tokens"] == 2
+
+
+def test_max_inflight_and_release():
+    budget = HedgeBudget(burst=5, max_inflight=1)
+    assert budget.try_acquire("Amazon")
+    assert not budget.try_acquire("Amazon")
+    budget.release("Amazon", hedge_won=True)
+    assert budget.stats()["inflight"] == 0
+    assert budget.try_acquire("Amazon")
+    assert budget.counts["Amazon"]["hedge_wins"] == 1
+    assert budget.counts["Amazon"]["denied"] == 1
+
+
+def _attempts(*delays):
+    """A start() whose n-th call sleeps delays[n] and returns n; records cancellations."""
+    calls, cancelled = [], []
+
+    async def start():
+        n = len(calls)
+        calls.append(n)
+        try:
+            await asyncio.sleep(delays[n])
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return n
+
+    return start, calls, cancelled
+
+
+def test_hedge_wins_when_primary_stalls_and_primary_is_cancelled():
+    budget = HedgeBudget()
+    start, calls, cancelled = _attempts(5, 0.01)
+
+    async def main():
+        result = await hedged(start, timeout=2, hedge_after=0.02, budget=budget, site="Croma")
+        await asyncio.sleep(0)
+        return result
+
+    result, elapsed = asyncio.run(main())
+    assert result == 1 and elapsed < 1
+    assert calls == [0, 1] and cancelled == [0]
+    assert budget.counts["Croma"]["hedge_wins"] == 1
+    assert budget.stats()["inflight"] == 0
+
+
+def test_no_hedge_when_budget_is_empty():
+    budget = HedgeBudget(burst=0)
+    start, calls, _ = _attempts(0.05)
+    result, _ = asyncio.run(hedged(start, timeout=2, hedge_after=0.01, budget=budget, site="Croma"))
+    assert result == 0 and calls == [0]
+    assert budget.counts["Croma"]["denied"] == 1
+
+
+def test_timeout_cancels_both_attempts_and_releases_the_hedge():
+    budget = HedgeBudget()
+    start, calls, cancelled = _attempts(5, 5)
+
+    async def main():
+        try:
+            await hedged(start, timeout=0.1, hedge_after=0.02, budget=budget, site="Croma")
+        finally:
+            await asyncio.sleep(0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+    assert sorted(cancelled) == [0, 1]
+    assert budget.stats()["inflight"] == 0
+    assert budget.counts["Croma"]["hedge_wins"] == 0
+
+
+def test_failed_primary_still_waits_for_the_hedge():
+    budget = HedgeBudget()
+
+    calls = []
+
+    async def start():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("primary failed")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    result, _ = asyncio.run(hedged(start, timeout=2, hedge_after=0.01, budget=budget, site="Croma"))
+    assert result == "hedge"
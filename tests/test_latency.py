@@ -0,0 +1,79 @@
+# tests/test_latency.py
+import asyncio
+import json
+
+from utils.latency import LatencyTracker, attempt_clock, slot_acquired
+
+
+def _tracker(**kwargs):
+    settings = dict(path=None, min_samples=5, percentile=0.9, headroom=1.5, floor=8.0, ceiling=60.0)
+    settings.update(kwargs)
+    return LatencyTracker({"Amazon": 40.0, "Croma": 20.0}, **settings)
+
+
+def test_configured_default_until_enough_samples():
+    tracker = _tracker()
+    for _ in range(4):
+        tracker.record("Amazon", 2.0)
+    assert tracker.quantile("Amazon", 0.9) is None
+    assert tracker.timeout("Amazon") == 40.0
+    assert tracker.timeout("Unknown", default=25.0) == 25.0
+
+
+def test_timeout_is_percentile_times_headroom():
+    tracker = _tracker()
+    for seconds in (5, 6, 7, 8, 9, 10, 11, 12, 13, 20):
+        tracker.record("Amazon", float(seconds))
+    assert tracker.quantile("Amazon", 0.9) == 13.0
+    assert tracker.timeout("Amazon") == 19.5
+
+
+def test_timeout_clamped_to_floor_default_and_ceiling():
+    tracker = _tracker(ceiling=30.0)
+    for _ in range(10):
+        tracker.record("Amazon", 1.0)
+        tracker.record("Croma", 50.0)
+        tracker.record("Other", 50.0)
+    assert tracker.timeout("Amazon") == 8.0
+    assert tracker.timeout("Croma") == 20.0  # never above the configured default
+    assert tracker.timeout("Other", default=120.0) == 30.0
+
+
+def test_timeouts_are_counted_but_not_sampled():
+    tracker = _tracker()
+    for _ in range(5):
+        tracker.record("Croma", 4.0)
+    for _ in range(10):
+        tracker.record_timeout("Croma")
+    assert tracker.timeout("Croma") == 8.0
+    stats = tracker.stats()["Croma"]
+    assert stats["samples"] == 5 and stats["timeouts"] == 10
+
+
+def test_save_is_due_every_twenty_records_and_round_trips(tmp_path):
+    path = str(tmp_path / "latency.json")
+    tracker = _tracker(path=path)
+    due = [tracker.record("Amazon", float(i)) for i in range(1, 21)]
+    assert due == [False] * 19 + [True]
+    tracker.save()
+    assert not tracker.record("Amazon", 21.0)
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["samples"]["Amazon"]) == 20
+    reloaded = _tracker(path=path, window=10)
+    assert reloaded.quantile("Amazon", 1.0) == 20.0
+    assert reloaded.stats()["Amazon"]["samples"] == 10
+
+
+def test_attempt_clock_starts_when_the_slot_is_acquired():
+    async def queued_then_work():
+        await asyncio.sleep(0.2)  # waiting for a browser slot
+        await asyncio.to_thread(slot_acquired)  # marked from the worker thread, as the driver pool does
+        await asyncio.sleep(0.05)
+
+    async def main():
+        with attempt_clock() as clock:
+            await asyncio.wait_for(queued_then_work(), timeout=2)
+        return clock.elapsed()
+
+    assert 0.04 < asyncio.run(main()) < 0.15
+    slot_acquired()  # no attempt being timed: a no-op
@@ -0,0 +1,61 @@
+# tests/test_negative_cache.py
+import asyncio
+
+import pytest
+
+from utils import negative_cache
+from utils.negative_cache import DEFAULT_TTLS, NegativeCache, failure_reason
+from utils.search_strategy import NoResultsPage
+
+
+class _NotRendered(RuntimeError):
+    # what utils.readiness.ResultsNotReady looks like to the negative cache
+    reason = "selector_timeout"
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock.install(negative_cache)
+
+
+def test_each_reason_expires_after_its_own_ttl(clock):
+    cache = NegativeCache()
+    for reason in DEFAULT_TTLS:
+        cache.put(f"query {reason}", "Croma", reason, {"error": reason})
+    clock.advance(min(DEFAULT_TTLS.values()) - 1)
+    assert all(cache.get(f"query {reason}", "Croma") is not None for reason in DEFAULT_TTLS)
+    for reason, ttl in sorted(DEFAULT_TTLS.items(), key=lambda item: item[1]):
+        clock.now = 1000.0 + ttl
+        assert cache.get(f"query {reason}", "Croma") is None, reason
+
+
+def test_failures_are_shorter_lived_than_no_match():
+    assert DEFAULT_TTLS["failed"] < DEFAULT_TTLS["selector_timeout"] < DEFAULT_TTLS["no_match"]
+    assert DEFAULT_TTLS["timeout"] < DEFAULT_TTLS["no_match"]
+
+
+def test_keyed_by_canonical_query_and_site(clock):
+    cache = NegativeCache()
+    cache.put("Apple iPhone 16", "Croma", "no_match", None)
+    assert cache.get("iphone 16", "Croma").reason == "no_match"
+    assert cache.get("iphone 16", "Poorvika") is None
+    cache.forget("iphone  16", "Croma")
+    assert cache.get("iphone 16", "Croma") is None
+
+
+def test_unknown_reasons_and_disabled_cache_store_nothing(clock):
+    cache = NegativeCache()
+    cache.put("q", "Croma", "no_such_reason", None)
+    assert cache.get("q", "Croma") is None
+    off = NegativeCache(enabled=False)
+    off.put("q", "Croma", "no_match", None)
+    assert off.get("q", "Croma") is None
+
+
+def test_failure_reason_classification():
+    assert failure_reason(asyncio.TimeoutError()) == "timeout"
+    assert failure_reason(RuntimeError("Access Denied (403)")) == "blocked"
+    assert failure_reason(_NotRendered("amazon: div.card never rendered")) == "selector_timeout"
+    assert failure_reason(NoResultsPage("croma", [("http", None), ("browser", None)])) == "selector_timeout"
+    assert failure_reason(NoResultsPage("croma", [("http", None), ("browser", OSError("net::ERR"))])) == "failed"
+    assert failure_reason(KeyError("title")) is None
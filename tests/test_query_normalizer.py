@@ -0,0 +1,37 @@
+# tests/test_query_normalizer.py
+import pytest
+
+from utils.query_normalizer import canonical_key, canonicalize
+
+
+def test_equivalent_spellings_share_a_key():
+    assert canonical_key("Apple iPhone 16") == canonical_key("iphone  16") == "iphone 16"
+    assert canonical_key("Black iPhone 16") == canonical_key("iphone 16 black") == "iphone 16 black"
+    assert canonical_key("Samsung Galaxy S24+") == canonical_key("galaxy s24 plus") == "galaxy s24 plus"
+
+
+def test_storage_and_colour_stay_in_the_key():
+    canon = canonicalize("Apple iPhone 16 8 GB 256GB Black")
+    assert canon.key == "iphone 16 8gb 256gb black"
+    assert canon.filters == {"storage": "8gb 256gb", "color": "black"}
+    assert canonical_key("iphone 16 128gb") != canonical_key("iphone 16 256gb")
+    assert canonical_key("iphone 16 black") != canonical_key("iphone 16 red") != canonical_key("iphone 16")
+
+
+def test_scrapers_get_the_users_text():
+    is_relevant = pytest.importorskip("scrapers.amazon").is_relevant
+    canon = canonicalize("  Samsung  Galaxy S24+ ")
+    assert canon.search_text == "Samsung Galaxy S24+"
+    # the canonical "galaxy s24 plus" would be rejected for a missing word
+    assert is_relevant(canon.search_text, "Samsung Galaxy S24+ 5G (Onyx Black, 256GB)", 79999)[0]
+
+
+def test_conflicting_attributes():
+    canon = canonicalize("iphone 16 256gb black")
+    assert canon.conflicts("Apple iPhone 16 (128 GB) - Black") == ["storage"]
+    assert canon.conflicts("Apple iPhone 16 (256 GB) - White") == ["color"]
+    assert canon.conflicts("Apple iPhone 16 (256 GB) - Black") == []
+
+
+def test_filler_only_query_is_kept():
+    assert canonical_key("The Phone") == "the phone"
@@ -0,0 +1,99 @@
+# tests/test_result_cache.py
+import asyncio
+
+import pytest
+
+from utils import result_cache
+from utils.result_cache import ResultCache, is_cacheable
+
+PHONE = {"title": "Apple iPhone 16 (128 GB) - Black", "price": 69900}
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock.install(result_cache)
+
+
+def _get(cache, query, site, **kwargs):
+    return asyncio.run(cache.get(query, site, **kwargs))
+
+
+def test_hit_until_the_sites_ttl(clock, monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_TTL_RELIANCE_DIGITAL", "30")
+    cache = ResultCache(default_ttl=900, site_ttls={"Croma": 60})
+    for site in ("Croma", "Reliance Digital", "Poorvika"):
+        cache.put("iphone 16", site, PHONE)
+    clock.advance(59)
+    assert _get(cache, "iphone 16", "Croma").result == PHONE
+    assert _get(cache, "iphone 16", "Reliance Digital") is None
+    clock.advance(1)
+    assert _get(cache, "iphone 16", "Croma") is None
+    assert _get(cache, "iphone 16", "Poorvika") is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["expired"]) == (2, 2)
+
+
+def test_equivalent_queries_share_an_entry(clock):
+    cache = ResultCache()
+    cache.put("Apple iPhone 16", "Croma", PHONE)
+    assert _get(cache, "iphone  16", "Croma").result == PHONE
+    assert _get(cache, "iphone 16 pro", "Croma") is None
+
+
+def test_errors_and_empty_results_are_not_cached(clock):
+    assert not is_cacheable(None) and not is_cacheable({}) and not is_cacheable({"error": "timeout"})
+    cache = ResultCache()
+    for result in (None, {}, {"error": "timeout"}):
+        cache.put("iphone 16", "Croma", result)
+    assert cache.stats()["stored"] == 0
+
+
+def test_least_recently_used_entry_goes_first(clock):
+    cache = ResultCache(max_entries=2)
+    cache.put("iphone 15", "Croma", PHONE)
+    cache.put("iphone 16", "Croma", PHONE)
+    assert _get(cache, "iphone 15", "Croma") is not None
+    cache.put("pixel 9", "Croma", PHONE)
+    assert _get(cache, "iphone 16", "Croma") is None
+    assert _get(cache, "iphone 15", "Croma") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disabled_cache_is_a_no_op(clock):
+    cache = ResultCache(enabled=False)
+    cache.put("iphone 16", "Croma", PHONE)
+    assert _get(cache, "iphone 16", "Croma") is None
+
+
+def test_stale_entries_served_only_when_allowed_and_within_max_stale(clock):
+    cache = ResultCache(default_ttl=60, max_stale=600)
+    cache.put("iphone 16", "Croma", PHONE)
+    clock.advance(90)
+    assert _get(cache, "iphone 16", "Croma") is None
+    entry = _get(cache, "iphone 16", "Croma", allow_stale=True)
+    assert entry.stale and entry.result == PHONE
+    assert entry.meta() == {"hit": True, "age": 90, "ttl": 60, "stale": True}
+    clock.advance(600)
+    assert _get(cache, "iphone 16", "Croma", allow_stale=True) is None
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["expired"]) == (1, 2)
+
+
+def test_a_refreshed_entry_is_fresh_again(clock):
+    cache = ResultCache(default_ttl=60)
+    cache.put("iphone 16", "Croma", PHONE)
+    clock.advance(90)
+    cache.put("iphone 16", "Croma", {**PHONE, "price": 64900})
+    entry = _get(cache, "iphone 16", "Croma")
+    assert not entry.stale and entry.result["price"] == 64900
+
+
+def test_one_background_refresh_per_entry(clock):
+    cache = ResultCache()
+    assert cache.begin_refresh("Apple iPhone 16", "Croma")
+    assert not cache.begin_refresh("iphone 16", "Croma")
+    assert cache.begin_refresh("iphone 16", "Poorvika")
+    assert cache.stats()["refreshing"] == 2
+    cache.end_refresh("iphone 16", "Croma")
+    assert cache.begin_refresh("iphone 16", "Croma")
+    assert cache.stats()["refreshes"] == 3
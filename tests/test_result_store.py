@@ -0,0 +1,78 @@
+# tests/test_result_store.py
+import asyncio
+import os
+
+import pytest
+
+from utils import result_cache, result_store
+from utils.result_cache import ResultCache
+from utils.result_store import ResultStore
+
+PHONE = {"title": "Apple iPhone 16 (128 GB) - Black", "price": 69900}
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock.install(result_store, result_cache)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "results.sqlite3")
+
+
+def test_rows_survive_a_restart(clock, path):
+    store = ResultStore(path)
+    store.put("iphone 16", "Croma", PHONE, 1000.0, 1900.0)
+    store.close()
+    assert store.get("iphone 16", "Croma") == (PHONE, 1000.0, 1900.0)
+    assert ResultStore(path).get("iphone 16", "Croma") == (PHONE, 1000.0, 1900.0)
+    assert store.get("iphone 16", "Poorvika") is None
+    assert store.stats()["writes"] == 1
+
+
+def test_prune_drops_rows_past_retention(clock, path):
+    store = ResultStore(path, retention=3600)
+    store.put("old", "Croma", PHONE, 0.0, clock.now - 3601)
+    store.put("new", "Croma", PHONE, clock.now, clock.now + 900)
+    store.close()
+    assert store.prune() == 1
+    assert store.get("old", "Croma") is None and store.get("new", "Croma") is not None
+
+
+def test_prune_keeps_the_most_recently_read_rows(clock, path):
+    store = ResultStore(path, max_entries=2)
+    for query in ("a", "b", "c"):
+        store.put(query, "Croma", PHONE, clock.now, clock.now + 900)
+        clock.advance(1)
+    store.close()
+    clock.advance(120)
+    assert store.get("a", "Croma") is not None  # a read older than a minute bumps accessed_at
+    assert store.prune() == 1
+    assert store.get("b", "Croma") is None
+    assert store.stats()["rows"] == 2
+
+
+def test_result_cache_reads_through_to_the_store(clock, path):
+    writer = ResultCache(default_ttl=900, store=ResultStore(path))
+    writer.put("Apple iPhone 16", "Croma", PHONE)
+    writer.store.close()
+
+    # another worker, or this one after a restart, with an empty memory cache
+    reader = ResultCache(default_ttl=900, store=ResultStore(path))
+    entry = asyncio.run(reader.get("iphone 16", "Croma"))
+    assert entry.result == PHONE and not entry.stale
+
+    # a fresher row written elsewhere replaces an expired in-memory entry
+    clock.advance(1000)
+    writer.put("iphone 16", "Croma", {**PHONE, "price": 64900})
+    writer.store.close()
+    assert asyncio.run(reader.get("iphone 16", "Croma")).result["price"] == 64900
+
+
+def test_disabled_store_touches_nothing(path):
+    store = ResultStore(path, enabled=False)
+    store.put("iphone 16", "Croma", PHONE, 0.0, 1.0)
+    store.close()
+    assert store.get("iphone 16", "Croma") is None
+    assert not os.path.exists(path)
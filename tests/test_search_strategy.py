@@ -0,0 +1,48 @@
+# tests/test_search_strategy.py
+import asyncio
+
+import pytest
+
+from utils.search_strategy import NoResultsPage, run_strategies, strategy_stats
+
+
+def test_first_hit_wins_and_misses_are_recorded():
+    async def miss():
+        return None
+
+    async def hit():
+        return "<html>"
+
+    name, html = asyncio.run(run_strategies("SiteA", [("http", miss), ("browser", hit)]))
+    assert (name, html) == ("browser", "<html>")
+    stats = strategy_stats()["SiteA"]
+    assert stats["http"]["successes"] == 0 and stats["browser"]["successes"] == 1
+
+
+def test_cancelled_strategy_counts_as_a_miss():
+    async def stall():
+        await asyncio.sleep(10)
+
+    async def never():
+        raise AssertionError("not reached")
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(run_strategies("SiteB", [("http", stall), ("browser", never)]), 0.05))
+    stats = strategy_stats()["SiteB"]
+    assert stats["http"]["attempts"] == 1 and stats["http"]["recent_hit_rate"] == 0
+    assert "browser" not in stats
+
+
+def test_all_missing_raises_with_reason():
+    async def miss():
+        return None
+
+    async def boom():
+        raise OSError("net::ERR_CONNECTION_RESET")
+
+    with pytest.raises(NoResultsPage) as excinfo:
+        asyncio.run(run_strategies("SiteC", [("direct", miss), ("form", miss)]))
+    assert excinfo.value.reason == "selector_timeout"
+    with pytest.raises(NoResultsPage) as excinfo:
+        asyncio.run(run_strategies("SiteC", [("direct", miss), ("form", boom)]))
+    assert excinfo.value.reason == "failed"
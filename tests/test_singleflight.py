@@ -0,0 +1,83 @@
+# tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_task():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        tasks = [flights.run("key", lambda: asyncio.ensure_future(work())) for _ in range(10)]
+        results = await asyncio.gather(*tasks)
+        return flights, calls, tasks, results
+
+    flights, calls, tasks, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(t is tasks[0] for t in tasks)
+    assert results == ["result"] * 10
+    assert flights.stats()["started"] == 1
+    assert flights.stats()["joined"] == 9
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_finished_tasks_start_new_work():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def work(value):
+            return value
+
+        a = flights.run("a", lambda: asyncio.ensure_future(work("a")))
+        b = flights.run("b", lambda: asyncio.ensure_future(work("b")))
+        first = await a
+        again = flights.run("a", lambda: asyncio.ensure_future(work("a2")))
+        return a, b, again, first, await b, await again
+
+    a, b, again, first, second, third = asyncio.run(scenario())
+    assert a is not b and again is not a
+    assert (first, second, third) == ("a", "b", "a2")
+
+
+def test_error_reaches_every_subscriber():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        tasks = [flights.run("key", lambda: asyncio.ensure_future(work())) for _ in range(3)]
+        return await asyncio.gather(*tasks, return_exceptions=True), flights
+
+    results, flights = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(r, ValueError) and str(r) == "boom" for r in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_release_only_frees_the_last_subscriber():
+    async def scenario():
+        flights = SingleFlight("test")
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = flights.run("key", lambda: asyncio.ensure_future(work()))
+        flights.run("key", lambda: pytest.fail("should join the running task"))
+        await started.wait()
+        first, second = flights.release(task), flights.release(task)
+        task.cancel()
+        return first, second
+
+    assert asyncio.run(scenario()) == (False, True)
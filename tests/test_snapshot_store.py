@@ -0,0 +1,75 @@
+# tests/test_snapshot_store.py
+import os
+
+import pytest
+
+from utils import snapshot_store
+from utils.snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock.install(snapshot_store)
+
+
+def _page(n):
+    # incompressible enough that each blob has a predictable size on disk
+    return "<html>" + os.urandom(2000).hex() + f"<!-- {n} --></html>"
+
+
+def test_identical_pages_are_stored_once(clock, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    html = _page(1)
+    digest = store.save("croma", "iphone 16", html)
+    assert store.save("croma", "apple iphone 16", html) == digest
+    assert store.load(digest) == html
+    stats = store.stats()
+    assert (stats["snapshots"], stats["blobs"], stats["deduped"]) == (2, 1, 1)
+
+
+def test_latest_page_replaces_the_previous_one(clock, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save("croma", "iphone 16", _page(1))
+    clock.advance(1)
+    newer = store.save("croma", "iphone 16", _page(2))
+    assert [s["digest"] for s in store.snapshots("croma")] == [newer]
+
+
+def _blob_bytes(store):
+    return store._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+
+def test_oldest_snapshots_are_evicted_over_the_byte_budget(clock, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    digests = [store.save("croma", "query 0", _page(0))]
+    store.max_bytes = int(_blob_bytes(store) * 2.5)
+    for n in (1, 2):
+        clock.advance(1)
+        digests.append(store.save("croma", f"query {n}", _page(n)))
+    assert [s["query"] for s in store.snapshots()] == ["query 2", "query 1"]
+    assert store.load(digests[0]) is None and store.load(digests[2]) is not None
+    assert store.stats()["evicted"] == 1
+    assert len(os.listdir(os.path.join(store.directory, "blobs"))) == 2
+
+
+def test_a_blob_still_referenced_is_kept(clock, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    shared = _page(1)
+    digest = store.save("croma", "old", shared)
+    clock.advance(1)
+    store.save("pai", "other", _page(2))
+    clock.advance(1)
+    store.save("pai", "new", shared)
+    store.max_bytes = _blob_bytes(store) - 1
+    store._evict()
+    # dropping "old" frees nothing ("new" still points at its page), so "other" goes too
+    assert [s["query"] for s in store.snapshots()] == ["new"]
+    assert store.load(digest) == shared
+    assert store.evicted == 2
+
+
+def test_disabled_store_saves_nothing(tmp_path):
+    store = SnapshotStore(str(tmp_path / "off"), enabled=False)
+    assert store.save("croma", "iphone 16", _page(1)) is None
+    assert store.stats() == {"enabled": False}
+    assert not os.path.exists(tmp_path / "off")
@@ -0,0 +1,25 @@
+# tests/test_structured_data.py
+from utils.structured_data import JsonSpec, extract_products, find_products
+
+SPEC = JsonSpec("Pai", "https://www.paiinternational.in", api_patterns=("/api/search", "/search?"))
+
+
+def test_selling_price_wins_over_mrp():
+    payload = {"items": [{"name": "iPhone 16", "price": 79900, "special_price": 69900, "url": "/iphone-16"},
+                         {"name": "iPhone 16 Plus", "price": "₹89,900", "sellingPrice": {"value": 84900}}]}
+    products = find_products(payload, SPEC)
+    assert [p["price"] for p in products] == [69900, 84900]
+    assert products[0]["url"] == "https://www.paiinternational.in/iphone-16"
+
+
+def test_plain_price_used_when_it_is_the_only_one():
+    _, products = extract_products("", SPEC, payloads=[[{"title": "Pixel 9", "price": "₹74,999"}]])
+    assert products[0]["price"] == 74999
+
+
+def test_results_api_only():
+    assert SPEC.wants("https://www.paiinternational.in/api/search?q=iphone")
+    assert SPEC.wants("https://www.paiinternational.in/search?q=iphone&page=2")
+    assert not SPEC.wants("https://www.paiinternational.in/api/search/suggest?q=iph")
+    assert not SPEC.wants("https://www.paiinternational.in/api/search-autocomplete?q=iph")
+    assert not SPEC.wants("https://www.paiinternational.in/api/cart")
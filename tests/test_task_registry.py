@@ -0,0 +1,89 @@
+# tests/test_task_registry.py
+import asyncio
+
+from utils import task_registry
+from utils.task_registry import TaskRegistry
+
+
+async def _finished(value):
+    task = asyncio.ensure_future(asyncio.sleep(0, result=value))
+    await task
+    await asyncio.sleep(0)  # let the registry's done callback run
+    return task
+
+
+def test_finished_entries_expire_after_ttl(fake_clock):
+    fake_clock.install(task_registry)
+
+    async def scenario():
+        registry = TaskRegistry("test", ttl=60)
+        registry["q"] = await _finished({"site": "x"})
+        await asyncio.sleep(0)
+        present = "q" in registry
+        fake_clock.advance(61)
+        return registry, present, "q" in registry
+
+    registry, before, after = asyncio.run(scenario())
+    assert before and not after
+    assert registry.evictions["expired"] == 1
+
+
+def test_running_tasks_are_never_evicted():
+    async def scenario():
+        registry = TaskRegistry("test", max_entries=1)
+        running = asyncio.ensure_future(asyncio.sleep(10))
+        registry["running"] = running
+        registry["done"] = await _finished(1)
+        await asyncio.sleep(0)
+        keys = list(registry)
+        running.cancel()
+        return registry, keys
+
+    registry, keys = asyncio.run(scenario())
+    assert keys == ["running"]
+    assert registry.evictions["entries"] == 1
+
+
+def test_oldest_finished_go_first_over_max_entries():
+    async def scenario():
+        registry = TaskRegistry("test", max_entries=2)
+        for key in ("a", "b", "c"):
+            registry[key] = await _finished(key)
+            await asyncio.sleep(0)
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert list(registry) == ["b", "c"]
+    assert registry.evictions["entries"] == 1
+
+
+def test_byte_budget_evicts_large_results():
+    async def scenario():
+        registry = TaskRegistry("test", max_bytes=1000)
+        registry["big1"] = await _finished("x" * 800)
+        await asyncio.sleep(0)
+        registry["big2"] = await _finished("y" * 800)
+        await asyncio.sleep(0)
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert list(registry) == ["big2"]
+    assert registry.evictions["bytes"] == 1
+
+
+def test_consume_frees_finished_but_not_running_tasks():
+    async def scenario():
+        registry = TaskRegistry("test")
+        running = asyncio.ensure_future(asyncio.sleep(10))
+        registry["running"] = running
+        registry["done"] = await _finished(1)
+        await asyncio.sleep(0)
+        registry.consume("done")
+        registry.consume("running")
+        keys = list(registry)
+        running.cancel()
+        return registry, keys
+
+    registry, keys = asyncio.run(scenario())
+    assert keys == ["running"]
+    assert registry.evictions["consumed"] == 1
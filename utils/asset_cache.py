@@ -0,0 +1,271 @@
+# utils/asset_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from utils.paths import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Static responses worth keeping; documents and XHR carry the (per-query) results
+CACHEABLE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+
+# Hop-by-hop / encoding headers: the stored body is already decoded
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+_MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)=(\d+)")
+
+
+def _freshness(headers: Dict[str, str], now: float) -> Optional[float]:
+    """Seconds the response may be served without revalidation; None if it must not be stored."""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+    m = _MAX_AGE_RE.search(cache_control)
+    if m:
+        return float(m.group(1))
+    try:
+        if "expires" in headers:
+            return max(0.0, parsedate_to_datetime(headers["expires"]).timestamp() - now)
+        if "last-modified" in headers:
+            # heuristic freshness (RFC 9111 4.2.2): 10% of the age, at most a day
+            age = now - parsedate_to_datetime(headers["last-modified"]).timestamp()
+            return min(max(0.0, age * 0.1), 86400.0)
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+
+class AssetCache:
+    """
+    Size-bounded LRU cache of static responses on disk, shared by every
+    Playwright context through the route handler. Entries are keyed by URL and
+    stored with their validators (ETag / Last-Modified): fresh entries are
+    served without touching the network, stale ones are revalidated with a
+    conditional request and served from disk on 304.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        if enabled:
+            self._load_index()
+
+    @classmethod
+    def from_env(cls) -> "AssetCache":
+        return cls(os.path.join(CACHE_DIR, "assets"),
+                   max_bytes=int(float(os.environ.get("ASSET_CACHE_MB", "256")) * 1024 * 1024),
+                   enabled=os.environ.get("ASSET_CACHE", "1") != "0")
+
+    # -- disk index ----------------------------------------------------
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".json", base + ".body"
+
+    def _load_index(self) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            names = [n[:-5] for n in os.listdir(self.directory) if n.endswith(".body")]
+        except OSError as e:
+            logger.warning("[AssetCache] disabled, cannot use %s: %s", self.directory, e)
+            self.enabled = False
+            return
+        entries = []
+        for key in names:
+            meta_path, body_path = self._paths(key)
+            try:
+                st = os.stat(body_path)
+                if os.path.exists(meta_path):
+                    entries.append((st.st_mtime, key, st.st_size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+        logger.info("[AssetCache] %d entries (%.1f MB) in %s", len(self._index), self._size / 1048576, self.directory)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        key = self.key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            self._forget(key)
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, body
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, ttl: float) -> None:
+        if len(body) > self.max_bytes // 8:
+            return  # one huge asset must not flush the whole cache
+        key = self.key(url)
+        meta_path, body_path = self._paths(key)
+        meta = {"url": url, "status": status, "headers": headers, "expires_at": time.time() + ttl}
+        try:
+            with open(body_path + ".tmp", "wb") as f:
+                f.write(body)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(body_path + ".tmp", body_path)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError as e:
+            logger.debug("[AssetCache] could not store %s: %s", url, e)
+            return
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+            self._index[key] = len(body)
+            self._size += len(body)
+            self.stored += 1
+            self._evict()
+
+    def refresh(self, url: str, meta: Dict[str, Any], ttl: float) -> None:
+        meta["expires_at"] = time.time() + ttl
+        meta_path, _ = self._paths(self.key(url))
+        try:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+
+    # -- Playwright ----------------------------------------------------
+    async def _serve(self, route, meta: Dict[str, Any], body: bytes) -> None:
+        self.bytes_served += len(body)
+        await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+
+    async def handle(self, route, request) -> None:
+        """Answer `request` from the cache when possible, otherwise fetch it and keep a copy."""
+        if not self.enabled or request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+            await route.continue_()
+            return
+        url = request.url
+        cached = await asyncio.to_thread(self.get, url)
+        if cached is not None and cached[0]["expires_at"] > time.time():
+            self.hits += 1
+            await self._serve(route, *cached)
+            return
+
+        headers = dict(request.headers)
+        if cached is not None:
+            validators = cached[0]["headers"]
+            if "etag" in validators:
+                headers["if-none-match"] = validators["etag"]
+            if "last-modified" in validators:
+                headers["if-modified-since"] = validators["last-modified"]
+        try:
+            response = await route.fetch(headers=headers)
+        except Exception as e:
+            logger.debug("[AssetCache] fetch failed for %s: %s", url, e)
+            await route.continue_()
+            return
+
+        now = time.time()
+        if response.status == 304 and cached is not None:
+            self.revalidated += 1
+            ttl = _freshness({k.lower(): v for k, v in response.headers.items()}, now)
+            await asyncio.to_thread(self.refresh, url, cached[0], ttl or 0.0)
+            await self._serve(route, *cached)
+            return
+
+        self.misses += 1
+        body = await response.body()
+        resp_headers = {k.lower(): v for k, v in response.headers.items()}
+        ttl = _freshness(resp_headers, now)
+        has_validators = "etag" in resp_headers or "last-modified" in resp_headers
+        if response.status == 200 and ttl is not None and (ttl > 0 or has_validators):
+            stored_headers = {k: v for k, v in resp_headers.items() if k not in _DROP_HEADERS}
+            await asyncio.to_thread(self.put, url, response.status, stored_headers, body, ttl)
+        await route.fulfill(response=response, body=body)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            entries, size = len(self._index), self._size
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "size_mb": round(size / 1048576, 1),
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else None,
+            "stored": self.stored,
+            "evictions": self.evictions,
+            "mb_served": round(self.bytes_served / 1048576, 1),
+        }
+
+
+_cache: Optional[AssetCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache() -> AssetCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AssetCache.from_env()
+        return _cache
+
+
+# --- Selenium: Chrome's own disk cache, kept between driver restarts ---
+CHROME_CACHE_DIR = os.path.join(CACHE_DIR, "chrome-cache")
+CHROME_CACHE_BYTES = int(float(os.environ.get("CHROME_DISK_CACHE_MB", "128")) * 1024 * 1024)
+
+
+def chrome_cache_args(site: str, slot: int) -> list:
+    """
+    Chrome flags for a persistent, size-bounded disk cache. Two live Chromes
+    must never share a cache directory, so each (site, slot) gets its own.
+    """
+    if os.environ.get("ASSET_CACHE", "1") == "0":
+        return []
+    return [f"--disk-cache-dir={os.path.join(CHROME_CACHE_DIR, f'{site}-{slot}')}",
+            f"--disk-cache-size={CHROME_CACHE_BYTES}"]
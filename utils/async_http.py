@@ -0,0 +1,220 @@
+# utils/async_http.py
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from utils.http import get_random_headers, looks_blocked
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class HttpStatusError(Exception):
+    pass
+
+
+class HttpResult:
+    """A fully read response (the body was streamed under the size cap)."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, encoding: str):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+def _retry_after(response: HttpResult) -> float:
+    try:
+        return float(response.headers.get("retry-after", "0"))
+    except ValueError:
+        return 0.0  # HTTP-date form: fall back to our own backoff
+
+
+class AsyncHttpClient:
+    """
+    Shared async HTTP client for the scrapers: keep-alive connection pools per
+    host (HTTP/2 when available), a precomputed user-agent rotation, per-host
+    pacing, retries with jittered exponential backoff and a cap on body size.
+    Results pages (fetch_results_html) skip the pacing and retries and get
+    their own short deadline, so a slow site still leaves the per-attempt
+    timeout to the browser fallback. Safe to await straight from the request
+    handlers' tasks.
+    """
+
+    def __init__(self, timeout: float = 8.0, max_connections: int = 50, max_keepalive: int = 20,
+                 max_bytes: int = 5 * 1024 * 1024, retries: int = 2, backoff: float = 0.5,
+                 min_host_interval: float = 1.0, results_timeout: float = 4.0):
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.min_host_interval = min_host_interval
+        self.results_timeout = results_timeout
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 4.0)),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=60.0),
+            follow_redirects=True,
+        )
+        self._next_slot: Dict[str, float] = {}
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.bytes_received = 0
+
+    @classmethod
+    def from_env(cls) -> "AsyncHttpClient":
+        return cls(timeout=float(os.environ.get("HTTP_TIMEOUT", "8")),
+                   max_bytes=int(float(os.environ.get("HTTP_MAX_RESPONSE_MB", "5")) * 1024 * 1024),
+                   retries=int(os.environ.get("HTTP_RETRIES", "2")),
+                   min_host_interval=float(os.environ.get("HTTP_MIN_HOST_INTERVAL", "1.0")),
+                   results_timeout=float(os.environ.get("HTTP_RESULTS_TIMEOUT", "4")))
+
+    async def _pace(self, url: str) -> None:
+        # reserve the next slot for this host synchronously, then sleep outside any lock
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.min_host_interval
+        if slot > now:
+            try:
+                await asyncio.sleep(slot - now)
+            except asyncio.CancelledError:
+                # give the slot back if nobody booked after us, so cancelled waiters don't pile up a backlog
+                if self._next_slot.get(host) == slot + self.min_host_interval:
+                    self._next_slot[host] = slot
+                raise
+
+    async def _get_once(self, url: str, headers: Dict[str, str], pace: bool = True) -> HttpResult:
+        if pace:
+            await self._pace(url)
+        self.requests += 1
+        async with self._client.stream("GET", url, headers=headers) as response:
+            declared = int(response.headers.get("content-length") or 0)
+            if declared > self.max_bytes:
+                raise ResponseTooLarge(f"{url}: {declared} bytes")
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ResponseTooLarge(f"{url}: over {self.max_bytes} bytes")
+                chunks.append(chunk)
+            self.bytes_received += size
+            return HttpResult(str(response.url), response.status_code, dict(response.headers),
+                              b"".join(chunks), response.charset_encoding or "utf-8")
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, retries: Optional[int] = None,
+                  pace: bool = True) -> HttpResult:
+        """GET with retries on transport errors, 429 and 5xx. Raises on the final failure."""
+        headers = {**get_random_headers(), **(headers or {})}
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                response = await self._get_once(url, headers, pace)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                delay = _retry_after(response) if response.status_code == 429 else 0.0
+            except ResponseTooLarge:
+                self.failures += 1
+                raise
+            except httpx.TransportError:
+                if attempt == retries:
+                    self.failures += 1
+                    raise
+                delay = 0.0
+            self.retried += 1
+            delay = min(max(delay, self.backoff * (2 ** attempt)), 10.0) * random.uniform(0.5, 1.5)
+            logger.info("[AsyncHttp] retrying %s in %.2fs (attempt %d)", url, delay, attempt + 1)
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def get_text(self, url: str) -> str:
+        response = await self.get(url)
+        if response.status_code >= 400:
+            raise HttpStatusError(f"{url} returned {response.status_code}")
+        return response.text
+
+    async def fetch_results_html(self, url: str, card_selector: str,
+                                 has_data: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        One search-results page over plain HTTP. Returns the HTML only if it is
+        server-rendered with at least one result card (or `has_data(html)` finds
+        the results embedded as JSON); None means "use a browser". One
+        unpaced try within `results_timeout`: this is the hot path of every
+        query, and the browser still needs the rest of the site's timeout.
+        """
+        try:
+            response = await asyncio.wait_for(self.get(url, retries=0, pace=False), self.results_timeout)
+        except asyncio.TimeoutError:
+            self.failures += 1
+            logger.info("[AsyncHttp] %s: no answer within %.0fs", url, self.results_timeout)
+            return None
+        except (httpx.HTTPError, ResponseTooLarge) as e:
+            logger.info("[AsyncHttp] %s failed: %s", url, e)
+            return None
+        if response.status_code != 200:
+            logger.info("[AsyncHttp] %s returned %s", url, response.status_code)
+            return None
+        html = response.text
+        if looks_blocked(html):
+            logger.info("[AsyncHttp] %s looks like a bot wall", url)
+            return None
+        has_cards = await asyncio.to_thread(
+            lambda: BeautifulSoup(html, "html.parser").select_one(card_selector) is not None
+            or (has_data is not None and has_data(html)))
+        if not has_cards:
+            logger.info("[AsyncHttp] %s has no result cards (client-rendered)", url)
+            return None
+        return html
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+            "mb_received": round(self.bytes_received / 1048576, 1),
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# One client (and connection pool) per process, created on first use inside the event loop
+_client: Optional[AsyncHttpClient] = None
+
+
+def get_async_http() -> AsyncHttpClient:
+    global _client
+    if _client is None:
+        _client = AsyncHttpClient.from_env()
+    return _client
+
+
+async def close_async_http() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,148 @@
+# utils/blocking.py
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from utils.asset_cache import get_asset_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOURCE_TYPES = ("image", "media", "font")
+
+# Substrings of tracker/beacon URLs (first- or third-party). Never matched against
+# documents: a search for "pixel 8" must still load its results page (see cdp_patterns
+# for how the Selenium side keeps that promise).
+DEFAULT_URL_PATTERNS = ("tracking", "analytics", "adsystem", "beacon")
+
+# Ad/analytics hosts none of the sites need to render search results
+DEFAULT_THIRD_PARTY_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "facebook.net", "facebook.com",
+    "hotjar.com", "criteo.com", "criteo.net", "taboola.com", "bing.com", "clarity.ms",
+)
+
+# Selenium can't filter by resource type, only by URL: block these by extension instead
+_TYPE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"),
+    "media": ("mp4", "webm", "m3u8", "mp3"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+}
+
+# Rough transfer sizes, to estimate what the blocked requests would have cost
+_EST_BYTES = {
+    "image": 40_000, "media": 500_000, "font": 45_000, "stylesheet": 30_000,
+    "script": 60_000, "xhr": 5_000, "fetch": 5_000,
+}
+
+
+class BlockPolicy:
+    """
+    What a site's pages are not allowed to download: resource types, URL
+    substrings and third-party domains. The same policy is applied to
+    Playwright pages through a route handler and to Selenium drivers through
+    CDP Network.setBlockedURLs.
+    """
+
+    def __init__(self, site: str,
+                 resource_types: Iterable[str] = DEFAULT_RESOURCE_TYPES,
+                 url_patterns: Iterable[str] = DEFAULT_URL_PATTERNS,
+                 third_party_domains: Iterable[str] = DEFAULT_THIRD_PARTY_DOMAINS,
+                 enabled: bool = True):
+        self.site = site
+        self.resource_types = frozenset(resource_types)
+        self.url_patterns = tuple(p.lower() for p in url_patterns)
+        self.third_party_domains = tuple(d.lower() for d in third_party_domains)
+        self.enabled = enabled
+
+    @classmethod
+    def for_site(cls, site: str, extra_types: Iterable[str] = (),
+                 extra_patterns: Iterable[str] = (), extra_domains: Iterable[str] = ()) -> "BlockPolicy":
+        """
+        The default policy plus the site's own additions. BLOCK_RESOURCES=0 turns
+        blocking off everywhere; BLOCK_<SITE>_TYPES replaces the site's type list.
+        """
+        types = set(DEFAULT_RESOURCE_TYPES) | set(extra_types)
+        env_types = os.environ.get(f"BLOCK_{site.upper()}_TYPES")
+        if env_types is not None:
+            types = {t.strip() for t in env_types.split(",") if t.strip()}
+        return cls(site,
+                   resource_types=types,
+                   url_patterns=DEFAULT_URL_PATTERNS + tuple(extra_patterns),
+                   third_party_domains=DEFAULT_THIRD_PARTY_DOMAINS + tuple(extra_domains),
+                   enabled=os.environ.get("BLOCK_RESOURCES", "1") != "0")
+
+    def reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Why this request is blocked ("type", "domain", "pattern"), or None to let it through."""
+        if not self.enabled or resource_type == "document":
+            return None
+        if resource_type in self.resource_types:
+            return "type"
+        lowered = url.lower()
+        host = urlparse(lowered).hostname or ""
+        if any(host == d or host.endswith("." + d) for d in self.third_party_domains):
+            return "domain"
+        if any(p in lowered for p in self.url_patterns):
+            return "pattern"
+        return None
+
+    async def handle_route(self, route, request) -> None:
+        """Playwright route handler: pass as `route=` / to context.route("**/*", ...)."""
+        reason = self.reason(request.resource_type, request.url)
+        _record(self.site, request.resource_type, reason)
+        if reason:
+            await route.abort()
+        else:
+            # routing turns off the browser's HTTP cache, so static assets go through ours
+            await get_asset_cache().handle(route, request)
+
+    def cdp_patterns(self) -> list:
+        """
+        The policy as Network.setBlockedURLs globs. CDP applies them to the
+        top-level navigation too and can't exempt documents, so none may match
+        a search URL: extensions only at the end of the URL or before "?",
+        domains only as the host, and URL patterns only in the host or before
+        a later "/", "?" or ".js" (search terms are percent-encoded at the end).
+        """
+        patterns = []
+        for t in sorted(self.resource_types):
+            for ext in _TYPE_EXTENSIONS.get(t, ()):
+                patterns += [f"*.{ext}", f"*.{ext}?*"]
+        for d in self.third_party_domains:
+            patterns += [f"*://{d}/*", f"*://*.{d}/*"]
+        for p in self.url_patterns:
+            patterns += [f"*://*{p}*/*", f"*/{p}?*", f"*/{p}.js*"]
+        return patterns
+
+    def apply_cdp(self, driver) -> None:
+        """Install the policy on a Chrome driver (best-effort: blocking is an optimisation)."""
+        if not self.enabled:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.cdp_patterns()})
+        except Exception as e:
+            logger.warning("[Blocking] CDP blocking unavailable for %s: %s", self.site, e)
+
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, object]] = {}
+
+
+def _record(site: str, resource_type: str, reason: Optional[str]) -> None:
+    with _lock:
+        entry = _stats.setdefault(site, {"allowed": 0, "blocked": 0, "est_bytes_blocked": 0, "by_reason": {}})
+        if reason is None:
+            entry["allowed"] += 1
+            return
+        entry["blocked"] += 1
+        entry["est_bytes_blocked"] += _EST_BYTES.get(resource_type, 10_000)
+        entry["by_reason"][reason] = entry["by_reason"].get(reason, 0) + 1
+
+
+def blocking_stats() -> Dict[str, Dict[str, object]]:
+    """Per site: requests let through, requests blocked (by reason) and the estimated bytes saved."""
+    with _lock:
+        return {site: {**e, "by_reason": dict(e["by_reason"])} for site, e in _stats.items()}
@@ -0,0 +1,218 @@
+# utils/browser_health.py
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthThresholds:
+    """When a browser is due for recycling. All limits are per browser process tree."""
+
+    def __init__(self, max_pages: int = 500, max_rss_mb: float = 1500.0,
+                 max_error_streak: int = 5, check_interval: float = 30.0):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_error_streak = max_error_streak
+        self.check_interval = check_interval
+
+    @classmethod
+    def from_env(cls) -> "HealthThresholds":
+        return cls(
+            max_pages=int(os.environ.get("BROWSER_MAX_PAGES", "500")),
+            max_rss_mb=float(os.environ.get("BROWSER_MAX_RSS_MB", "1500")),
+            max_error_streak=int(os.environ.get("BROWSER_MAX_ERROR_STREAK", "5")),
+            check_interval=float(os.environ.get("BROWSER_CHECK_INTERVAL", "30")),
+        )
+
+
+# Playwright error messages that mean the browser itself (or its connection) went away,
+# as opposed to a retailer page timing out or a scraper finding nothing
+BROWSER_FAULT_MARKERS = (
+    "target page, context or browser has been closed", "target closed", "browser has been closed",
+    "browser has disconnected", "context has been closed", "page crashed", "connection closed",
+)
+
+
+def is_browser_fault(exc: Optional[BaseException]) -> bool:
+    """Whether `exc` is a browser/transport failure that should count against the browser's health."""
+    if exc is None or not isinstance(exc, Exception):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in BROWSER_FAULT_MARKERS)
+
+
+class BrowserHealth:
+    """Counters for one browser; reset every time the browser is relaunched."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pages_served = 0
+        self.error_streak = 0
+        self.total_errors = 0
+        self.started_at = time.time()
+        self.recycles = 0
+        self.crashes = 0
+        self.last_recycle_reason: Optional[str] = None
+        self.last_rss_mb: Optional[float] = None
+
+    def record(self, ok: bool) -> None:
+        self.pages_served += 1
+        if ok:
+            self.error_streak = 0
+        else:
+            self.error_streak += 1
+            self.total_errors += 1
+
+    def relaunched(self, reason: str) -> None:
+        self.pages_served = 0
+        self.error_streak = 0
+        self.started_at = time.time()
+        self.last_recycle_reason = reason
+        if reason == "crash":
+            self.crashes += 1
+        else:
+            self.recycles += 1
+
+    def recycle_reason(self, thresholds: HealthThresholds, rss_mb: Optional[float] = None) -> Optional[str]:
+        if rss_mb is not None:
+            self.last_rss_mb = rss_mb
+        if thresholds.max_pages and self.pages_served >= thresholds.max_pages:
+            return "pages"
+        if thresholds.max_error_streak and self.error_streak >= thresholds.max_error_streak:
+            return "errors"
+        if rss_mb is not None and thresholds.max_rss_mb and rss_mb >= thresholds.max_rss_mb:
+            return "rss"
+        return None
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "pages_served": self.pages_served,
+            "error_streak": self.error_streak,
+            "total_errors": self.total_errors,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "rss_mb": self.last_rss_mb,
+            "recycles": self.recycles,
+            "crashes": self.crashes,
+            "last_recycle_reason": self.last_recycle_reason,
+        }
+
+
+# --- process RSS via /proc (Linux only; None elsewhere) ---
+def _children_map() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # the command name may contain spaces, so split after its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def process_tree_rss_mb(root_pid: Optional[int]) -> Optional[float]:
+    """Resident memory of `root_pid` and all its descendants, in MB."""
+    if not root_pid or not os.path.isdir("/proc"):
+        return None
+    children = _children_map()
+    total, stack, seen = 0, [root_pid], set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += _rss_kb(pid)
+        stack.extend(children.get(pid, []))
+    return round(total / 1024.0, 1)
+
+
+def find_child_pid(cmdline_marker: str, parent_pid: Optional[int] = None) -> Optional[int]:
+    """First direct child of `parent_pid` (default: this process) whose command line contains the marker."""
+    if not os.path.isdir("/proc"):
+        return None
+    parent_pid = parent_pid or os.getpid()
+    for pid in _children_map().get(parent_pid, []):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if cmdline_marker.encode() in f.read():
+                    return pid
+        except OSError:
+            continue
+    return None
+
+
+class BrowserSupervisor:
+    """
+    Background loop that samples every watched browser and recycles the ones that
+    crossed a threshold. Recycling itself is owned by the browser's manager, which
+    relaunches first and retires the old process once its in-flight work is done.
+    """
+
+    def __init__(self, thresholds: Optional[HealthThresholds] = None):
+        self.thresholds = thresholds or HealthThresholds.from_env()
+        self._browsers: Dict[str, tuple] = {}
+        self._sweeps: Dict[str, Callable[[HealthThresholds], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(self, name: str, health: BrowserHealth,
+              rss_probe: Callable[[], Optional[float]],
+              recycle: Callable[[str], Awaitable[None]]) -> None:
+        self._browsers[name] = (health, rss_probe, recycle)
+
+    def add_sweep(self, name: str, sweep: Callable[[HealthThresholds], None]) -> None:
+        """A blocking health pass (e.g. the Selenium pool's), run in a worker thread each tick."""
+        self._sweeps[name] = sweep
+
+    async def check_once(self) -> None:
+        for name, (health, rss_probe, recycle) in list(self._browsers.items()):
+            try:
+                rss = await asyncio.to_thread(rss_probe)
+                reason = health.recycle_reason(self.thresholds, rss)
+                if reason:
+                    logger.info("[BrowserSupervisor] recycling %s (reason=%s, rss=%s MB)", name, reason, rss)
+                    await recycle(reason)
+            except Exception:
+                logger.exception("[BrowserSupervisor] health check failed for %s", name)
+        for name, sweep in list(self._sweeps.items()):
+            try:
+                await asyncio.to_thread(sweep, self.thresholds)
+            except Exception:
+                logger.exception("[BrowserSupervisor] sweep failed for %s", name)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.thresholds.check_interval)
+            await self.check_once()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, object]:
+        return {name: health.snapshot() for name, (health, _, _) in self._browsers.items()}
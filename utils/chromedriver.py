@@ -0,0 +1,136 @@
+# utils/chromedriver.py
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Optional
+
+from selenium.webdriver.chrome.service import Service
+
+from utils.paths import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = os.path.join(CACHE_DIR, "chromedriver.json")
+
+DEFAULT_CHROME_BINS = [
+    "/usr/bin/chromium",
+    "/usr/bin/chromium-browser",
+    "/usr/bin/google-chrome-stable",
+    "/usr/bin/google-chrome",
+]
+DEFAULT_DRIVER_PATHS = ["/usr/local/bin/chromedriver", "/usr/bin/chromedriver"]
+
+
+class ChromeDriverNotFound(RuntimeError):
+    pass
+
+
+_lock = threading.Lock()
+_resolved_path: Optional[str] = None
+
+
+def _is_executable(path: Optional[str]) -> bool:
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def chrome_binary() -> Optional[str]:
+    """CHROME_BIN if set, else the first Chrome/Chromium found in the usual places (None lets Selenium decide)."""
+    env_bin = os.environ.get("CHROME_BIN")
+    if env_bin:
+        return env_bin
+    for candidate in DEFAULT_CHROME_BINS:
+        if _is_executable(candidate):
+            return candidate
+    return None
+
+
+def _chrome_fingerprint() -> dict:
+    # A Chrome upgrade changes the binary's mtime; a cached driver for the old major would then fail to start.
+    chrome_bin = chrome_binary()
+    try:
+        mtime = os.path.getmtime(chrome_bin) if chrome_bin else None
+    except OSError:
+        mtime = None
+    return {"chrome_bin": chrome_bin, "chrome_mtime": mtime}
+
+
+def _read_cache() -> Optional[str]:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    path = data.get("driver_path")
+    if not _is_executable(path):
+        return None
+    if {k: data.get(k) for k in ("chrome_bin", "chrome_mtime")} != _chrome_fingerprint():
+        logger.info("[chromedriver] Chrome binary changed since %s was cached; re-resolving", path)
+        return None
+    return path
+
+
+def _write_cache(path: str, source: str) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = CACHE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"driver_path": path, "source": source, **_chrome_fingerprint()}, f)
+        os.replace(tmp, CACHE_FILE)
+    except OSError as e:
+        logger.warning("[chromedriver] could not write cache %s: %s", CACHE_FILE, e)
+
+
+def _resolve() -> str:
+    env_path = os.environ.get("CHROMEDRIVER_PATH")
+    if env_path:
+        if _is_executable(env_path):
+            return env_path
+        logger.warning("[chromedriver] CHROMEDRIVER_PATH=%s is not an executable file; ignoring", env_path)
+
+    cached = _read_cache()
+    if cached:
+        logger.info("[chromedriver] using cached driver %s", cached)
+        return cached
+
+    for candidate in DEFAULT_DRIVER_PATHS + [shutil.which("chromedriver")]:
+        if _is_executable(candidate):
+            _write_cache(candidate, "system")
+            return candidate
+
+    # last resort: webdriver_manager (version lookup + possible download, so done once and cached)
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        raise ChromeDriverNotFound(
+            "no chromedriver found: set CHROMEDRIVER_PATH, install chromedriver on PATH "
+            f"or allow webdriver_manager to download it ({e})"
+        ) from e
+    _write_cache(path, "webdriver_manager")
+    return path
+
+
+def resolve_chromedriver(refresh: bool = False) -> str:
+    """Resolve the chromedriver binary once per process (and once per host via the on-disk cache)."""
+    global _resolved_path
+    with _lock:
+        if _resolved_path is None or refresh or not _is_executable(_resolved_path):
+            _resolved_path = _resolve()
+            logger.info("[chromedriver] resolved %s", _resolved_path)
+        return _resolved_path
+
+
+def chrome_service() -> Service:
+    """A fresh Service for the resolved driver (a Service owns one driver process, so it is not shared)."""
+    return Service(resolve_chromedriver())
+
+
+def ensure_chromedriver() -> str:
+    """Startup check: resolve the driver now and fail fast if there is none."""
+    try:
+        return resolve_chromedriver()
+    except ChromeDriverNotFound:
+        logger.critical("[chromedriver] no usable chromedriver; Selenium scrapers cannot run")
+        raise
@@ -0,0 +1,163 @@
+# utils/circuit_breaker.py
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, site: str, retry_in: float):
+        super().__init__(f"{site} is unavailable (circuit open, next probe in {retry_in:.0f}s)")
+        self.site = site
+        self.retry_in = retry_in
+
+    def result(self) -> Dict[str, Any]:
+        return {"error": "site_unavailable", "circuit": OPEN, "retry_in": round(self.retry_in, 1)}
+
+
+class CircuitBreaker:
+    """
+    Per-site breaker over scraper attempts. Closed: attempts run and their
+    outcomes fill a window of the last `window`; once `min_calls` are in it
+    and the failure rate reaches `threshold` the breaker opens. Open: calls
+    fail fast until the next probe is due. Half-open: up to `probes` calls go
+    through; a success closes the breaker, a failure reopens it with the open
+    period doubled (plus jitter, up to `max_open`).
+    """
+
+    def __init__(self, site: str, window: int = 20, min_calls: int = 5, threshold: float = 0.5,
+                 open_for: float = 60.0, max_open: float = 900.0, probes: int = 1):
+        self.site = site
+        self.min_calls = min_calls
+        self.threshold = threshold
+        self.base_open_for = open_for
+        self.max_open = max_open
+        self.probes = probes
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._open_for = open_for
+        self._probe_at = 0.0
+        self._probing = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._probing = 0
+        self._probe_at = now + self._open_for * random.uniform(0.9, 1.1)
+        self.opened += 1
+        logger.warning("[CircuitBreaker] %s open, next probe in %.0fs", self.site, self._probe_at - now)
+
+    def retry_in(self) -> float:
+        return max(0.0, self._probe_at - time.monotonic()) if self.state == OPEN else 0.0
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (does not take a probe slot)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() >= self._probe_at
+            return self._probing < self.probes
+
+    def allow(self) -> bool:
+        """Admit a call; in half-open this takes one of the probe slots."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self._probe_at:
+                self.state = HALF_OPEN
+                logger.info("[CircuitBreaker] %s half-open, probing", self.site)
+            if self.state == HALF_OPEN:
+                if self._probing >= self.probes:
+                    self.rejected += 1
+                    return False
+                self._probing += 1
+                return True
+            if self.state == OPEN:
+                self.rejected += 1
+                return False
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                self._probing = max(0, self._probing - 1)
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._open_for = self.base_open_for
+                    logger.info("[CircuitBreaker] %s closed after a successful probe", self.site)
+                else:
+                    self._open_for = min(self.max_open, self._open_for * 2)
+                    self._open(now)
+                return
+            if self.state == OPEN:
+                return  # a call admitted before the breaker opened
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.threshold:
+                self._outcomes.clear()
+                self._open(now)
+
+    def abandon(self) -> None:
+        """An admitted call was cancelled before it had an outcome: give its probe slot back."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = max(0, self._probing - 1)
+
+    def unavailable(self) -> Dict[str, Any]:
+        return CircuitOpenError(self.site, self.retry_in()).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "failure_rate": round(outcomes.count(False) / len(outcomes), 2) if outcomes else None,
+            "calls": len(outcomes),
+            "retry_in": round(self.retry_in(), 1),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per site, created on first use with the shared settings."""
+
+    def __init__(self, enabled: bool = True, **settings: Any):
+        self.enabled = enabled
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakers":
+        return cls(enabled=os.environ.get("CIRCUIT_BREAKER", "1") != "0",
+                   window=int(os.environ.get("CIRCUIT_BREAKER_WINDOW", "20")),
+                   min_calls=int(os.environ.get("CIRCUIT_BREAKER_MIN_CALLS", "5")),
+                   threshold=float(os.environ.get("CIRCUIT_BREAKER_THRESHOLD", "0.5")),
+                   open_for=float(os.environ.get("CIRCUIT_BREAKER_OPEN_FOR", "60")),
+                   max_open=float(os.environ.get("CIRCUIT_BREAKER_MAX_OPEN", "900")),
+                   probes=int(os.environ.get("CIRCUIT_BREAKER_PROBES", "1")))
+
+    def get(self, site: str) -> Optional[CircuitBreaker]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(site)
+            if breaker is None:
+                breaker = self._breakers[site] = CircuitBreaker(site, **self.settings)
+            return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {"enabled": self.enabled, "sites": {site: b.stats() for site, b in sorted(breakers.items())}}
@@ -0,0 +1,378 @@
+# utils/driver_pool.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+from utils.asset_cache import chrome_cache_args
+from utils.blocking import BlockPolicy
+from utils.browser_health import HealthThresholds, process_tree_rss_mb
+from utils.chromedriver import chrome_binary, chrome_service
+from utils.latency import slot_acquired
+
+logger = logging.getLogger(__name__)
+
+OptionsFactory = Callable[[], webdriver.ChromeOptions]
+ServiceFactory = Callable[[], Service]
+DriverHook = Callable[[webdriver.Chrome], None]
+
+
+class _SiteConfig:
+    def __init__(self, options_factory: OptionsFactory,
+                 service_factory: Optional[ServiceFactory] = None,
+                 on_create: Optional[DriverHook] = None,
+                 blocking: Optional[BlockPolicy] = None):
+        self.options_factory = options_factory
+        self.service_factory = service_factory
+        self.on_create = on_create
+        self.blocking = blocking
+
+
+# Per-site driver recipes, registered by the scraper modules at import time
+_SITES: Dict[str, _SiteConfig] = {}
+
+
+def register_site(site: str, options_factory: OptionsFactory,
+                  service_factory: Optional[ServiceFactory] = None,
+                  on_create: Optional[DriverHook] = None,
+                  blocking: Optional[BlockPolicy] = None) -> None:
+    """Declare how to build a Chrome driver for `site` (options, service, post-start hook, blocking policy)."""
+    _SITES[site] = _SiteConfig(options_factory, service_factory, on_create, blocking)
+
+
+class PooledDriver:
+    """A Chrome driver owned by the pool, bound to the site it was built for."""
+
+    def __init__(self, driver: webdriver.Chrome, site: str, cache_slot: int = 0):
+        self.driver = driver
+        self.site = site
+        self.cache_slot = cache_slot
+        self.uses = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class SeleniumDriverPool:
+    """
+    Bounded pool of Chrome drivers shared by the Selenium scrapers.
+
+    Drivers are kept warm per site (each site registers its own ChromeOptions),
+    checked out for exactly one scrape at a time and reset before they go back
+    to the idle list. When the pool is full and the requesting site has no idle
+    driver, the least recently used idle driver of another site is replaced.
+    """
+
+    def __init__(self, size: int = 4, checkout_timeout: float = 60.0,
+                 thresholds: Optional[HealthThresholds] = None):
+        self.size = max(1, int(size))
+        self.checkout_timeout = checkout_timeout
+        self.thresholds = thresholds or HealthThresholds.from_env()
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[PooledDriver]] = {}
+        self._live = 0
+        self._closed = False
+        self._cache_slots: Dict[str, set] = {}
+        self.recycled = 0
+        self.crashed = 0
+
+    # -- configuration -------------------------------------------------
+    def resize(self, size: int) -> None:
+        with self._cond:
+            self.size = max(1, int(size))
+            self._cond.notify_all()
+        logger.info("[DriverPool] resized to %d", self.size)
+
+    # -- driver lifecycle ----------------------------------------------
+    def _create(self, site: str) -> PooledDriver:
+        cfg = _SITES.get(site)
+        if cfg is None:
+            raise KeyError(f"site {site!r} is not registered with the driver pool")
+        service = cfg.service_factory() if cfg.service_factory else chrome_service()
+        options = cfg.options_factory()
+        if not getattr(options, "binary_location", None):
+            chrome_bin = chrome_binary()
+            if chrome_bin:
+                options.binary_location = chrome_bin
+        slot = self._claim_cache_slot(site)
+        for arg in chrome_cache_args(site, slot):
+            options.add_argument(arg)
+        start = time.time()
+        try:
+            driver = webdriver.Chrome(service=service, options=options)
+        except Exception:
+            self._release_cache_slot(site, slot)
+            raise
+        if cfg.blocking:
+            cfg.blocking.apply_cdp(driver)
+        if cfg.on_create:
+            try:
+                cfg.on_create(driver)
+            except Exception:
+                logger.exception("[DriverPool] on_create hook failed for %s", site)
+        logger.info("[DriverPool] started Chrome for %s in %.2fs", site, time.time() - start)
+        return PooledDriver(driver, site, slot)
+
+    def _claim_cache_slot(self, site: str) -> int:
+        # a live Chrome owns its disk cache dir; successors reuse a freed (warm) one
+        with self._cond:
+            used = self._cache_slots.setdefault(site, set())
+            slot = next(i for i in range(len(used) + 1) if i not in used)
+            used.add(slot)
+            return slot
+
+    def _release_cache_slot(self, site: str, slot: int) -> None:
+        with self._cond:
+            self._cache_slots.get(site, set()).discard(slot)
+
+    def _quit(self, pooled: PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        self._release_cache_slot(pooled.site, pooled.cache_slot)
+
+    def _reset(self, pooled: PooledDriver) -> bool:
+        """Bring a used driver back to a neutral state. Returns False if it is unusable."""
+        driver = pooled.driver
+        try:
+            handles = driver.window_handles
+            for extra in handles[1:]:
+                driver.switch_to.window(extra)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning("[DriverPool] reset failed for %s driver, discarding: %s", pooled.site, e)
+            return False
+
+    def _take_slot(self, site: str, deadline: float):
+        """
+        Reserve a driver for `site` under the lock. Returns (pooled, evicted):
+        pooled is an idle driver or None when the caller must create one,
+        evicted is an idle driver of another site that must be quit.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("driver pool is shut down")
+                idle = self._idle.get(site)
+                if idle:
+                    return idle.pop(), None
+                if self._live < self.size:
+                    self._live += 1
+                    return None, None
+                victim = self._pick_victim()
+                if victim is not None:
+                    return None, victim
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"no Chrome driver available for {site} within {self.checkout_timeout}s")
+                self._cond.wait(remaining)
+
+    def _pick_victim(self) -> Optional[PooledDriver]:
+        oldest: Optional[PooledDriver] = None
+        for drivers in self._idle.values():
+            for d in drivers:
+                if oldest is None or d.last_used < oldest.last_used:
+                    oldest = d
+        if oldest is not None:
+            self._idle[oldest.site].remove(oldest)
+        return oldest
+
+    def _give_back_slot(self) -> None:
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+
+    def _acquire(self, site: str, timeout: Optional[float]) -> PooledDriver:
+        deadline = time.time() + (timeout if timeout is not None else self.checkout_timeout)
+        pooled, victim = self._take_slot(site, deadline)
+        if pooled is not None:
+            return pooled
+        if victim is not None:
+            logger.info("[DriverPool] replacing idle %s driver with one for %s", victim.site, site)
+            self._quit(victim)
+        try:
+            return self._create(site)
+        except Exception:
+            self._give_back_slot()
+            raise
+
+    def _release(self, pooled: PooledDriver) -> None:
+        pooled.uses += 1
+        pooled.last_used = time.time()
+        if self._closed:
+            self._quit(pooled)
+            self._give_back_slot()
+            return
+        if self.thresholds.max_pages and pooled.uses >= self.thresholds.max_pages:
+            logger.info("[DriverPool] recycling %s driver after %d uses", pooled.site, pooled.uses)
+            self.recycled += 1
+            self._replace(pooled)
+            return
+        if not self._reset(pooled):
+            self.crashed += 1
+            self._replace(pooled)
+            return
+        with self._cond:
+            if not self._closed and self._live <= self.size:
+                self._idle.setdefault(pooled.site, []).append(pooled)
+                self._cond.notify()
+                return
+        self._quit(pooled)
+        self._give_back_slot()
+
+    def _replace(self, pooled: PooledDriver) -> None:
+        """Quit a worn-out or crashed driver and start its successor in the background."""
+        self._quit(pooled)
+        self._give_back_slot()
+        threading.Thread(target=self.prewarm, args=([pooled.site],), daemon=True,
+                         name=f"driver-pool-warm-{pooled.site}").start()
+
+    def sweep(self, thresholds: Optional[HealthThresholds] = None) -> None:
+        """Recycle idle drivers whose Chrome process tree has grown past the RSS limit."""
+        thresholds = thresholds or self.thresholds
+        if not thresholds.max_rss_mb:
+            return
+        with self._cond:
+            candidates = [d for ds in self._idle.values() for d in ds]
+        for pooled in candidates:
+            try:
+                rss = process_tree_rss_mb(pooled.driver.service.process.pid)
+            except Exception:
+                rss = None
+            if rss is None or rss < thresholds.max_rss_mb:
+                continue
+            with self._cond:
+                idle = self._idle.get(pooled.site, [])
+                if pooled not in idle:
+                    continue  # checked out meanwhile; looked at again next sweep
+                idle.remove(pooled)
+            logger.info("[DriverPool] recycling idle %s driver (rss=%.0f MB)", pooled.site, rss)
+            self.recycled += 1
+            self._replace(pooled)
+
+    @contextmanager
+    def checkout(self, site: str, timeout: Optional[float] = None):
+        """
+        Borrow a warm driver for `site`. On exit the driver is reset and returned
+        to the pool; a driver that can no longer be reset (crashed session) is discarded.
+        """
+        pooled = self._acquire(site, timeout)
+        slot_acquired()
+        try:
+            yield pooled.driver
+        finally:
+            self._release(pooled)
+
+    def prewarm(self, sites: List[str]) -> None:
+        """Start one idle driver per site while free slots remain (blocking)."""
+        for site in sites:
+            with self._cond:
+                if self._closed or self._idle.get(site) or self._live >= self.size:
+                    continue
+                self._live += 1
+            try:
+                pooled = self._create(site)
+            except Exception:
+                logger.exception("[DriverPool] prewarm failed for %s", site)
+                self._give_back_slot()
+                continue
+            with self._cond:
+                self._idle.setdefault(site, []).append(pooled)
+                self._cond.notify()
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "live": self._live,
+                "idle": {site: len(d) for site, d in self._idle.items() if d},
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+            }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            drivers = [d for ds in self._idle.values() for d in ds]
+            self._idle.clear()
+            self._live -= len(drivers)
+            self._cond.notify_all()
+        for pooled in drivers:
+            self._quit(pooled)
+        logger.info("[DriverPool] shut down (%d idle drivers closed)", len(drivers))
+
+
+# Global singleton shared by all Selenium scrapers
+_pool: Optional[SeleniumDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> SeleniumDriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = SeleniumDriverPool(size=int(os.environ.get("SELENIUM_POOL_SIZE", "4")))
+        return _pool
+
+
+def configure_driver_pool(size: int) -> SeleniumDriverPool:
+    pool = get_driver_pool()
+    pool.resize(size)
+    return pool
+
+
+def shutdown_driver_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+# Blocking Selenium fetches allowed in worker threads at once, across all scrapers
+SELENIUM_CONCURRENCY = int(os.environ.get("SELENIUM_CONCURRENCY", "4"))
+_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+
+def _selenium_slots() -> asyncio.Semaphore:
+    # one semaphore per event loop (standalone scripts may asyncio.run() more than once)
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(SELENIUM_CONCURRENCY))
+    return _slots[1]
+
+
+def selenium_saturated() -> bool:
+    """True while every Selenium slot is taken."""
+    return _slots is not None and _slots[1].locked()
+
+
+async def run_selenium_fetch(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking Selenium fetch in a worker thread, at most
+    SELENIUM_CONCURRENCY at a time. A thread can't be cancelled: if the
+    caller gives up, the slot stays taken until the thread really finishes.
+    """
+    slots = _selenium_slots()
+    await slots.acquire()
+    slot_acquired()
+    task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+
+    def _done(t: asyncio.Future) -> None:
+        slots.release()
+        if not t.cancelled():
+            t.exception()  # retrieved here in case the caller already went away
+
+    task.add_done_callback(_done)
+    return await asyncio.shield(task)
@@ -0,0 +1,135 @@
+# utils/hedging.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from utils.latency import attempt_clock
+
+logger = logging.getLogger(__name__)
+
+
+class HedgeBudget:
+    """
+    Per-process allowance for hedged scraper attempts. Every primary attempt
+    earns `ratio` of a token (capped at `burst`) and every hedge spends one,
+    so hedges stay around `ratio` of the load however slow the sites get;
+    at most `max_inflight` hedges run at once. Off with HEDGING=0.
+    """
+
+    def __init__(self, enabled: bool = True, percentile: float = 0.95, ratio: float = 0.1,
+                 burst: float = 5.0, max_inflight: int = 2):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.ratio = ratio
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._inflight = 0
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "HedgeBudget":
+        return cls(enabled=os.environ.get("HEDGING", "1") != "0",
+                   percentile=float(os.environ.get("HEDGE_PERCENTILE", "0.95")),
+                   ratio=float(os.environ.get("HEDGE_BUDGET_RATIO", "0.1")),
+                   burst=float(os.environ.get("HEDGE_BUDGET_BURST", "5")),
+                   max_inflight=int(os.environ.get("HEDGE_MAX_INFLIGHT", "2")))
+
+    def _site(self, site: str) -> Dict[str, int]:
+        return self.counts.setdefault(site, {"attempts": 0, "hedged": 0, "hedge_wins": 0, "denied": 0})
+
+    def note_attempt(self, site: str) -> None:
+        with self._lock:
+            self._site(site)["attempts"] += 1
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_acquire(self, site: str) -> bool:
+        with self._lock:
+            if self._tokens < 1 or self._inflight >= self.max_inflight:
+                self._site(site)["denied"] += 1
+                return False
+            self._tokens -= 1
+            self._inflight += 1
+            self._site(site)["hedged"] += 1
+            return True
+
+    def release(self, site: str, hedge_won: bool) -> None:
+        with self._lock:
+            self._inflight -= 1
+            if hedge_won:
+                self._site(site)["hedge_wins"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "percentile": self.percentile,
+                "tokens": round(self._tokens, 2),
+                "inflight": self._inflight,
+                "sites": {site: dict(c) for site, c in self.counts.items()},
+            }
+
+
+def _retrieve(task: asyncio.Future) -> None:
+    # a cancelled loser may still finish with an error; don't let asyncio log it as unretrieved
+    if not task.cancelled():
+        task.exception()
+
+
+async def _timed(start: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+    with attempt_clock() as clock:
+        result = await start()
+    return result, clock.elapsed()
+
+
+async def hedged(start: Callable[[], Awaitable[Any]], *, timeout: float, hedge_after: Optional[float],
+                 budget: HedgeBudget, site: str) -> Tuple[Any, float]:
+    """
+    Run `start()` with `timeout`; if it hasn't finished after `hedge_after`
+    seconds and the budget allows, run a second `start()` alongside it. The
+    first attempt to succeed wins and the other is cancelled; if one fails the
+    other is still waited for. Both share the first attempt's deadline.
+    Returns (result, seconds the winning attempt took once it had its browser
+    slot); raises asyncio.TimeoutError, or the last attempt's error.
+    """
+    deadline = time.monotonic() + timeout
+    attempts: Set[asyncio.Future] = {asyncio.ensure_future(_timed(start))}
+    budget.note_attempt(site)
+    hedge: Optional[asyncio.Future] = None
+    winner: Optional[asyncio.Future] = None
+    last_exc: Optional[BaseException] = None
+    try:
+        if budget.enabled and hedge_after is not None and hedge_after < timeout:
+            done, _ = await asyncio.wait(list(attempts), timeout=hedge_after)
+            if not done and budget.try_acquire(site):
+                logger.info("[Hedging] %s: no answer after %.1fs, starting a second attempt", site, hedge_after)
+                hedge = asyncio.ensure_future(_timed(start))
+                attempts.add(hedge)
+        while attempts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(list(attempts), timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                attempts.discard(task)
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    winner = task
+                    return task.result()
+                last_exc = task.exception()
+        if last_exc is not None and not attempts:
+            raise last_exc
+        raise asyncio.TimeoutError()
+    finally:
+        for task in attempts:
+            task.add_done_callback(_retrieve)
+            task.cancel()
+        if hedge is not None:
+            budget.release(site, hedge_won=winner is hedge)
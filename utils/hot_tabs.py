@@ -0,0 +1,162 @@
+# utils/hot_tabs.py
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils import session_state
+from utils.search_strategy import recent_hit_rate
+
+logger = logging.getLogger(__name__)
+
+WarmFn = Callable[[Any], Awaitable[None]]
+
+# A site whose direct results URL keeps working is searched without its homepage,
+# so a returned tab is just reset to about:blank instead of re-loading the homepage
+DIRECT_HIT_RATE = float(os.environ.get("HOT_TABS_DIRECT_HIT_RATE", "0.8"))
+
+
+class HotTabPool:
+    """
+    Keeps pre-navigated, popup-dismissed tabs per site on the central browser.
+
+    Each site gets one long-lived BrowserContext (its cookies and HTTP cache survive
+    between queries) holding up to `max_idle_per_site` warm pages. A request leases
+    a warm page, searches from it, and gives it back; the page is re-warmed in the
+    background so the homepage load is off the next request's critical path.
+    Sites that search by URL (`direct_only`, or a "direct" strategy that keeps
+    hitting) skip that homepage load: their tab is only reset to about:blank.
+    With `enabled=False` every lease is a cold page in a temporary context.
+    """
+
+    def __init__(self, manager, enabled: bool = True, max_idle_per_site: int = 1):
+        self._manager = manager
+        self.enabled = enabled
+        self.max_idle_per_site = max(1, max_idle_per_site)
+        self._contexts: Dict[str, Tuple[int, Any]] = {}
+        self._idle: Dict[str, List[Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._background: set = set()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.resets: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, manager) -> "HotTabPool":
+        return cls(manager,
+                   enabled=os.environ.get("HOT_TABS", "1") != "0",
+                   max_idle_per_site=int(os.environ.get("HOT_TABS_PER_SITE", "1")))
+
+    async def _site_context(self, site: str, context_options: Dict[str, Any], route):
+        generation = self._manager.generation
+        lock = self._locks.setdefault(site, asyncio.Lock())
+        async with lock:
+            entry = self._contexts.get(site)
+            if entry and entry[0] == generation:
+                return entry[1]
+            # first use, or the browser was recycled: tabs of the old context are gone with it
+            _, ctx = await self._manager.open_context(**session_state.context_options(site, context_options))
+            if route is not None:
+                await ctx.route("**/*", route)
+            self._contexts[site] = (generation, ctx)
+            self._idle[site] = []
+            return ctx
+
+    def _take_idle(self, site: str):
+        idle = self._idle.get(site, [])
+        while idle:
+            page = idle.pop()
+            if not page.is_closed():
+                return page
+        return None
+
+    @staticmethod
+    def _searches_directly(site: str, direct_only: bool) -> bool:
+        if direct_only:
+            return True
+        rate = recent_hit_rate(site, "direct")
+        return rate is not None and rate >= DIRECT_HIT_RATE
+
+    async def _rewarm(self, site: str, page, warm: WarmFn, generation: int, direct_only: bool = False) -> None:
+        try:
+            if self._searches_directly(site, direct_only):
+                # the next search navigates straight to a results URL; the form
+                # strategy, if it is ever needed, loads the homepage itself
+                await page.goto("about:blank")
+                self.resets[site] = self.resets.get(site, 0) + 1
+            else:
+                await warm(page)
+        except Exception as e:
+            logger.info("[HotTabs] re-warm failed for %s, dropping tab: %s", site, e)
+            await self._close(page)
+            return
+        entry = self._contexts.get(site)
+        idle = self._idle.setdefault(site, [])
+        if entry and entry[0] == generation and len(idle) < self.max_idle_per_site and not page.is_closed():
+            idle.append(page)
+        else:
+            await self._close(page)
+
+    async def _close(self, page) -> None:
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def lease(self, site: str, context_options: Dict[str, Any], warm: WarmFn, route=None,
+                    direct_only: bool = False):
+        """Yield a page of `site` that `warm` has already brought to the search-ready state."""
+        if not self.enabled:
+            async with self._manager.acquire_context(**session_state.context_options(site, context_options)) as ctx:
+                if route is not None:
+                    await ctx.route("**/*", route)
+                page = await ctx.new_page()
+                try:
+                    await warm(page)
+                    yield page
+                finally:
+                    await self._close(page)
+            return
+
+        async with self._manager.slot():
+            ctx = await self._site_context(site, context_options, route)
+            generation = self._manager.generation
+            page = self._take_idle(site)
+            if page is not None:
+                self.hits[site] = self.hits.get(site, 0) + 1
+            else:
+                self.misses[site] = self.misses.get(site, 0) + 1
+                page = await ctx.new_page()
+                try:
+                    await warm(page)
+                except BaseException:
+                    await self._close(page)
+                    raise
+            try:
+                yield page
+            finally:
+                task = asyncio.ensure_future(self._rewarm(site, page, warm, generation, direct_only))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "idle": {site: len(pages) for site, pages in self._idle.items()},
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "resets": dict(self.resets),
+        }
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        for _, ctx in self._contexts.values():
+            try:
+                await ctx.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        self._idle.clear()
@@ -1,32 +1,74 @@
+import os
 import requests
 import random
+import threading
 import time
 import logging
-from fake_useragent import UserAgent
+from functools import lru_cache
+from typing import List
+from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+try:
+    from fake_useragent import UserAgent
+except ImportError:  # optional: FALLBACK_UAS are used instead
+    UserAgent = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Fallback user agents in case fake_useragent breaks
 FALLBACK_UAS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)...",  # Use your own full UAs
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)...",
-    "Mozilla/5.0 (Linux; Android 11; Pixel 5)...",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 11; Pixel 5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Mobile Safari/537.36",
 ]
 
-def get_random_headers():
+# Markers of a bot wall / challenge page served instead of the site
+BLOCK_MARKERS = (
+    "captcha", "access denied", "are you a robot", "request unsuccessful",
+    "pardon our interruption", "attention required", "/cdn-cgi/challenge-platform",
+)
+
+# Politeness spacing between two requests to the same host; unrelated requests don't wait
+MIN_HOST_INTERVAL = float(os.environ.get("HTTP_MIN_HOST_INTERVAL", "1.0"))
+
+_pace_lock = threading.Lock()
+_next_slot = {}
+
+
+def _pace(url: str) -> None:
+    host = urlparse(url).netloc
+    with _pace_lock:
+        now = time.monotonic()
+        slot = max(now, _next_slot.get(host, 0.0))
+        _next_slot[host] = slot + MIN_HOST_INTERVAL
+    delay = slot - now
+    if delay > 0:
+        logger.info(f"[+] Pacing {host}: waiting {delay:.2f} seconds before request...")
+        time.sleep(delay)
+
+
+@lru_cache(maxsize=1)
+def user_agents(n: int = 20) -> List[str]:
+    """The UA rotation, sampled once per process (a UserAgent() loads its whole dataset)."""
     try:
         ua = UserAgent()
-        user_agent = ua.random
+        agents = list(dict.fromkeys(ua.random for _ in range(n * 3)))[:n]
+        if agents:
+            return agents
     except Exception:
-        user_agent = random.choice(FALLBACK_UAS)
+        pass
+    return list(FALLBACK_UAS)
 
+
+def get_random_headers():
     headers = {
-        "User-Agent": user_agent,
+        "User-Agent": random.choice(user_agents()),
         "Accept-Language": random.choice(["en-IN,en;q=0.9", "hi-IN,hi;q=0.9"]),
-        "Accept-Encoding": "gzip, deflate, br",
+        # no "br": requests can only decode brotli when the brotli package is installed
+        "Accept-Encoding": "gzip, deflate",
     }
     return headers
 
@@ -38,9 +80,7 @@ def get_random_headers():
 def fetch_html(url: str) -> str:
     headers = get_random_headers()
 
-    delay = random.uniform(3, 6)
-    logger.info(f"[+] Sleeping for {delay:.2f} seconds before request...")
-    time.sleep(delay)
+    _pace(url)
 
     response = requests.get(url, headers=headers, timeout=10)
 
@@ -49,3 +89,9 @@ def fetch_html(url: str) -> str:
         response.raise_for_status()
 
     return response.text
+
+
+def looks_blocked(html: str) -> bool:
+    head = html[:20000].lower()
+    return len(html) < 2000 or any(marker in head for marker in BLOCK_MARKERS)
+
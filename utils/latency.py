@@ -0,0 +1,175 @@
+# utils/latency.py
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from utils.paths import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+LATENCY_FILE = os.path.join(CACHE_DIR, "latency.json")
+
+
+def _quantile(sorted_samples, q: float) -> float:
+    # nearest-rank on an already sorted list
+    idx = min(len(sorted_samples) - 1, max(0, math.ceil(q * len(sorted_samples)) - 1))
+    return sorted_samples[idx]
+
+
+class AttemptClock:
+    """Times one scraper attempt from when it got its browser/driver slot, not from when it began queueing."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+
+    def slot_acquired(self) -> None:
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+_clock: ContextVar[Optional[AttemptClock]] = ContextVar("attempt_clock", default=None)
+
+
+@contextmanager
+def attempt_clock():
+    """Time the attempt run below this point in the current task (worker threads and child tasks included)."""
+    clock = AttemptClock()
+    token = _clock.set(clock)
+    try:
+        yield clock
+    finally:
+        _clock.reset(token)
+
+
+def slot_acquired() -> None:
+    """Called by the browser/driver pools when a waiting attempt gets its slot: queueing isn't site latency."""
+    clock = _clock.get()
+    if clock is not None:
+        clock.slot_acquired()
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful scraper-attempt durations per site. A site's
+    timeout is its `percentile` latency times `headroom`, clamped to
+    [floor, ceiling] and never above the site's configured default, which also
+    applies until `min_samples` have been seen. Timed-out attempts are counted
+    but kept out of the window. Windows are saved to disk so a restart keeps
+    what was learned.
+    """
+
+    def __init__(self, defaults: Dict[str, float], path: Optional[str] = LATENCY_FILE, window: int = 200,
+                 percentile: float = 0.95, headroom: float = 1.5, floor: float = 8.0, ceiling: float = 60.0,
+                 min_samples: int = 20):
+        self.defaults = dict(defaults)
+        self.path = path
+        self.window = window
+        self.percentile = percentile
+        self.headroom = headroom
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._unsaved = 0
+        self._load()
+
+    @classmethod
+    def from_env(cls, defaults: Dict[str, float]) -> "LatencyTracker":
+        return cls(defaults,
+                   path=os.environ.get("LATENCY_FILE", LATENCY_FILE) if os.environ.get("LATENCY_PERSIST", "1") != "0" else None,
+                   window=int(os.environ.get("LATENCY_WINDOW", "200")),
+                   percentile=float(os.environ.get("LATENCY_PERCENTILE", "0.95")),
+                   headroom=float(os.environ.get("LATENCY_HEADROOM", "1.5")),
+                   floor=float(os.environ.get("LATENCY_TIMEOUT_FLOOR", "8")),
+                   ceiling=float(os.environ.get("LATENCY_TIMEOUT_CEILING", "60")),
+                   min_samples=int(os.environ.get("LATENCY_MIN_SAMPLES", "20")))
+
+    def _window(self, site: str) -> Deque[float]:
+        return self._samples.setdefault(site, deque(maxlen=self.window))
+
+    def record(self, site: str, seconds: float) -> bool:
+        """Add a successful attempt's duration. Returns True once a save() is due (run it off the event loop)."""
+        with self._lock:
+            self._window(site).append(seconds)
+            self._unsaved += 1
+            return bool(self.path) and self._unsaved >= 20
+
+    def record_timeout(self, site: str) -> None:
+        with self._lock:
+            self._timeouts[site] = self._timeouts.get(site, 0) + 1
+
+    def quantile(self, site: str, q: float) -> Optional[float]:
+        """The site's q-quantile attempt latency, or None while there are fewer than min_samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(site, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return _quantile(samples, q)
+
+    def timeout(self, site: str, default: float = 30.0) -> float:
+        configured = self.defaults.get(site, default)
+        observed = self.quantile(site, self.percentile)
+        if observed is None:
+            return configured
+        return round(min(self.ceiling, configured, max(self.floor, observed * self.headroom)), 1)
+
+    # -- persistence ------------------------------------------------------
+    def _load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for site, samples in data.get("samples", {}).items():
+            self._window(site).extend(float(s) for s in samples[-self.window:])
+        logger.info("[Latency] loaded %d site window(s) from %s", len(self._samples), self.path)
+
+    def save(self) -> None:
+        """Blocking file write: call it through asyncio.to_thread from async code."""
+        if not self.path:
+            return
+        with self._lock:
+            data = {"saved_at": time.time(), "samples": {site: list(s) for site, s in self._samples.items()}}
+            self._unsaved = 0
+        with self._save_lock:
+            self._write(data)
+
+    def _write(self, data: Dict[str, object]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("[Latency] could not save %s: %s", self.path, e)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        out: Dict[str, Dict[str, object]] = {}
+        for site in sorted(set(self.defaults) | set(self._samples)):
+            with self._lock:
+                samples = sorted(self._samples.get(site, ()))
+                timeouts = self._timeouts.get(site, 0)
+            out[site] = {
+                "samples": len(samples),
+                "p50": round(_quantile(samples, 0.5), 2) if samples else None,
+                "p90": round(_quantile(samples, 0.9), 2) if samples else None,
+                "p99": round(_quantile(samples, 0.99), 2) if samples else None,
+                "timeouts": timeouts,
+                "timeout": self.timeout(site),
+            }
+        return out
@@ -1,3 +1,18 @@
+import re
+
+# Filler words and colour names the relevance matchers ignore, and storage sizes ("256 GB")
+COMMON_STOPWORDS = {
+    'mobile', 'phone', 'with', 'and', 'works', 'for', 'the', 'in', 'a', 'an',
+    'new', 'smartphone', 'dual', 'sim', 'edition', 'version', 'model', 'capacity',
+    'cellular', 'unlocked', 'brand', 'only', 'available'
+}
+COLOR_KEYWORDS = {
+    'black', 'white', 'red', 'blue', 'green', 'yellow', 'gold', 'silver',
+    'titanium', 'natural', 'desert', 'pink', 'purple', 'graphite', 'space', 'grey', 'gray', 'teal', 'ultramarine'
+}
+STORAGE_RE = re.compile(r'\b\d+(\.\d+)?\s*(gb|tb|mb)\b', flags=re.I)
+
+
 def is_match(title: str, query: str) -> bool:
     """
     Returns True if all query words are present in title, case-insensitive.
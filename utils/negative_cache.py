@@ -0,0 +1,131 @@
+# utils/negative_cache.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.result_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+# How long each kind of failure is remembered. A site with no match for a query
+# (its results page rendered, no card matched) rarely grows one within minutes;
+# blocks and timeouts are retried sooner, and pages that never showed results or
+# errored out (selector_timeout / failed) sooner still, as they are often transient.
+DEFAULT_TTLS = {
+    "no_match": float(os.environ.get("NEGATIVE_CACHE_TTL_NO_MATCH", "600")),
+    "blocked": float(os.environ.get("NEGATIVE_CACHE_TTL_BLOCKED", "120")),
+    "timeout": float(os.environ.get("NEGATIVE_CACHE_TTL_TIMEOUT", "90")),
+    "selector_timeout": float(os.environ.get("NEGATIVE_CACHE_TTL_SELECTOR_TIMEOUT", "60")),
+    "failed": float(os.environ.get("NEGATIVE_CACHE_TTL_FAILED", "30")),
+}
+
+_BLOCK_MARKERS = ("captcha", "access denied", "blocked", "robot", "403", "429")
+
+
+def failure_reason(exc: BaseException) -> Optional[str]:
+    """
+    "blocked" / "timeout" / "selector_timeout" / "failed" for failures worth
+    remembering; None for anything else (maybe our own bug). Scrapers mark
+    theirs with a `reason` attribute (search_strategy.NoResultsPage,
+    readiness.ResultsNotReady).
+    """
+    text = str(exc).lower()
+    if any(marker in text for marker in _BLOCK_MARKERS):
+        return "blocked"
+    reason = getattr(exc, "reason", None)
+    if reason in DEFAULT_TTLS:
+        return reason
+    if isinstance(exc, asyncio.TimeoutError):
+        return "timeout"
+    return None
+
+
+class NegativeEntry:
+    def __init__(self, reason: str, result: Any, stored_at: float, expires_at: float):
+        self.reason = reason
+        self.result = result
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def meta(self) -> Dict[str, Any]:
+        return {"hit": True, "negative": True, "reason": self.reason,
+                "age": round(time.time() - self.stored_at, 1)}
+
+
+class NegativeCache:
+    """
+    Short-lived memory of "this site has nothing for this query" (no match,
+    blocked, timed out), keyed like the result cache, so a repeat search
+    answers that site instantly instead of spending a browser on it again.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 5000, enabled: bool = True):
+        self.ttls = dict(ttls or DEFAULT_TTLS)
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], NegativeEntry]" = OrderedDict()
+        self.hits: Dict[str, int] = {reason: 0 for reason in self.ttls}
+        self.stored: Dict[str, int] = {reason: 0 for reason in self.ttls}
+
+    @classmethod
+    def from_env(cls) -> "NegativeCache":
+        return cls(max_entries=int(os.environ.get("NEGATIVE_CACHE_MAX_ENTRIES", "5000")),
+                   enabled=os.environ.get("NEGATIVE_CACHE", "1") != "0")
+
+    def get(self, query: str, site: str) -> Optional[NegativeEntry]:
+        if not self.enabled:
+            return None
+        key = (cache_key(query), site)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self.hits[entry.reason] = self.hits.get(entry.reason, 0) + 1
+            return entry
+
+    def put(self, query: str, site: str, reason: str, result: Any) -> None:
+        if not self.enabled or reason not in self.ttls:
+            return
+        now = time.time()
+        key = (cache_key(query), site)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = NegativeEntry(reason, result, now, now + self.ttls[reason])
+            self.stored[reason] = self.stored.get(reason, 0) + 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info("[NegativeCache] %s/%r: %s for %.0fs", site, key[0], reason, self.ttls[reason])
+
+    def forget(self, query: str, site: str) -> None:
+        """The site answered after all: drop what we remembered."""
+        with self._lock:
+            self._entries.pop((cache_key(query), site), None)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": dict(self.hits),
+                "stored": dict(self.stored),
+            }
+
+
+_cache: Optional[NegativeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_negative_cache() -> NegativeCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = NegativeCache.from_env()
+        return _cache
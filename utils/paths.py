@@ -0,0 +1,6 @@
+# utils/paths.py
+import os
+
+# Everything the app keeps on disk between runs (driver paths, sessions, assets,
+# result store, snapshots, latency windows) lives under here
+CACHE_DIR = os.environ.get("WORTHIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "worthit"))
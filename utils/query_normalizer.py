@@ -0,0 +1,100 @@
+# utils/query_normalizer.py
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+# The vocabularies the scrapers' relevance matchers use
+from utils.matcher import COLOR_KEYWORDS, COMMON_STOPWORDS, STORAGE_RE
+
+# A product line that already names its maker: "apple iphone 16" is "iphone 16"
+BRAND_LINES = {
+    "apple": {"iphone", "ipad", "macbook", "airpods"},
+    "samsung": {"galaxy"},
+    "google": {"pixel"},
+    "xiaomi": {"redmi", "poco"},
+    "oneplus": {"nord"},
+}
+
+# "s24+" -> "s24 plus", "pro-max" -> "pro max"
+_PLUS_RE = re.compile(r"(?<=\w)\+")
+_PUNCT_RE = re.compile(r"[^\w\s.]")
+
+
+class CanonicalQuery:
+    """
+    A search reduced to what decides its results. `key` (product words, then
+    the storage and colour filters) is what caches, single-flight and the
+    background registry are keyed on, so "iphone 16 black" never gets the
+    answer scraped for "iphone 16 red". The scrapers are still asked for
+    `search_text`, the query as the user typed it, since their relevance
+    filters match on the user's words ("s24+" must not become "s24 plus").
+    """
+
+    def __init__(self, text: str, product: List[str], storage: List[str], colors: List[str]):
+        self.text = text
+        self.product = product
+        self.storage = storage
+        self.colors = colors
+
+    @property
+    def key(self) -> str:
+        return " ".join(self.product + self.storage + self.colors)
+
+    @property
+    def search_text(self) -> str:
+        return self.text
+
+    @property
+    def filters(self) -> Dict[str, str]:
+        out = {}
+        if self.storage:
+            out["storage"] = " ".join(self.storage)
+        if self.colors:
+            out["color"] = " ".join(self.colors)
+        return out
+
+    def conflicts(self, title: str) -> List[str]:
+        """Requested attributes a result title contradicts (it names a different storage or colour)."""
+        if not title:
+            return []
+        lowered = title.lower()
+        found = []
+        if self.storage:
+            sizes = {m.group(0).replace(" ", "").lower() for m in STORAGE_RE.finditer(lowered)}
+            if sizes and not set(self.storage) <= sizes:
+                found.append("storage")
+        if self.colors:
+            words = set(_PUNCT_RE.sub(" ", lowered).split())
+            title_colors = words & COLOR_KEYWORDS
+            if title_colors and not title_colors & set(self.colors):
+                found.append("color")
+        return found
+
+    def __repr__(self) -> str:
+        return f"CanonicalQuery({self.key!r}, filters={self.filters})"
+
+
+@lru_cache(maxsize=4096)
+def canonicalize(query: str) -> CanonicalQuery:
+    text = _PLUS_RE.sub(" plus", query.lower())
+    text = _PUNCT_RE.sub(" ", text.replace("-", " "))
+
+    # "8gb 256gb": RAM and storage both stay, in the order given
+    storage = [m.group(0).replace(" ", "") for m in STORAGE_RE.finditer(text)]
+    text = STORAGE_RE.sub(" ", text)
+
+    words = text.split()
+    colors = [w for w in words if w in COLOR_KEYWORDS]
+    product = [w for w in words if w not in COMMON_STOPWORDS and w not in COLOR_KEYWORDS]
+    for brand, lines in BRAND_LINES.items():
+        if brand in product and lines & set(product):
+            product.remove(brand)
+
+    if not product:
+        # nothing left but filler words: keep the query as typed, just normalized
+        product = words
+    return CanonicalQuery(" ".join(query.split()), product, storage, colors)
+
+
+def canonical_key(query: str) -> str:
+    return canonicalize(query).key
@@ -0,0 +1,148 @@
+# utils/readiness.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+# Resolves once `selector` matches at least `minCount` nodes and the DOM has been
+# quiet for `quietMs` (bounded by `maxSettleMs` on pages that never stop mutating),
+# or when `timeoutMs` runs out. Works with page.evaluate() and execute_async_script().
+_WAIT_FOR_CARDS_JS = """
+(selector, minCount, quietMs, maxSettleMs, timeoutMs) => new Promise((resolve) => {
+  const count = () => document.querySelectorAll(selector).length;
+  let quietTimer = null, settleTimer = null, done = false;
+  const finish = (ready) => {
+    if (done) return;
+    done = true;
+    observer.disconnect();
+    clearTimeout(quietTimer); clearTimeout(settleTimer); clearTimeout(deadline);
+    resolve({ready: ready, count: count()});
+  };
+  const check = () => {
+    if (count() < minCount) return;
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    if (settleTimer === null) settleTimer = setTimeout(() => finish(true), maxSettleMs);
+  };
+  const observer = new MutationObserver(check);
+  observer.observe(document.documentElement || document, {childList: true, subtree: true});
+  const deadline = setTimeout(() => finish(count() >= minCount), timeoutMs);
+  check();
+})
+"""
+
+
+class ResultsNotReady(RuntimeError):
+    """Raised by scrapers that cannot fall back when a page's results never showed up."""
+
+    reason = "selector_timeout"
+
+    def __init__(self, spec: "ReadySpec", timeout: Optional[float] = None):
+        super().__init__(f"{spec.site}: no {spec.selector!r} results after {spec.timeout if timeout is None else timeout}s")
+        self.site = spec.site
+
+
+class ReadySpec:
+    """When a results page is usable: `min_count` cards matched and the DOM quiet for `quiet_ms`."""
+
+    def __init__(self, site: str, selector: str, min_count: int = 1,
+                 quiet_ms: int = 250, timeout: float = 10.0):
+        self.site = site
+        self.selector = selector
+        self.min_count = max(1, min_count)
+        self.quiet_ms = quiet_ms
+        self.timeout = timeout
+
+    @classmethod
+    def for_site(cls, site: str, selector: str, min_count: int = 1,
+                 quiet_ms: int = 250, timeout: float = 10.0) -> "ReadySpec":
+        """Per-site defaults, overridable with READY_<SITE>_MIN_CARDS / _QUIET_MS / _TIMEOUT."""
+        prefix = f"READY_{site.upper()}_"
+        return cls(site, selector,
+                   min_count=int(os.environ.get(prefix + "MIN_CARDS", min_count)),
+                   quiet_ms=int(os.environ.get(prefix + "QUIET_MS", quiet_ms)),
+                   timeout=float(os.environ.get(prefix + "TIMEOUT", timeout)))
+
+    def _js_args(self, remaining: float) -> list:
+        return [self.selector, self.min_count, self.quiet_ms, self.quiet_ms * 4, max(0, int(remaining * 1000))]
+
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record(site: str, ready: bool, elapsed: float) -> None:
+    with _lock:
+        entry = _stats.setdefault(site, {"waits": 0, "timeouts": 0, "total_time": 0.0})
+        entry["waits"] += 1
+        entry["timeouts"] += 0 if ready else 1
+        entry["total_time"] += elapsed
+
+
+def readiness_stats() -> Dict[str, Dict[str, float]]:
+    """Per site: number of waits, how many ran out the clock, and the mean wait."""
+    with _lock:
+        return {
+            site: {
+                "waits": e["waits"],
+                "timeouts": e["timeouts"],
+                "avg_wait": round(e["total_time"] / e["waits"], 2) if e["waits"] else None,
+            }
+            for site, e in _stats.items()
+        }
+
+
+async def wait_ready(page, spec: ReadySpec, timeout: Optional[float] = None) -> bool:
+    """Playwright: wait until the results described by `spec` are usable. Returns False on timeout."""
+    timeout = spec.timeout if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+        # survives the navigation a form submit triggers; the observer then waits out the render
+        await page.wait_for_selector(spec.selector, state="attached", timeout=int(timeout * 1000))
+    except PlaywrightTimeoutError:
+        _record(spec.site, False, time.perf_counter() - start)
+        return False
+    remaining = timeout - (time.perf_counter() - start)
+    try:
+        result = await page.evaluate(f"(a) => ({_WAIT_FOR_CARDS_JS})(...a)", spec._js_args(remaining))
+        ready = bool(result and result.get("ready"))
+    except Exception as e:
+        # e.g. a late client-side redirect destroyed the context: the cards were there, use them
+        logger.debug("[Readiness] %s observer aborted: %s", spec.site, e)
+        ready = True
+    _record(spec.site, ready, time.perf_counter() - start)
+    return ready
+
+
+def wait_ready_sync(driver, spec: ReadySpec, timeout: Optional[float] = None) -> bool:
+    """Selenium twin of wait_ready()."""
+    timeout = spec.timeout if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, spec.selector)))
+    except TimeoutException:
+        _record(spec.site, False, time.perf_counter() - start)
+        return False
+    remaining = timeout - (time.perf_counter() - start)
+    try:
+        driver.set_script_timeout(remaining + 1)
+        result = driver.execute_async_script(
+            "const done = arguments[arguments.length - 1];"
+            f"({_WAIT_FOR_CARDS_JS})(...arguments[0]).then(done);",
+            spec._js_args(remaining))
+        ready = bool(result and result.get("ready"))
+    except Exception as e:
+        logger.debug("[Readiness] %s observer aborted: %s", spec.site, e)
+        ready = True
+    _record(spec.site, ready, time.perf_counter() - start)
+    return ready
@@ -0,0 +1,200 @@
+# utils/result_cache.py
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from utils.query_normalizer import canonical_key
+from utils.result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.environ.get("RESULT_CACHE_TTL", "900"))
+# How long past its TTL an entry may still be served (flagged stale) while it is refreshed
+MAX_STALE = float(os.environ.get("RESULT_CACHE_MAX_STALE", str(24 * 3600)))
+# Serve stale entries by default (the ?stale= query parameter overrides it per request)
+SWR_DEFAULT = os.environ.get("RESULT_CACHE_SWR", "1") != "0"
+# Seconds into a request a stale entry's refresh may still be pushed as a follow-up event
+SWR_WAIT = float(os.environ.get("RESULT_CACHE_SWR_WAIT", "5"))
+
+
+def _site_env(site: str) -> str:
+    # "Reliance Digital" -> RELIANCE_DIGITAL
+    return re.sub(r"\W+", "_", site).strip("_").upper()
+
+
+def cache_key(query: str) -> str:
+    # "Apple iPhone 16", "iphone  16" and "iPhone 16 black" share one entry
+    return canonical_key(query)
+
+
+def is_cacheable(result: Any) -> bool:
+    """Only real answers are cached; errors and empty results are scraped again next time."""
+    if not result:  # None, or the {} the Playwright scrapers return for no match
+        return False
+    if isinstance(result, dict) and "error" in result:
+        return False
+    return True
+
+
+class CachedResult:
+    def __init__(self, result: Any, stored_at: float, expires_at: float):
+        self.result = result
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def stale(self) -> bool:
+        return self.expires_at <= time.time()
+
+    def meta(self) -> Dict[str, Any]:
+        """Cache-hit metadata for an SSE payload."""
+        return {"hit": True, "age": round(self.age, 1), "ttl": round(self.expires_at - self.stored_at, 1),
+                "stale": self.stale}
+
+
+class ResultCache:
+    """
+    Per-site scraper results keyed by normalized query, each site with its own
+    TTL (RESULT_CACHE_TTL, overridden by RESULT_CACHE_TTL_<SITE>). Bounded in
+    entries, least recently used first out. With a ResultStore behind it,
+    writes go through to disk and memory misses are looked up there, so the
+    cache survives restarts and is shared by the workers on a host.
+    """
+
+    def __init__(self, default_ttl: float = DEFAULT_TTL, site_ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 5000, max_stale: float = MAX_STALE, enabled: bool = True,
+                 store: Optional[ResultStore] = None):
+        self.default_ttl = default_ttl
+        self.store = store
+        self.max_stale = max_stale
+        self.site_ttls = dict(site_ttls or {})
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], CachedResult]" = OrderedDict()
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.misses = 0
+        self.expired = 0
+        self.stored = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "5000")),
+                   enabled=os.environ.get("RESULT_CACHE", "1") != "0",
+                   store=ResultStore.from_env())
+
+    def ttl(self, site: str) -> float:
+        if site in self.site_ttls:
+            return self.site_ttls[site]
+        return float(os.environ.get(f"RESULT_CACHE_TTL_{_site_env(site)}", self.default_ttl))
+
+    async def get(self, query: str, site: str, allow_stale: bool = False) -> Optional[CachedResult]:
+        """
+        The site's unexpired result for `query`, or None. With `allow_stale`, an
+        expired entry up to max_stale seconds past its TTL is returned as well
+        (entry.stale is True); the caller is expected to refresh it.
+        """
+        if not self.enabled:
+            return None
+        key = (cache_key(query), site)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if (entry is None or entry.expires_at <= now) and self.store is not None:
+            # another worker (or this one before a restart) may have it, or have refreshed it;
+            # off the event loop, as a locked database can wait up to its busy timeout
+            row = await asyncio.to_thread(self.store.get, *key)
+            if row is not None and (entry is None or row[1] > entry.stored_at):
+                entry = CachedResult(*row)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._trim()
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                if not allow_stale or entry.expires_at + self.max_stale <= now:
+                    self.expired += 1
+                    return None
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def begin_refresh(self, query: str, site: str) -> bool:
+        """Claim the background refresh of a stale entry; False if one is already running."""
+        key = (cache_key(query), site)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, query: str, site: str) -> None:
+        with self._lock:
+            self._refreshing.discard((cache_key(query), site))
+
+    def put(self, query: str, site: str, result: Any) -> None:
+        if not self.enabled or not is_cacheable(result):
+            return
+        now = time.time()
+        key = (cache_key(query), site)
+        entry = CachedResult(result, now, now + self.ttl(site))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            self.stored += 1
+            self._trim()
+        if self.store is not None:
+            self.store.put(*key, result, entry.stored_at, entry.expires_at)
+
+    def _trim(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.expired
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "refreshing": len(self._refreshing),
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stored": self.stored,
+                "evictions": self.evictions,
+                "store": self.store.stats() if self.store is not None else None,
+            }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache.from_env()
+        return _cache
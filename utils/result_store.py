@@ -0,0 +1,181 @@
+# utils/result_store.py
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.paths import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    query       TEXT NOT NULL,
+    site        TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    stored_at   REAL NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (query, site)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+"""
+
+# Reads only bump accessed_at (an LRU write) when the last bump is older than this
+_TOUCH_INTERVAL = 60.0
+
+
+class ResultStore:
+    """
+    Scraper results on disk, so a restart or deploy doesn't start from a cold
+    cache. SQLite in WAL mode: readers never block the writer and several
+    uvicorn workers on the same host can share the file. Rows are looked up
+    lazily (nothing is loaded at startup) and pruned by age and, least
+    recently used first, by count. All calls block on SQLite, so async code
+    runs get()/prune()/stats() through asyncio.to_thread; put() only queues
+    the row for a background writer thread, which also does the pruning.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000, retention: float = 7 * 24 * 3600, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.retention = retention
+        self.enabled = enabled
+        self._local = threading.local()
+        self._queue: "queue.Queue[Optional[Tuple[str, str, Any, float, float]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._puts = 0
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.pruned = 0
+        self.errors = 0
+        if enabled:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._conn().executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("[ResultStore] disabled, cannot open %s: %s", path, e)
+                self.enabled = False
+
+    @classmethod
+    def from_env(cls) -> "ResultStore":
+        return cls(os.environ.get("RESULT_STORE_PATH", os.path.join(CACHE_DIR, "results.sqlite3")),
+                   max_entries=int(os.environ.get("RESULT_STORE_MAX_ENTRIES", "20000")),
+                   retention=float(os.environ.get("RESULT_STORE_RETENTION", str(7 * 24 * 3600))),
+                   enabled=os.environ.get("RESULT_STORE", "1") != "0")
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; sqlite3 connections must not cross threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, query: str, site: str) -> Optional[Tuple[Any, float, float]]:
+        """(result, stored_at, expires_at) for a normalized query and site, or None."""
+        if not self.enabled:
+            return None
+        self.reads += 1
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT result, stored_at, expires_at, accessed_at FROM results WHERE query = ? AND site = ?",
+                               (query, site)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[3] > _TOUCH_INTERVAL:
+                conn.execute("UPDATE results SET accessed_at = ? WHERE query = ? AND site = ?", (now, query, site))
+            self.hits += 1
+            return json.loads(row[0]), row[1], row[2]
+        except (sqlite3.Error, ValueError) as e:
+            self.errors += 1
+            logger.warning("[ResultStore] read failed for %s/%s: %s", site, query, e)
+            return None
+
+    def put(self, query: str, site: str, result: Any, stored_at: float, expires_at: float) -> None:
+        """Queue a row for the writer thread; never blocks."""
+        if not self.enabled:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+                self._writer.start()
+        self._queue.put((query, site, result, stored_at, expires_at))
+
+    def _write_loop(self) -> None:
+        while True:
+            row = self._queue.get()
+            try:
+                if row is None:
+                    return
+                self._write(*row)
+            finally:
+                self._queue.task_done()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out what is queued and stop the writer thread."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    def _write(self, query: str, site: str, result: Any, stored_at: float, expires_at: float) -> None:
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO results (query, site, result, stored_at, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (query, site, json.dumps(result, default=str), stored_at, expires_at, stored_at))
+            self.writes += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("[ResultStore] write failed for %s/%s: %s", site, query, e)
+            return
+        self._puts += 1
+        if self._puts % 100 == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop rows past the retention window, then the least recently used beyond max_entries."""
+        if not self.enabled:
+            return 0
+        try:
+            conn = self._conn()
+            removed = conn.execute("DELETE FROM results WHERE expires_at < ?", (time.time() - self.retention,)).rowcount
+            removed += conn.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)).rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("[ResultStore] prune failed: %s", e)
+            return 0
+        self.pruned += removed
+        if removed:
+            logger.info("[ResultStore] pruned %d row(s)", removed)
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        rows = None
+        if self.enabled:
+            try:
+                rows = self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "rows": rows,
+            "reads": self.reads,
+            "hits": self.hits,
+            "writes": self.writes,
+            "pruned": self.pruned,
+            "errors": self.errors,
+        }
@@ -0,0 +1,149 @@
+# utils/search_strategy.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A strategy returns the results-page HTML, or None when its results never showed up
+AsyncStrategy = Tuple[str, Callable[[], Awaitable[Optional[Any]]]]
+SyncStrategy = Tuple[str, Callable[[], Optional[Any]]]
+
+# A strategy that isn't a site's last resort is skipped once its recent hit rate drops
+# below MIN_HIT_RATE, apart from one probe every PROBE_EVERY calls in case the site changed
+RECENT_WINDOW = int(os.environ.get("STRATEGY_RECENT_WINDOW", "20"))
+MIN_ATTEMPTS = int(os.environ.get("STRATEGY_MIN_ATTEMPTS", "10"))
+MIN_HIT_RATE = float(os.environ.get("STRATEGY_MIN_HIT_RATE", "0.1"))
+PROBE_EVERY = int(os.environ.get("STRATEGY_PROBE_EVERY", "20"))
+
+
+class NoResultsPage(RuntimeError):
+    """
+    Every strategy failed to bring up a results page. `reason` is
+    "selector_timeout" when they all ran but the results never showed up,
+    "failed" when at least one errored (navigation, no driver, ...).
+    """
+
+    def __init__(self, site: str, failures: List[Tuple[str, Optional[BaseException]]]):
+        errors = [e for _, e in failures if e is not None]
+        if all(getattr(e, "reason", None) == "selector_timeout" for e in errors):
+            self.reason = "selector_timeout"
+        else:
+            self.reason = "failed"
+        detail = "; ".join(f"{name}: {e if e is not None else 'no results'}" for name, e in failures)
+        super().__init__(f"{site}: no results page ({detail or 'no strategy tried'})")
+        self.site = site
+
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+
+def _entry(site: str, strategy: str) -> Dict[str, Any]:
+    return _stats.setdefault(site, {}).setdefault(strategy, {
+        "attempts": 0, "successes": 0, "total_time": 0.0, "skipped": 0,
+        "recent": deque(maxlen=RECENT_WINDOW),
+    })
+
+
+def record_strategy(site: str, strategy: str, ok: bool, elapsed: float) -> None:
+    with _lock:
+        entry = _entry(site, strategy)
+        entry["attempts"] += 1
+        entry["successes"] += 1 if ok else 0
+        entry["total_time"] += elapsed
+        entry["recent"].append(ok)
+
+
+def should_try(site: str, strategy: str) -> bool:
+    """False for a fallback-able strategy that is switched off (STRATEGY_<NAME>=0) or keeps missing."""
+    if os.environ.get(f"STRATEGY_{strategy.upper()}", "1") == "0":
+        return False
+    with _lock:
+        entry = _entry(site, strategy)
+        recent = entry["recent"]
+        if len(recent) < MIN_ATTEMPTS or sum(recent) / len(recent) >= MIN_HIT_RATE:
+            return True
+        entry["skipped"] += 1
+        return entry["skipped"] % PROBE_EVERY == 0
+
+
+def recent_hit_rate(site: str, strategy: str) -> Optional[float]:
+    """The strategy's hit rate over its recent attempts, or None until it has MIN_ATTEMPTS of them."""
+    with _lock:
+        recent = _stats.get(site, {}).get(strategy, {}).get("recent")
+        if not recent or len(recent) < MIN_ATTEMPTS:
+            return None
+        return sum(recent) / len(recent)
+
+
+def strategy_stats() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per site and strategy: attempts, successes, hit rate and mean time."""
+    with _lock:
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for site, strategies in _stats.items():
+            out[site] = {}
+            for name, e in strategies.items():
+                out[site][name] = {
+                    "attempts": e["attempts"],
+                    "successes": e["successes"],
+                    "hit_rate": round(e["successes"] / e["attempts"], 3) if e["attempts"] else None,
+                    "recent_hit_rate": round(sum(e["recent"]) / len(e["recent"]), 3) if e["recent"] else None,
+                    "avg_time": round(e["total_time"] / e["attempts"], 2) if e["attempts"] else None,
+                    "skipped": e["skipped"],
+                }
+        return out
+
+
+async def run_strategies(site: str, strategies: List[AsyncStrategy]) -> Tuple[str, Any]:
+    """Try strategies in order until one yields a result. Returns (strategy name, result); raises NoResultsPage."""
+    failures: List[Tuple[str, Optional[BaseException]]] = []
+    for i, (name, fn) in enumerate(strategies):
+        if i < len(strategies) - 1 and not should_try(site, name):
+            continue
+        start = time.perf_counter()
+        try:
+            result = await fn()
+            error = None
+        except asyncio.CancelledError:
+            # cut off by the caller's deadline: a miss, or a strategy that keeps timing out stays first
+            record_strategy(site, name, False, time.perf_counter() - start)
+            raise
+        except Exception as e:
+            logger.warning("[%s] %s search strategy failed: %s", site, name, e)
+            result, error = None, e
+        elapsed = time.perf_counter() - start
+        record_strategy(site, name, result is not None, elapsed)
+        if result is not None:
+            logger.info("[%s] results via %s strategy in %.2fs", site, name, elapsed)
+            return name, result
+        logger.info("[%s] %s strategy found no results after %.2fs", site, name, elapsed)
+        failures.append((name, error))
+    raise NoResultsPage(site, failures)
+
+
+def run_strategies_sync(site: str, strategies: List[SyncStrategy]) -> Tuple[str, Any]:
+    """Blocking twin of run_strategies() for the Selenium fetchers."""
+    failures: List[Tuple[str, Optional[BaseException]]] = []
+    for i, (name, fn) in enumerate(strategies):
+        if i < len(strategies) - 1 and not should_try(site, name):
+            continue
+        start = time.perf_counter()
+        try:
+            result = fn()
+            error = None
+        except Exception as e:
+            logger.warning("[%s] %s search strategy failed: %s", site, name, e)
+            result, error = None, e
+        elapsed = time.perf_counter() - start
+        record_strategy(site, name, result is not None, elapsed)
+        if result is not None:
+            logger.info("[%s] results via %s strategy in %.2fs", site, name, elapsed)
+            return name, result
+        logger.info("[%s] %s strategy found no results after %.2fs", site, name, elapsed)
+        failures.append((name, error))
+    raise NoResultsPage(site, failures)
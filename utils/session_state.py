@@ -0,0 +1,198 @@
+# utils/session_state.py
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.paths import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Per-site cookies + localStorage in Playwright's storage_state format, one JSON file per site
+SESSION_DIR = os.path.join(CACHE_DIR, "sessions")
+ENABLED = os.environ.get("SESSION_STATE", "1") != "0"
+MAX_AGE = float(os.environ.get("SESSION_STATE_MAX_AGE", str(7 * 24 * 3600)))
+
+_lock = threading.Lock()
+_states: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+# driver -> id of the localStorage seeding script installed on it
+_driver_scripts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _path(site: str) -> str:
+    return os.path.join(SESSION_DIR, f"{site}.json")
+
+
+def _count(site: str, key: str) -> None:
+    with _lock:
+        entry = _counters.setdefault(site, {"popups_handled": 0, "popups_skipped": 0, "saves": 0})
+        entry[key] += 1
+
+
+def load_state(site: str) -> Optional[Dict[str, Any]]:
+    """The site's saved storage state, or None when there is none (or it is older than MAX_AGE)."""
+    if not ENABLED:
+        return None
+    with _lock:
+        cached = _states.get(site)
+    if cached is None:
+        try:
+            with open(_path(site), "r", encoding="utf-8") as f:
+                cached = (os.path.getmtime(_path(site)), json.load(f))
+        except (OSError, ValueError):
+            return None
+        with _lock:
+            _states[site] = cached
+    saved_at, state = cached
+    if time.time() - saved_at > MAX_AGE:
+        return None
+    return state
+
+
+def has_state(site: str) -> bool:
+    return load_state(site) is not None
+
+
+def save_state(site: str, state: Dict[str, Any]) -> None:
+    if not ENABLED:
+        return
+    with _lock:
+        _states[site] = (time.time(), state)
+    try:
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        tmp = _path(site) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, _path(site))
+    except OSError as e:
+        logger.warning("[SessionState] could not write %s: %s", _path(site), e)
+    _count(site, "saves")
+    logger.info("[SessionState] saved %s session (%d cookies)", site, len(state.get("cookies", [])))
+
+
+def context_options(site: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """`options` for browser.new_context(), seeded with the site's saved session if there is one."""
+    state = load_state(site)
+    if state is None:
+        return options
+    return {**options, "storage_state": state}
+
+
+def session_stats() -> Dict[str, Dict[str, object]]:
+    with _lock:
+        sites = set(_counters) | set(_states)
+        return {
+            site: {
+                **_counters.get(site, {"popups_handled": 0, "popups_skipped": 0, "saves": 0}),
+                "age_s": round(time.time() - _states[site][0], 1) if site in _states else None,
+            }
+            for site in sites
+        }
+
+
+# --- Playwright ---
+async def save_context_state(site: str, context) -> None:
+    try:
+        save_state(site, await context.storage_state())
+    except Exception as e:
+        logger.warning("[SessionState] could not capture %s session: %s", site, e)
+
+
+async def dismiss_popup(site: str, page, selector: str, timeout_ms: int = 2000) -> bool:
+    """
+    Click a consent/city popup away and persist the session that remembers it.
+    A session restored from disk only checks for the popup, it never waits for it.
+    """
+    if has_state(site):
+        button = await page.query_selector(selector)
+        if button is None or not await button.is_visible():
+            _count(site, "popups_skipped")
+            return False
+    else:
+        try:
+            button = await page.wait_for_selector(selector, state="visible", timeout=timeout_ms)
+        except PlaywrightTimeoutError:
+            # nothing to dismiss: this session is as warm as it gets
+            await save_context_state(site, page.context)
+            return False
+    await button.evaluate("b => b.click()")
+    _count(site, "popups_handled")
+    await save_context_state(site, page.context)
+    return True
+
+
+# --- Selenium ---
+def apply_to_driver(site: str, driver) -> bool:
+    """
+    Seed a pooled driver with the saved session before it navigates: cookies via
+    CDP, localStorage via a script that runs ahead of the site's own scripts.
+    The pool clears cookies between checkouts, so this runs per checkout.
+    """
+    state = load_state(site)
+    if state is None:
+        return False
+    try:
+        cookies = [{k: v for k, v in c.items() if k != "expires" or v > 0} for c in state.get("cookies", [])]
+        if cookies:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        old_script = _driver_scripts.pop(driver, None)
+        if old_script:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": old_script})
+        origins = {o["origin"]: {i["name"]: i["value"] for i in o.get("localStorage", [])}
+                   for o in state.get("origins", [])}
+        if origins:
+            source = (f"(() => {{ const items = ({json.dumps(origins)})[location.origin];"
+                      " if (!items) return;"
+                      " for (const [k, v] of Object.entries(items))"
+                      " if (localStorage.getItem(k) === null) localStorage.setItem(k, v); })();")
+            result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+            _driver_scripts[driver] = result.get("identifier")
+        return True
+    except Exception as e:
+        logger.warning("[SessionState] could not restore %s session into driver: %s", site, e)
+        return False
+
+
+def save_driver_state(site: str, driver) -> None:
+    try:
+        cookies = []
+        for c in driver.get_cookies():
+            cookie = {k: c[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in c}
+            cookie["expires"] = c.get("expiry", -1)
+            if c.get("sameSite"):
+                cookie["sameSite"] = c["sameSite"]
+            cookies.append(cookie)
+        origin, items = driver.execute_script(
+            "return [location.origin, Object.entries(localStorage).map(([name, value]) => ({name, value}))];")
+        save_state(site, {"cookies": cookies, "origins": [{"origin": origin, "localStorage": items}]})
+    except Exception as e:
+        logger.warning("[SessionState] could not capture %s session from driver: %s", site, e)
+
+
+def dismiss_popup_sync(site: str, driver, locator: Tuple[str, str], timeout: float = 2.0) -> bool:
+    """Selenium twin of dismiss_popup()."""
+    if has_state(site):
+        buttons = [b for b in driver.find_elements(*locator) if b.is_displayed()]
+        if not buttons:
+            _count(site, "popups_skipped")
+            return False
+        button = buttons[0]
+    else:
+        try:
+            button = WebDriverWait(driver, timeout).until(EC.visibility_of_element_located(locator))
+        except TimeoutException:
+            save_driver_state(site, driver)
+            return False
+    driver.execute_script("arguments[0].click();", button)
+    _count(site, "popups_handled")
+    save_driver_state(site, driver)
+    return True
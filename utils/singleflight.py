@@ -0,0 +1,60 @@
+# utils/singleflight.py
+import asyncio
+import logging
+from typing import Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent work: while a task for `key` is running,
+    every other caller gets that same task instead of starting its own, and
+    all of them receive its result. Subscribers are counted so that one
+    caller giving up (a closed SSE stream) doesn't cancel the work for the rest.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._subscribers: Dict[int, int] = {}
+        self.started = 0
+        self.joined = 0
+
+    def run(self, key: Hashable, start: Callable[[], asyncio.Task]) -> asyncio.Task:
+        """The running task for `key`, or a new one from start(). Pair with release() when abandoning it."""
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.joined += 1
+            self._subscribers[id(task)] += 1
+            logger.debug("[%s] joined in-flight %r", self.name, key)
+            return task
+        task = start()
+        self.started += 1
+        self._inflight[key] = task
+        self._subscribers[id(task)] = 1
+
+        def _on_done(t):
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            self._subscribers.pop(id(t), None)
+
+        task.add_done_callback(_on_done)
+        return task
+
+    def release(self, task: asyncio.Task) -> bool:
+        """Drop one subscriber; True when nobody else is waiting, i.e. the task may be cancelled."""
+        remaining = self._subscribers.get(id(task), 1) - 1
+        if remaining > 0:
+            self._subscribers[id(task)] = remaining
+            return False
+        self._subscribers.pop(id(task), None)
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "joined": self.joined,
+            "coalesced_ratio": round(self.joined / (self.started + self.joined), 3) if self.started + self.joined else None,
+        }
@@ -0,0 +1,250 @@
+# utils/snapshot_store.py
+"""
+Raw results-page HTML kept per (site, query), so parser or matching fixes can
+be re-run over real pages without a browser:
+
+    python -m utils.snapshot_store stats
+    python -m utils.snapshot_store reparse [--site croma] [--limit 100]
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from utils.paths import CACHE_DIR
+
+try:
+    import zstandard
+except ImportError:  # gzip is always there
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+
+# site key -> "module:function" taking (html, query) and returning what the scraper returns
+PARSERS = {
+    "croma": "scrapers.croma:parse_croma_results",
+    "reliance": "scrapers.reliance:parse_reliance_results",
+    "poorvika": "scrapers.poorvika:parse_poorvika_results",
+    "pai": "scrapers.pai:parse_pai_results",
+    "sangeetha": "scrapers.sangeetha:parse_sangeetha_results",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    site        TEXT NOT NULL,
+    query       TEXT NOT NULL,
+    digest      TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    PRIMARY KEY (site, query)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    path   TEXT NOT NULL,
+    size   INTEGER NOT NULL
+);
+"""
+
+
+def _compress(data: bytes) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+class SnapshotStore:
+    """
+    Content-addressed, compressed (zstd when installed, else gzip) HTML
+    snapshots: identical pages are stored once, each (site, query) points at
+    its latest page, and the blobs are capped at `max_bytes`, dropping the
+    oldest snapshots first. Off unless SNAPSHOTS=1.
+    """
+
+    def __init__(self, directory: str = SNAPSHOT_DIR, max_bytes: int = 512 * 1024 * 1024, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.saved = 0
+        self.deduped = 0
+        self.evicted = 0
+        if enabled:
+            try:
+                os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+                self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=5.0,
+                                             isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("[Snapshots] disabled, cannot use %s: %s", directory, e)
+                self.enabled = False
+
+    @classmethod
+    def from_env(cls) -> "SnapshotStore":
+        return cls(max_bytes=int(float(os.environ.get("SNAPSHOT_MAX_MB", "512")) * 1024 * 1024),
+                   enabled=os.environ.get("SNAPSHOTS", "0") == "1")
+
+    def save(self, site: str, query: str, html: str) -> Optional[str]:
+        """Store `html` as the latest results page for (site, query). Returns its digest."""
+        if not self.enabled or not html:
+            return None
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, "blobs", digest + (".html.zst" if zstandard else ".html.gz"))
+        with self._lock:
+            try:
+                known = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                if known:
+                    self.deduped += 1
+                else:
+                    blob = _compress(data)
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(blob)
+                    os.replace(path + ".tmp", path)
+                    self._conn.execute("INSERT INTO blobs (digest, path, size) VALUES (?, ?, ?)", (digest, path, len(blob)))
+                self._conn.execute("INSERT OR REPLACE INTO snapshots (site, query, digest, captured_at) VALUES (?, ?, ?, ?)",
+                                   (site, query, digest, time.time()))
+                self.saved += 1
+                self._evict()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("[Snapshots] could not save %s/%r: %s", site, query, e)
+                return None
+        return digest
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        while total > self.max_bytes:
+            oldest = self._conn.execute("SELECT site, query FROM snapshots ORDER BY captured_at LIMIT 1").fetchone()
+            if oldest is None:
+                break
+            self._conn.execute("DELETE FROM snapshots WHERE site = ? AND query = ?", oldest)
+            self.evicted += 1
+            for digest, path, size in self._conn.execute(
+                    "SELECT digest, path, size FROM blobs WHERE digest NOT IN (SELECT digest FROM snapshots)").fetchall():
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                total -= size
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def load(self, digest: str) -> Optional[str]:
+        row = self._conn.execute("SELECT path FROM blobs WHERE digest = ?", (digest,)).fetchone() if self.enabled else None
+        if row is None:
+            return None
+        with open(row[0], "rb") as f:
+            blob = f.read()
+        if row[0].endswith(".zst"):
+            if zstandard is None:
+                raise RuntimeError(f"{row[0]} needs the zstandard package")
+            data = zstandard.ZstdDecompressor().decompress(blob)
+        else:
+            data = gzip.decompress(blob)
+        return data.decode("utf-8")
+
+    def snapshots(self, site: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if not self.enabled:
+            return
+        sql = "SELECT site, query, digest, captured_at FROM snapshots"
+        args: tuple = ()
+        if site:
+            sql += " WHERE site = ?"
+            args = (site,)
+        for s, q, d, t in self._conn.execute(sql + " ORDER BY captured_at DESC", args).fetchall():
+            yield {"site": s, "query": q, "digest": d, "captured_at": t}
+
+    def stats(self) -> Dict[str, object]:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            snapshots = self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            blobs, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {
+            "enabled": True,
+            "codec": "zstd" if zstandard else "gzip",
+            "snapshots": snapshots,
+            "blobs": blobs,
+            "size_mb": round(size / 1048576, 1),
+            "saved": self.saved,
+            "deduped": self.deduped,
+            "evicted": self.evicted,
+        }
+
+
+_store: Optional[SnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore.from_env()
+        return _store
+
+
+async def save_snapshot(site: str, query: str, html: Optional[str]) -> None:
+    """Called by the scrapers with every results page they fetch; a no-op unless SNAPSHOTS=1."""
+    store = get_snapshot_store()
+    if store.enabled and html:
+        await asyncio.to_thread(store.save, site, query, html)
+
+
+# --- CLI ---
+def _parser(site: str):
+    module, func = PARSERS[site].split(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def reparse(store: SnapshotStore, site: Optional[str] = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Run today's parser over every stored page; yields one record per snapshot."""
+    for i, snap in enumerate(store.snapshots(site)):
+        if limit is not None and i >= limit:
+            break
+        if snap["site"] not in PARSERS:
+            continue
+        start = time.perf_counter()
+        try:
+            result = _parser(snap["site"])(store.load(snap["digest"]), snap["query"])
+            error = None
+        except Exception as e:
+            result, error = None, repr(e)
+        yield {**snap, "result": result, "error": error, "parse_s": round(time.perf_counter() - start, 3)}
+
+
+def main(argv=None) -> int:
+    cli = argparse.ArgumentParser(prog="python -m utils.snapshot_store", description="Stored results-page snapshots.")
+    sub = cli.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Snapshot and blob counts, size on disk.")
+    rp = sub.add_parser("reparse", help="Re-run the parsers over stored pages; one JSON line per snapshot.")
+    rp.add_argument("--site", choices=sorted(PARSERS))
+    rp.add_argument("--limit", type=int)
+    args = cli.parse_args(argv)
+
+    # the CLI reads snapshots whether or not the server has SNAPSHOTS=1
+    store = SnapshotStore(max_bytes=int(float(os.environ.get("SNAPSHOT_MAX_MB", "512")) * 1024 * 1024))
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+        return 0
+    start, count, failed = time.perf_counter(), 0, 0
+    for record in reparse(store, site=args.site, limit=args.limit):
+        count += 1
+        failed += record["error"] is not None
+        print(json.dumps(record, default=str))
+    print(f"reparsed {count} snapshot(s), {failed} failed, in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# utils/structured_data.py
+import asyncio
+import json
+import logging
+import re
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TITLE_KEYS = ("name", "title", "productName", "product_name", "displayName", "display_name")
+# selling-price keys first: on these retailers a bare "price" is usually the MRP
+DEFAULT_PRICE_KEYS = ("sellingPrice", "selling_price", "special_price", "specialPrice", "offerPrice", "offer_price",
+                      "finalPrice", "final_price", "salePrice", "lowPrice", "offers", "price")
+DEFAULT_URL_KEYS = ("url", "pdpUrl", "pdp_url", "productUrl", "product_url", "seo_url", "link", "href", "slug")
+DEFAULT_RATING_KEYS = ("aggregateRating", "rating", "averageRating", "average_rating", "ratingValue")
+# XHRs that mention "search" but aren't the results API
+DEFAULT_API_EXCLUDE = ("suggest", "autocomplete", "autosuggest", "typeahead", "trending", "popular", "recent")
+
+# where a number hides inside a price/rating object ({"effective": {"min": 999}}, offers, ...)
+_NUMBER_KEYS = ("effective", "selling", "value", "min", "amount", "price", "lowPrice",
+                "sellingPrice", "offerPrice", "ratingValue", "average")
+
+_NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+_LD_JSON_RE = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.S | re.I)
+_NUMBER_RE = re.compile(r"\d[\d,]*\.?\d*")
+
+
+class JsonSpec:
+    """Where a site keeps its results as JSON and what its product objects look like."""
+
+    def __init__(self, site: str, base_url: str, api_patterns: Iterable[str] = (),
+                 api_exclude: Iterable[str] = DEFAULT_API_EXCLUDE,
+                 title_keys: Tuple[str, ...] = DEFAULT_TITLE_KEYS,
+                 price_keys: Tuple[str, ...] = DEFAULT_PRICE_KEYS,
+                 url_keys: Tuple[str, ...] = DEFAULT_URL_KEYS,
+                 rating_keys: Tuple[str, ...] = DEFAULT_RATING_KEYS):
+        self.site = site
+        self.base_url = base_url.rstrip("/")
+        self.api_patterns = tuple(api_patterns)
+        self.api_exclude = tuple(api_exclude)
+        self.title_keys = title_keys
+        self.price_keys = price_keys
+        self.url_keys = url_keys
+        self.rating_keys = rating_keys
+
+    def wants(self, url: str) -> bool:
+        """Whether an XHR/fetch to `url` is the site's results API rather than typeahead or suggestions."""
+        lowered = url.lower()
+        return any(p in url for p in self.api_patterns) and not any(x in lowered for x in self.api_exclude)
+
+
+# --- embedded JSON ---
+def next_data(html: str) -> Optional[Any]:
+    m = _NEXT_DATA_RE.search(html)
+    if not m:
+        return None
+    try:
+        return json.loads(m.group(1))
+    except ValueError:
+        return None
+
+
+def ld_json(html: str) -> List[Any]:
+    blocks = []
+    for raw in _LD_JSON_RE.findall(html):
+        try:
+            blocks.append(json.loads(raw.strip()))
+        except ValueError:
+            continue
+    return blocks
+
+
+# --- product objects ---
+def _number(value: Any, depth: int = 0) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if isinstance(value, str):
+        m = _NUMBER_RE.search(value)
+        return float(m.group().replace(",", "")) if m else None
+    if isinstance(value, dict) and depth < 3:
+        for key in _NUMBER_KEYS:
+            if key in value:
+                n = _number(value[key], depth + 1)
+                if n is not None:
+                    return n
+    if isinstance(value, list) and value and depth < 3:
+        return _number(value[0], depth + 1)
+    return None
+
+
+def _first(d: Dict[str, Any], keys: Tuple[str, ...], kind: type) -> Optional[Any]:
+    for key in keys:
+        value = d.get(key)
+        if isinstance(value, kind) and value:
+            return value
+    return None
+
+
+def _as_product(d: Dict[str, Any], spec: JsonSpec) -> Optional[Dict[str, Any]]:
+    if isinstance(d.get("item"), dict):  # ld+json ListItem
+        d = d["item"]
+    title = _first(d, spec.title_keys, str)
+    if not title:
+        return None
+    # the lowest of the price fields: MRP and selling price often sit side by side
+    prices = [n for n in (_number(d[key]) for key in spec.price_keys if key in d) if n is not None]
+    if not prices:
+        return None
+    price = min(prices)
+    url = _first(d, spec.url_keys, str)
+    if url and not url.startswith("http"):
+        url = f"{spec.base_url}/{url.lstrip('/')}"
+    rating = None
+    for key in spec.rating_keys:
+        if key in d:
+            rating = _number(d[key])
+            if rating is not None:
+                break
+    return {
+        "title": title.strip(),
+        "price": price,
+        "rating": str(rating) if rating is not None else "Not Available",
+        "url": url or "Not Available",
+    }
+
+
+def find_products(payload: Any, spec: JsonSpec, max_depth: int = 14) -> List[Dict[str, Any]]:
+    """The longest list of product-shaped objects anywhere in `payload`."""
+    best: List[Dict[str, Any]] = []
+    stack = [(payload, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > max_depth:
+            continue
+        if isinstance(node, dict):
+            stack.extend((v, depth + 1) for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            dicts = [x for x in node if isinstance(x, dict)]
+            if dicts:
+                products = [p for p in (_as_product(x, spec) for x in dicts) if p]
+                # most of the list must look like products, so nav menus and facets don't qualify
+                if products and len(products) * 2 >= len(dicts) and len(products) > len(best):
+                    best = products
+            stack.extend((v, depth + 1) for v in node if isinstance(v, (dict, list)))
+    return best
+
+
+def extract_products(html: str, spec: JsonSpec, payloads: Iterable[Any] = ()) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Products from intercepted API responses, __NEXT_DATA__ or ld+json, in that
+    order. Returns (source, products); (None, []) when the page carries none.
+    """
+    for payload in payloads:
+        products = find_products(payload, spec)
+        if products:
+            return "xhr", products
+    if html:
+        data = next_data(html)
+        if data is not None:
+            products = find_products(data, spec)
+            if products:
+                return "next_data", products
+        blocks = ld_json(html)
+        if blocks:
+            products = find_products(blocks, spec)
+            if products:
+                return "ld_json", products
+    return None, []
+
+
+# --- which source answered, per site ---
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def record_source(site: str, source: str) -> None:
+    with _lock:
+        entry = _stats.setdefault(site, {})
+        entry[source] = entry.get(source, 0) + 1
+
+
+def structured_stats() -> Dict[str, Dict[str, int]]:
+    """Per site: how often results came from xhr / next_data / ld_json vs. the DOM parser."""
+    with _lock:
+        return {site: dict(e) for site, e in _stats.items()}
+
+
+# --- intercepted search-API responses (Playwright) ---
+_payloads: ContextVar[Optional[List[Any]]] = ContextVar("structured_payloads", default=None)
+
+
+@contextmanager
+def collect_payloads():
+    """Collect JSON captured by capture_json() anywhere below this point in the current task."""
+    sink: List[Any] = []
+    token = _payloads.set(sink)
+    try:
+        yield sink
+    finally:
+        _payloads.reset(token)
+
+
+async def _read_json(response, sink: List[Any]) -> None:
+    try:
+        if "json" in response.headers.get("content-type", ""):
+            sink.append(await response.json())
+    except Exception as e:
+        logger.debug("[StructuredData] unreadable response %s: %s", response.url, e)
+
+
+@asynccontextmanager
+async def capture_json(page, spec: JsonSpec):
+    """While active, keep the JSON bodies of the page's XHR/fetch calls to the results API (spec.wants)."""
+    sink = _payloads.get()
+    if sink is None or not spec.api_patterns:
+        yield
+        return
+    pending: List[asyncio.Future] = []
+
+    def on_response(response) -> None:
+        if response.request.resource_type in ("xhr", "fetch") and spec.wants(response.url):
+            pending.append(asyncio.ensure_future(_read_json(response, sink)))
+
+    page.on("response", on_response)
+    try:
+        yield
+    finally:
+        # the leased tab outlives this query: stop listening before handing it back
+        page.remove_listener("response", on_response)
+        if pending:
+            await asyncio.wait(pending, timeout=2)
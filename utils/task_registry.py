@@ -0,0 +1,125 @@
+# utils/task_registry.py
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _result_bytes(task: asyncio.Task) -> int:
+    # rough footprint of a finished task's result: its JSON size
+    if task.cancelled() or task.exception() is not None:
+        return 0
+    try:
+        return len(json.dumps(task.result(), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class TaskRegistry:
+    """
+    Bounded map of key -> asyncio.Task for background work whose result is
+    collected later (the /more results). Running tasks are never dropped;
+    finished ones go once they are older than `ttl`, once their result has
+    been consumed, or oldest first when the registry holds more than
+    `max_entries` tasks or `max_bytes` of results.
+    """
+
+    def __init__(self, name: str, max_entries: int = 500, ttl: float = 900.0, max_bytes: int = 16 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._tasks: "OrderedDict[str, asyncio.Task]" = OrderedDict()
+        self._finished_at: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self.evictions: Dict[str, int] = {"expired": 0, "consumed": 0, "entries": 0, "bytes": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "TaskRegistry":
+        prefix = name.upper()
+        return cls(name,
+                   max_entries=int(os.environ.get(f"{prefix}_MAX_ENTRIES", "500")),
+                   ttl=float(os.environ.get(f"{prefix}_TTL", "900")),
+                   max_bytes=int(float(os.environ.get(f"{prefix}_MAX_MB", "16")) * 1024 * 1024))
+
+    # -- mapping interface (what the old plain dict offered) -------------
+    def __setitem__(self, key: str, task: asyncio.Task) -> None:
+        self._drop(key)
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._finished(key, t))
+        self.prune()
+
+    def get(self, key: str, default: Optional[asyncio.Task] = None) -> Optional[asyncio.Task]:
+        self._expire(key)
+        return self._tasks.get(key, default)
+
+    def __getitem__(self, key: str) -> asyncio.Task:
+        task = self.get(key)
+        if task is None:
+            raise KeyError(key)
+        return task
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._tasks))
+
+    # -- eviction ---------------------------------------------------------
+    def consume(self, key: str) -> None:
+        """The caller has delivered this finished task's result: free it."""
+        task = self._tasks.get(key)
+        if task is not None and task.done():
+            self._drop(key)
+            self.evictions["consumed"] += 1
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is not task:
+            return  # replaced or evicted meanwhile
+        self._finished_at[key] = time.monotonic()
+        self._sizes[key] = _result_bytes(task)
+        self.prune()
+
+    def _drop(self, key: str) -> None:
+        self._tasks.pop(key, None)
+        self._finished_at.pop(key, None)
+        self._sizes.pop(key, None)
+
+    def _expire(self, key: str) -> None:
+        finished = self._finished_at.get(key)
+        if finished is not None and time.monotonic() - finished > self.ttl:
+            self._drop(key)
+            self.evictions["expired"] += 1
+
+    def prune(self) -> None:
+        for key in list(self._finished_at):
+            self._expire(key)
+        # oldest finished first; running tasks still count but are left alone
+        for reason, over in (("entries", lambda: len(self._tasks) > self.max_entries),
+                             ("bytes", lambda: sum(self._sizes.values()) > self.max_bytes)):
+            while over():
+                oldest = next((k for k in self._tasks if k in self._finished_at), None)
+                if oldest is None:
+                    break
+                self._drop(oldest)
+                self.evictions[reason] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self.prune()
+        running = sum(1 for t in self._tasks.values() if not t.done())
+        return {
+            "entries": len(self._tasks),
+            "running": running,
+            "finished": len(self._tasks) - running,
+            "result_kb": round(sum(self._sizes.values()) / 1024, 1),
+            "max_entries": self.max_entries,
+            "evictions": dict(self.evictions),
+        }